@@ -0,0 +1,194 @@
+#!/usr/bin/env python2.7
+
+from __future__ import print_function
+
+import numpy as np
+
+from logger import logger
+from IOManager import IOManager
+from Helpers import AsymptoticFormulae
+
+
+class BinningOptimizer(object):
+    r"""Class for optimizing the variable binning of a signal and background histogram
+    pair.
+
+    Starting from finely binned histograms the optimizer merges adjacent bins such that
+    every resulting bin satisfies the given constraints on the background, i.e. a
+    minimal background yield and/or a maximal relative statistical error. Among all
+    binnings satisfying the constraints it finds either
+
+        * the one maximizing the combined significance :math:`\sqrt{\sum_i Z_i^2}` of
+          all bins (``objective="significance"``), where :math:`Z_i` is computed with
+          :func:`AsymptoticFormulae.AsimovExpZ`, or
+
+        * the one with the most bins (``objective="nbins"``).
+
+    As splitting bins rarely reduces the combined significance, the constraints and
+    **maxbins** determine how fine the optimized binning is. The optimum is found by
+    dynamic programming over the cumulative sums of the bin contents, evaluating the
+    yields of all possible bins at once. Under- and overflow bins are not considered.
+
+    .. code-block:: python
+
+        optimizer = BinningOptimizer(sighisto, bkghisto, minbkg=1.0, maxrelerr=0.2)
+        bkghisto.Rebin(optimizer.GetEdges())
+    """
+
+    def __init__(
+        self,
+        sighisto,
+        bkghisto,
+        minbkg=0.0,
+        maxrelerr=None,
+        maxbins=None,
+        objective="significance",
+        flatbkgsys=0.3,
+    ):
+        r"""Initialize the optimizer for a pair of histograms with the same binning.
+
+        :param sighisto: (finely binned) signal histogram
+        :type sighisto: ``Histo1D``, ``TH1D``
+
+        :param bkghisto: (finely binned) total background histogram
+        :type bkghisto: ``Histo1D``, ``TH1D``
+
+        :param minbkg: minimal background yield per bin, which must always be positive
+            (default: 0.0)
+        :type minbkg: ``float``
+
+        :param maxrelerr: maximal relative statistical error of the background yield
+            per bin (default: ``None``: no constraint)
+        :type maxrelerr: ``float``
+
+        :param maxbins: maximal number of bins (default: ``None``: no constraint)
+        :type maxbins: ``int``
+
+        :param objective: quantity to be maximized, either 'significance' or 'nbins'
+            (default: 'significance')
+        :type objective: ``str``
+
+        :param flatbkgsys: relative flat systematic uncertainty on the background
+            added in quadrature to its statistical error when computing the
+            significance (default: 0.3)
+        :type flatbkgsys: ``float``
+        """
+        if objective not in ["significance", "nbins"]:
+            logger.error(
+                "Invalid objective '{}', must be 'significance' or 'nbins'!".format(
+                    objective
+                )
+            )
+            raise ValueError
+        self._edges = np.asarray(IOManager._getBinning(bkghisto)["xbinning"])
+        if len(IOManager._getBinning(sighisto)["xbinning"]) != len(self._edges):
+            logger.error(
+                "Signal histogram '{}' and background histogram '{}' have different "
+                "binnings!".format(sighisto.GetName(), bkghisto.GetName())
+            )
+            raise ValueError
+        # Cumulative sums over the visible bins (without under- and overflow bins):
+        self._cumsums = [
+            np.concatenate([[0.0], np.cumsum(array[1:-1])])
+            for array in [
+                IOManager._getBinContents(sighisto),
+                IOManager._getBinContents(bkghisto),
+                IOManager._getBinSumw2(bkghisto),
+            ]
+        ]
+        self._minbkg = minbkg
+        self._maxrelerr = maxrelerr
+        self._maxbins = maxbins
+        self._objective = objective
+        self._flatbkgsys = flatbkgsys
+        self._result = None
+
+    def _getScores(self):
+        # Return the score of every possible bin ranging from edge i to edge j > i as
+        # matrix [i, j] (-inf for bins violating the constraints).
+        sig, bkg, sumw2 = [
+            cumsum[np.newaxis, :] - cumsum[:, np.newaxis] for cumsum in self._cumsums
+        ]
+        valid = np.triu(np.ones(bkg.shape, dtype=bool), 1)
+        valid &= (bkg > 0) & (bkg >= self._minbkg)
+        if self._maxrelerr is not None:
+            valid &= sumw2 <= (self._maxrelerr * bkg) ** 2
+        if self._objective == "nbins":
+            scores = np.ones(bkg.shape)
+        else:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                relerr = np.sqrt(sumw2 / bkg ** 2 + self._flatbkgsys ** 2)
+            scores = (
+                AsymptoticFormulae.AsimovExpZArray(np.clip(sig, 0, None), bkg, relerr)
+                ** 2
+            )
+        return np.where(valid, scores, -np.inf)
+
+    def _optimize(self):
+        # Find the binning maximizing the sum of the scores of its bins. best[j] is the
+        # best sum of scores of any binning ending at edge j and prev[j] the preceding
+        # edge of the last bin of that binning. With a maximal number of bins the best
+        # binnings ending at each edge are determined for each number of bins.
+        scores = self._getScores()
+        nedges = len(self._edges)
+        if self._maxbins is None:
+            best = np.full(nedges, -np.inf)
+            best[0] = 0.0
+            prev = np.zeros(nedges, dtype=int)
+            for j in range(1, nedges):
+                candidates = best[:j] + scores[:j, j]
+                prev[j] = np.argmax(candidates)
+                best[j] = candidates[prev[j]]
+            total, prevs = best[-1], [prev] * nedges
+        else:
+            best = np.full(nedges, -np.inf)
+            best[0] = 0.0
+            total, nbins, prevs = -np.inf, 0, []
+            for k in range(1, min(self._maxbins, nedges - 1) + 1):
+                candidates = best[:, np.newaxis] + scores
+                prevs.append(np.argmax(candidates, axis=0))
+                best = candidates[prevs[-1], np.arange(nedges)]
+                if best[-1] > total:
+                    total, nbins = best[-1], k
+            prevs = prevs[:nbins][::-1]
+        if not np.isfinite(total):
+            logger.warning(
+                "No binning satisfies the constraints! Merging all bins into one..."
+            )
+            return [0, nedges - 1], 0.0
+        indices = [nedges - 1]
+        for prev in prevs:
+            if indices[-1] == 0:
+                break
+            indices.append(prev[indices[-1]])
+        return indices[::-1], total
+
+    def GetEdges(self):
+        r"""Return the bin edges of the optimized binning.
+
+        :returntype: ``list``
+        """
+        if self._result is None:
+            self._result = self._optimize()
+        return [float(self._edges[i]) for i in self._result[0]]
+
+    def GetSignificance(self):
+        r"""Return the combined significance :math:`\sqrt{\sum_i Z_i^2}` of the
+        optimized binning (only meaningful for ``objective="significance"``).
+
+        :returntype: ``float``
+        """
+        if self._result is None:
+            self._result = self._optimize()
+        return float(np.sqrt(max(self._result[1], 0.0)))
+
+    def Apply(self, *histos):
+        r"""Merge the bins of the given histograms into the optimized binning.
+
+        :param \*histos: histograms with the same binning as the ones given to the
+            constructor
+        :type \*histos: ``Histo1D``
+        """
+        edges = self.GetEdges()
+        for histo in histos:
+            histo.Rebin(edges)
@@ -4,7 +4,10 @@ from __future__ import print_function
 
 import ROOT
 
+import numpy as np
+
 from Stack import Stack
+from IOManager import IOManager
 
 
 class ContributionPlot(Stack):
@@ -44,7 +47,6 @@ class ContributionPlot(Stack):
                 #. **\*args** (``Stack``, ``THStack``) -- register a list of histograms
                    to a new stack
         """
-        self._loadTemplates()
         kwargs.setdefault("template", "common")
         name = "{}_ContributionPlotStack".format(args[0].GetName())
         super(ContributionPlot, self).__init__(name)
@@ -56,19 +58,37 @@ class ContributionPlot(Stack):
                 assert histo.InheritsFrom("TH1")
                 self.Register(histo, stack=True)
         self.SortStack()  # before normalization!
-        for bn in range(1, self._stacksumhisto.GetNbinsX() + 1, 1):
-            for histo in self._store["stack"]:
-                try:
-                    histo.SetBinContent(
-                        bn,
-                        histo.GetBinContent(bn) / self._stacksumhisto.GetBinContent(bn),
-                    )
-                except ZeroDivisionError:
-                    histo.SetBinContent(bn, 0)
-            self._stacksumhisto.SetBinContent(bn, 1.0)
+        self.NormalizeStack()
         self.DeclareProperties(**kwargs)
         self.BuildStack(sort=False)
 
+    def NormalizeStack(self):
+        # Normalize all stacked histograms with respect to the stacksum in one go. Bins
+        # with a vanishing stacksum are set to zero. Under- and overflow bins are left
+        # untouched.
+        if not self._store["stack"]:
+            return
+        self.UpdateStackSum()
+        inrange = slice(1, self._stacksumhisto.GetNbinsX() + 1)
+        stacksum = IOManager._getBinContents(self._stacksumhisto)
+        contents = np.vstack(
+            [IOManager._getBinContents(histo) for histo in self._store["stack"]]
+        )
+        fractions = np.zeros_like(contents[:, inrange])
+        np.divide(
+            contents[:, inrange],
+            stacksum[inrange],
+            out=fractions,
+            where=stacksum[inrange] != 0,
+        )
+        contents[:, inrange] = fractions
+        for histo, array in zip(self._store["stack"], contents):
+            IOManager._setBinContents(histo, array)
+        stacksum[inrange] = 1.0
+        IOManager._setBinContents(self._stacksumhisto, stacksum)
+        self._stacksumcontents = stacksum
+        self._stacksumsumw2 = IOManager._getBinSumw2(self._stacksumhisto)
+
 
 if __name__ == "__main__":
 
@@ -0,0 +1,431 @@
+#!/usr/bin/env python2.7
+
+from __future__ import print_function
+
+import ROOT
+
+import os
+import json
+
+import numpy as np
+
+from uuid import uuid4
+from collections import OrderedDict, defaultdict
+from distutils.spawn import find_executable
+
+from MethodProxy import *
+from profiler import profiler, Profiled
+from IOManager import IOManager
+from Helpers import CheckPath, SplitCuts, TeX2PDF, tex_str
+
+
+@PreloadProperties
+class CutFlow(MethodProxy):
+    r"""Class for cut flows.
+
+    Computes the yields of multiple samples after each step of an ordered list of cuts.
+    For each step the cumulative yield (all cuts up to and including the step applied)
+    and the individual yield (only the cut of the step applied) are computed together
+    with their statistical uncertainty. All cuts are evaluated only once per event, in
+    a single pass over each input tree.
+    """
+
+    def __init__(self, name=None, **kwargs):
+        r"""Initialize a cut flow.
+
+        :param name: name of the cut flow (default: random 8-digits HEX hash value)
+        :type name: ``str``
+
+        :param \**kwargs: :class:`.CutFlow` properties
+        """
+        MethodProxy.__init__(self)
+        if name is None:
+            name = uuid4().hex[:8]
+        self._name = name
+        self._cuts = []
+        self._preselection = []
+        self._samples = []
+        self._yields = None
+        for key, value in self.GetTemplate(kwargs.get("template", "common")).items():
+            kwargs.setdefault(key, value)
+        self.DeclareProperties(**kwargs)
+
+    def GetName(self):
+        r"""Return the name of the cut flow.
+
+        :returntype: ``str``
+        """
+        return self._name
+
+    def SetCuts(self, *cuts):
+        r"""Define the ordered list of cuts (see :func:`N1Plotter.SetCuts`).
+
+        Cut strings combining several cuts with '&&' are split into individual steps.
+
+        :param \*cuts: cut expressions
+        :type \*cuts: ``str``
+        """
+        self._cuts = SplitCuts(*cuts)
+        self._yields = None
+
+    def GetCuts(self):
+        r"""Return the ordered list of cuts.
+
+        :returntype: ``list``
+        """
+        return self._cuts
+
+    def SetPreselection(self, *cuts):
+        r"""Define cuts which are applied to all samples before the first step.
+
+        :param \*cuts: cut expressions
+        :type \*cuts: ``str``
+        """
+        self._preselection = list(cuts)
+        self._yields = None
+
+    def GetPreselection(self):
+        r"""Return the list of preselection cuts.
+
+        :returntype: ``list``
+        """
+        return self._preselection
+
+    def Register(self, infile, **kwargs):
+        r"""Register a sample to the cut flow.
+
+        :param infile: path to the input :py:mod:`ROOT` file
+        :type infile: ``str``
+
+        :param \**kwargs: see below
+
+        :Keyword Arguments:
+
+            * **tree** (``str``) -- name of the input tree
+
+            * **title** (``str``) -- title of the sample shown in the table (default:
+              name of the **infile**)
+
+            * **cuts** (``str``, ``list``) -- additional cuts applied to the sample
+              only (default: \[\])
+
+            * **weight** (``str``) -- number or branch name to be applied as a
+              weight (default: '1')
+        """
+        assert "tree" in kwargs
+        cuts = kwargs.get("cuts", [])
+        if isinstance(cuts, str):
+            cuts = [cuts]
+        self._samples.append(
+            {
+                "infile": infile,
+                "tree": kwargs["tree"],
+                "title": kwargs.get("title", os.path.basename(infile)),
+                "cuts": list(cuts),
+                "weight": kwargs.get("weight", "1"),
+            }
+        )
+        self._yields = None
+
+    @Profiled("CutFlow.Run")
+    def Run(self, batchsize=int(1e5)):
+        r"""Compute the yields of all registered samples for each step.
+
+        All samples sharing the same tree are processed in one pass over the tree.
+
+        :param batchsize: number of events to processed at once (default: 100000)
+        :type batchsize: ``int``
+        """
+        ncuts = len(self._cuts)
+        cutexprs = ["({})".format(cut) for cut in self._cuts]
+        self._yields = OrderedDict()
+        tasks = defaultdict(list)
+        for sample in self._samples:
+            selexpr = "&&".join(
+                ["({})".format(c) for c in self._preselection + sample["cuts"]]
+            )
+            weightexpr = "({})".format(sample["weight"])
+            results = {
+                mode: {var: np.zeros(ncuts + 1) for var in ["sumw", "sumw2", "raw"]}
+                for mode in ["cumulative", "individual"]
+            }
+            self._yields[sample["title"]] = results
+            tasks[sample["infile"], sample["tree"]].append(
+                (results, selexpr, weightexpr)
+            )
+        for (infile, tree), samples in tasks.items():
+            branches = list(cutexprs)
+            for results, selexpr, weightexpr in samples:
+                branches += [weightexpr, selexpr] if selexpr else [weightexpr]
+            branches = list(OrderedDict.fromkeys(branches))  # remove duplicates
+            for array in IOManager._readBatches(infile, tree, branches, batchsize):
+                mask = IOManager._computeCutMask(array, cutexprs)
+                # Number of consecutive cuts passed, starting with the first one:
+                lowestzero = ~mask & (mask + np.uint64(1))
+                npassed = np.full(len(mask), 64, dtype=int)
+                nonzero = lowestzero != 0
+                npassed[nonzero] = np.log2(lowestzero[nonzero].astype(float))
+                passedbit = [
+                    ((mask >> np.uint64(bit)) & np.uint64(1)).astype(bool)
+                    for bit in range(ncuts)
+                ]
+                for results, selexpr, weightexpr in samples:
+                    weights = array[weightexpr].astype(float)
+                    selected = np.ones(len(array), dtype=bool)
+                    if selexpr:
+                        selected = array[selexpr] != 0
+                    for var, values in [
+                        ("sumw", weights),
+                        ("sumw2", weights ** 2),
+                        ("raw", np.ones(len(array))),
+                    ]:
+                        values = np.where(selected, values, 0.0)
+                        # An event passing n consecutive cuts contributes to the steps
+                        # 0 (no cuts) to n:
+                        counts = np.bincount(npassed, values, minlength=ncuts + 1)
+                        results["cumulative"][var] += np.cumsum(counts[::-1])[::-1]
+                        results["individual"][var][0] += np.sum(values)
+                        for bit, passed in enumerate(passedbit):
+                            results["individual"][var][bit + 1] += np.sum(
+                                values[passed]
+                            )
+            logger.info(
+                "Computed cut flow of {} sample(s) using tree '{}' in file "
+                "'{}'.".format(len(samples), tree, infile)
+            )
+
+    def GetYields(self, individual=False):
+        r"""Return the yields of all samples for each step.
+
+        The first step corresponds to the yields before any cut of the cut flow has
+        been applied. The yields are computed first if necessary.
+
+        :param individual: return the yields when applying only the cut of each step
+            instead of all cuts up to it (default: ``False``)
+        :type individual: ``bool``
+
+        :returntype: ``OrderedDict`` -- maps the title of each sample to a ``dict``
+            holding the lists **yield**, **error** (statistical) and **raw** (number of
+            unweighted events)
+        """
+        if self._yields is None:
+            self.Run()
+        mode = "individual" if individual else "cumulative"
+        return OrderedDict(
+            (
+                title,
+                {
+                    "yield": results[mode]["sumw"].tolist(),
+                    "error": np.sqrt(results[mode]["sumw2"]).tolist(),
+                    "raw": results[mode]["raw"].astype(int).tolist(),
+                },
+            )
+            for title, results in self._yields.items()
+        )
+
+    @CheckPath(mode="w")
+    def PrintCutFlowTable(self, path=None, **kwargs):
+        r"""Print the cut flow table.
+
+        If the **path** is not ``None`` the table is saved to a CSV, JSON, TEX or PDF
+        file as specified by the extension.
+
+        :param path: path of the output file (must end with '.csv', '.json', '.tex' or
+            '.pdf', default: ``None``)
+        :type path: ``str``
+
+        :param \**kwargs: see below
+
+        :Keyword argument:
+
+            * **individual** (``bool``) -- show the yields when applying only the cut of
+              each step instead of all cuts up to it (default: ``False``)
+
+            * **aliases** (``dict``) -- set new titles for the steps shown in the table
+              via a dictionary where the key is the cut expression and the value is the
+              new title (default: ``{}``)
+
+            * **silent** (``bool``) -- do not print the table to ``stdout`` (default:
+              ``False``)
+
+            * **precision** (``int``) -- amount of decimals given for the yields
+              (default: 2)
+
+            * **crop** (``bool``) -- remove empty space from the final PDF file
+              (default: ``True``)
+
+            * **texbatch** (``TeXBatch``) -- add the table to a batch of TeX files
+              which are compiled together when the batch is run instead of compiling it
+              right away (the batch decides whether it is cropped, default: ``None``)
+
+            * **overwrite** (``bool``) -- overwrite an existing file located at **path**
+              (default: ``True``)
+
+            * **mkdir** (``bool``) -- create non-existing directories in **path**
+              (default: ``False``)
+        """
+        individual = kwargs.pop("individual", False)
+        aliases = kwargs.pop("aliases", {})
+        silent = kwargs.pop("silent", False)
+        precision = kwargs.pop("precision", 2)
+        crop = kwargs.pop("crop", True)
+        texbatch = kwargs.pop("texbatch", None)
+        yields = self.GetYields(individual=individual)
+        steps = ["Total"] + [aliases.get(cut, cut) for cut in self._cuts]
+        table = [["Cut"] + list(yields.keys())]
+        for i, step in enumerate(steps):
+            table.append(
+                [step]
+                + [
+                    (
+                        "{:.{prec}f}".format(y["yield"][i], prec=precision),
+                        "{:.{prec}f}".format(y["error"][i], prec=precision),
+                    )
+                    for y in yields.values()
+                ]
+            )
+        rows = [table[0]] + [
+            [row[0]] + ["{} +- {}".format(*cell) for cell in row[1:]]
+            for row in table[1:]
+        ]
+        colwidths = [
+            max(w) for w in zip(*[[len(str(e)) for e in entries] for entries in rows])
+        ]
+        if not silent:
+            for i, row in enumerate(rows):
+                for j, item in enumerate(row):
+                    print(
+                        str(item).ljust(colwidths[j])
+                        if j == 0
+                        else str(item).rjust(colwidths[j] + 4),
+                        end="" if j < len(row) - 1 else "\n",
+                    )
+                if i == 0:
+                    print("-" * (sum(colwidths) + (len(colwidths) - 1) * 4))
+        if path is not None:
+            if path.endswith(".csv"):
+                with open(path, "w") as out:
+                    out.write(
+                        ";".join(
+                            [table[0][0]]
+                            + [
+                                "{0};{0} stat. error".format(title)
+                                for title in table[0][1:]
+                            ]
+                        )
+                        + "\n"
+                    )
+                    for row in table[1:]:
+                        out.write(
+                            ";".join([row[0]] + [";".join(cell) for cell in row[1:]])
+                            + "\n"
+                        )
+            elif path.endswith(".json"):
+                with open(path, "w") as out:
+                    json.dump(
+                        {
+                            "steps": steps,
+                            "cuts": self._cuts,
+                            "preselection": self._preselection,
+                            "cumulative": self.GetYields(individual=False),
+                            "individual": self.GetYields(individual=True),
+                        },
+                        out,
+                        indent=4,
+                    )
+            elif path.endswith((".tex", ".pdf")):
+                latextable = []
+                latextable.append(
+                    """\\begin{tabular}[t]{l"""
+                    + "rl" * (len(table[0]) - 1)
+                    + """}"""
+                )
+                latextable.append("""\\toprule""")
+                latextable.append(
+                    """{} \\\\""".format(
+                        " & ".join(
+                            ["""\\textbf{""" + table[0][0] + """}"""]
+                            + [
+                                """\\multicolumn{2}{c}{\\textbf{"""
+                                + e.replace("#", "\\")
+                                + """}}"""
+                                for e in table[0][1:]
+                            ]
+                        )
+                    )
+                )
+                latextable.append("""\\midrule""")
+                for cut, row in zip([None] + self._cuts, table[1:]):
+                    if cut in aliases:
+                        label = aliases[cut].replace("#", "\\")
+                    else:
+                        label = """\\texttt{""" + tex_str(cut or row[0]) + """}"""
+                    latextable.append(
+                        """{} \\\\""".format(
+                            " & ".join(
+                                [label]
+                                + [
+                                    cell[0] + r" & $\pm$ " + cell[1]
+                                    for cell in row[1:]
+                                ]
+                            )
+                        )
+                    )
+                latextable.append("""\\bottomrule""")
+                latextable.append("""\\end{tabular}""")
+                if path.endswith(".tex"):
+                    with open(path, "w") as out:
+                        for line in latextable:
+                            out.write(line + "\n")
+                if path.endswith(".pdf") and texbatch is not None:
+                    texbatch.Add("\n".join(latextable), path)
+                    logger.info("Added cut flow table to TeX batch: '{}'".format(path))
+                    return
+                if path.endswith(".pdf"):
+                    if find_executable("pdflatex") is None:
+                        logger.error(
+                            "Cannot compile LaTeX cut flow table: Command "
+                            "'pdflatex' not found!"
+                        )
+                    else:
+                        if crop and find_executable("pdfcrop") is None:
+                            logger.error(
+                                "Cannot crop PDF cut flow table: Command 'pdfcrop' "
+                                "not found!"
+                            )
+                            crop = False
+                        TeX2PDF("\n".join(latextable), path, crop=crop)
+            else:
+                raise IOError(
+                    "File extension '{}' not supported!".format(path.split(".")[-1])
+                )
+            logger.info("Created cut flow table: '{}'".format(path))
+
+
+if __name__ == "__main__":
+
+    testsamples = []
+
+    for i in range(3):
+        testsamples.append("../data/testsample_{}.root".format(i))
+        try:
+            IOManager.CreateTestSample(testsamples[i], overwrite=False)
+        except IOError:
+            pass
+
+    cuts = [
+        "branch_4>1.5",
+        "branch_1+branch_5<3.75",
+        "(branch_6>=4.5)&&(abs(branch_7)<=9.5)",
+    ]
+
+    cutflow = CutFlow(cuts=cuts)
+    for i, testsample in enumerate(testsamples):
+        cutflow.Register(
+            testsample,
+            tree="tree",
+            title="Sample {}".format(i + 1),
+            weight="{}*branch_5/(branch_4*branch_6)".format(i + 2),
+        )
+    cutflow.PrintCutFlowTable("tmp/cutflow.json", mkdir=True)
+    cutflow.PrintCutFlowTable("tmp/cutflow.csv", individual=True, silent=True)
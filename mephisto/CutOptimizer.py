@@ -0,0 +1,531 @@
+#!/usr/bin/env python2.7
+
+from __future__ import print_function
+
+import ROOT
+
+import json
+
+import numpy as np
+
+from uuid import uuid4
+from collections import OrderedDict, defaultdict
+
+from MethodProxy import *
+from profiler import profiler, Profiled
+from IOManager import IOManager
+from Helpers import CheckPath, AsymptoticFormulae
+
+
+@PreloadProperties
+class CutOptimizer(MethodProxy):
+    r"""Class for optimizing rectangular cuts on several variables at once.
+
+    The values of all variables (and the weights) of the registered signal and
+    background samples are read only once, in a single pass over each input tree, and
+    kept in memory. The sensitivity is then evaluated for all combinations of the
+    thresholds of a grid: each event is assigned to a cell of the grid via a binary
+    search of its values in the sorted thresholds, the weights are summed per cell and
+    the signal and background yields for all cut combinations follow from cumulative
+    sums along each axis. Optionally, the grid is refined adaptively around the best
+    cut combination.
+
+    A variable may be cut on with several comparators, e.g. with '>' and '<' for a
+    window cut.
+
+    .. code-block:: python
+
+        optimizer = CutOptimizer()
+        optimizer.AddVariable("met", ">", 10, 100.0, 300.0)
+        optimizer.AddVariable("njets", ">=", [2, 3, 4, 5])
+        optimizer.AddVariable("mt", "<", [50.0, 80.0, 100.0, 150.0])
+        optimizer.AddVariable("mt", ">", [0.0, 10.0, 20.0])
+        optimizer.Register("signal.root", type="signal", tree="tree", weight="w")
+        optimizer.Register("ttbar.root", type="background", tree="tree", weight="w")
+        optimizer.Run()
+        optimizer.Optimize(refine=3)
+        optimizer.PrintResults()
+    """
+
+    _comparators = [">", ">=", "<", "<="]
+    _maxcells = int(1e7)  # default maximal number of cut combinations of the grid
+
+    def __init__(self, name=None, **kwargs):
+        r"""Initialize a cut optimizer.
+
+        :param name: name of the cut optimizer (default: random 8-digits HEX hash value)
+        :type name: ``str``
+
+        :param \**kwargs: :class:`.CutOptimizer` properties
+        """
+        MethodProxy.__init__(self)
+        if name is None:
+            name = uuid4().hex[:8]
+        self._name = name
+        self._variables = OrderedDict()  # (varexp, comparator) -> thresholds
+        self._preselection = []
+        self._samples = {"signal": [], "background": []}
+        self._columns = None
+        self._results = None
+        self._flatbkgsys = 0.3
+        self._minbkg = 1.0
+        self._sensitivitymeasure = None
+        for key, value in self.GetTemplate(kwargs.get("template", "common")).items():
+            kwargs.setdefault(key, value)
+        self.DeclareProperties(**kwargs)
+
+    def GetName(self):
+        r"""Return the name of the cut optimizer.
+
+        :returntype: ``str``
+        """
+        return self._name
+
+    def AddVariable(self, varexp, comparator, *args):
+        r"""Add a variable to be cut on.
+
+        The thresholds are given either as a list or as number of thresholds, minimal
+        and maximal threshold (both included) of an equidistant grid. Adding a variable
+        with the same comparator again replaces its thresholds.
+
+        :param varexp: name of the branch or expression of branches
+        :type varexp: ``str``
+
+        :param comparator: comparison operator of the cut, one of '>', '>=', '<' and
+            '<='
+        :type comparator: ``str``
+
+        :param \*args: list of thresholds or number of thresholds, minimal and maximal
+            threshold
+        """
+        if comparator not in self._comparators:
+            logger.error(
+                "Invalid comparator '{}' for varexp '{}'!".format(comparator, varexp)
+            )
+            raise ValueError
+        if len(args) == 3:
+            thresholds = np.linspace(args[1], args[2], args[0])
+        elif len(args) == 1 and isinstance(args[0], (list, tuple, np.ndarray)):
+            thresholds = np.unique(np.asarray(args[0], dtype=float))
+        else:
+            logger.error(
+                "Invalid thresholds '{}' for varexp '{}'!".format(args, varexp)
+            )
+            raise ValueError
+        self._variables[varexp, comparator] = thresholds
+        self._columns = None
+        self._results = None
+
+    def GetVariables(self):
+        r"""Return the thresholds of the variables, mapped to tuples of the varexp and
+        the comparator.
+
+        :returntype: ``OrderedDict``
+        """
+        return self._variables
+
+    def SetPreselection(self, *cuts):
+        r"""Define cuts which are applied to all samples.
+
+        :param \*cuts: cut expressions
+        :type \*cuts: ``str``
+        """
+        self._preselection = list(cuts)
+        self._columns = None
+        self._results = None
+
+    def GetPreselection(self):
+        r"""Return the list of preselection cuts.
+
+        :returntype: ``list``
+        """
+        return self._preselection
+
+    def SetFlatBkgSys(self, value):
+        r"""Define the value of the relative flat systematic uncertainty on the
+        background (see :func:`.SensitivityScan.SetFlatBkgSys`).
+
+        :param value: value of the flat relative background systematic uncertainty
+            (default: 0.3)
+        :type value: ``float``
+        """
+        self._flatbkgsys = value
+        self._results = None
+
+    def GetFlatBkgSys(self):
+        r"""Return the value of the relative flat systematic uncertainty on the
+        background.
+
+        :returntype: ``float``
+        """
+        return self._flatbkgsys
+
+    def SetMinBkg(self, value):
+        r"""Define the minimal background yield for a cut combination to be considered.
+
+        :param value: minimal background yield (default: 1.0)
+        :type value: ``float``
+        """
+        self._minbkg = value
+        self._results = None
+
+    def GetMinBkg(self):
+        r"""Return the minimal background yield for a cut combination to be considered.
+
+        :returntype: ``float``
+        """
+        return self._minbkg
+
+    def SetSensitivityMeasure(self, func):
+        r"""Define a function to be used for computing the sensitivity.
+
+        Works as :func:`.SensitivityScan.SetSensitivityMeasure` except for the
+        parameters **s**, **b** and **db** being ``numpy.ndarray`` holding the values
+        for all cut combinations. Functions not supporting arrays (e.g.
+        :code:`'AsymptoticFormulae.BinomialExpZ(s, b, db)'`) are applied to each cut
+        combination individually, which is considerably slower.
+
+        :param func: function or string of code used to evaluate the sensitivity
+            (default: :code:`'AsymptoticFormulae.AsimovExpZArray(s, b, db)'`)
+        :type func: ``function``, ``str``
+        """
+        if isinstance(func, (str, unicode)):
+            self._sensitivitymeasure = lambda s, b, db: eval(func)
+        elif func.__code__.co_argcount != 3:
+            logger.error(
+                "Sensitivity measure must be a function with three arguments, "
+                "the first and second representing number of signal and background "
+                "events, respectively, and the last the total relative background "
+                "uncertainty. E.g.: lambda s, b, db : s / b"
+            )
+            raise TypeError
+        else:
+            self._sensitivitymeasure = func
+        self._results = None
+
+    def GetSensitivityMeasure(self):
+        r"""Return the function used to evaluate the sensitivity.
+
+        :returntype: ``function``
+        """
+        return self._sensitivitymeasure
+
+    def Register(self, infile, **kwargs):
+        r"""Register a sample to the cut optimizer.
+
+        All signal samples are summed up, as are all background samples.
+
+        :param infile: path to the input :py:mod:`ROOT` file
+        :type infile: ``str``
+
+        :param \**kwargs: see below
+
+        :Keyword Arguments:
+
+            * **type** (``str``) -- either 'signal' or 'background'
+
+            * **tree** (``str``) -- name of the input tree
+
+            * **cuts** (``str``, ``list``) -- additional cuts applied to the sample
+              only (default: \[\])
+
+            * **weight** (``str``) -- number or branch name to be applied as a
+              weight (default: '1')
+        """
+        histotype = kwargs.get("type", "").lower()
+        assert histotype in self._samples.keys()
+        assert "tree" in kwargs
+        cuts = kwargs.get("cuts", [])
+        if isinstance(cuts, str):
+            cuts = [cuts]
+        self._samples[histotype].append(
+            {
+                "infile": infile,
+                "tree": kwargs["tree"],
+                "cuts": list(cuts),
+                "weight": kwargs.get("weight", "1"),
+            }
+        )
+        self._columns = None
+        self._results = None
+
+    @Profiled("CutOptimizer.Run")
+    def Run(self, batchsize=int(1e5)):
+        r"""Read the values of all variables and the weights of the selected events of
+        all registered samples.
+
+        All samples sharing the same tree are processed in one pass over the tree.
+
+        :param batchsize: number of events to processed at once (default: 100000)
+        :type batchsize: ``int``
+        """
+        varexps = ["({})".format(varexp) for varexp, _ in self._variables.keys()]
+        tasks = defaultdict(list)
+        for histotype, samples in self._samples.items():
+            for sample in samples:
+                selexpr = "&&".join(
+                    ["({})".format(c) for c in self._preselection + sample["cuts"]]
+                )
+                tasks[sample["infile"], sample["tree"]].append(
+                    (histotype, selexpr, "({})".format(sample["weight"]))
+                )
+        columns = {histotype: ([], []) for histotype in self._samples.keys()}
+        for (infile, tree), samples in tasks.items():
+            branches = list(varexps)
+            for histotype, selexpr, weightexpr in samples:
+                branches += [weightexpr, selexpr] if selexpr else [weightexpr]
+            branches = list(OrderedDict.fromkeys(branches))  # remove duplicates
+            for array in IOManager._readBatches(infile, tree, branches, batchsize):
+                values = np.column_stack(
+                    [array[varexp].astype(float) for varexp in varexps]
+                )
+                for histotype, selexpr, weightexpr in samples:
+                    weights = array[weightexpr].astype(float)
+                    selected = weights != 0
+                    if selexpr:
+                        selected &= array[selexpr] != 0
+                    columns[histotype][0].append(values[selected])
+                    columns[histotype][1].append(weights[selected])
+            logger.info(
+                "Read {} variable(s) of {} sample(s) using tree '{}' in file "
+                "'{}'.".format(len(set(varexps)), len(samples), tree, infile)
+            )
+        self._columns = {}
+        for histotype, (values, weights) in columns.items():
+            if not values:
+                values, weights = [np.zeros((0, len(varexps)))], [np.zeros(0)]
+            self._columns[histotype] = (np.concatenate(values), np.concatenate(weights))
+        self._results = None
+
+    def _getYields(self, thresholds):
+        # Return the signal yields, background yields and squared background errors for
+        # all combinations of the given thresholds, as arrays with one axis per
+        # variable. Events are assigned to the cells between consecutive thresholds and
+        # the cumulative sums of the weights per cell give the yields passing each cut.
+        shape = tuple([len(t) + 1 for t in thresholds])
+        comparators = [comparator for _, comparator in self._variables.keys()]
+        yields = []
+        for histotype, powers in [("signal", [1]), ("background", [1, 2])]:
+            values, weights = self._columns[histotype]
+            # Index of the cell of each event along each axis, where events equal to a
+            # threshold belong to the cell passing the cut if the cut includes equality:
+            cells = []
+            for i, (comparator, t) in enumerate(zip(comparators, thresholds)):
+                side = "left" if comparator in [">", "<="] else "right"
+                cells.append(np.searchsorted(t, values[:, i], side=side))
+            flat = np.ravel_multi_index(cells, shape)
+            for power in powers:
+                counts = np.bincount(
+                    flat, weights ** power, minlength=int(np.prod(shape))
+                ).reshape(shape)
+                for axis, comparator in enumerate(comparators):
+                    index = [slice(None)] * len(shape)
+                    if comparator.startswith(">"):
+                        # Passing the k-th cut: all cells above the k-th threshold
+                        index[axis] = slice(None, None, -1)
+                        counts = np.cumsum(counts[tuple(index)], axis=axis)
+                        counts = counts[tuple(index)]
+                        index[axis] = slice(1, None)
+                    else:
+                        # Passing the k-th cut: all cells below the k-th threshold
+                        counts = np.cumsum(counts, axis=axis)
+                        index[axis] = slice(None, -1)
+                    counts = counts[tuple(index)]
+                yields.append(counts)
+        return yields
+
+    def _getSensitivities(self, sig, bkg, sumw2):
+        # Evaluate the sensitivity measure for all cut combinations at once (or one by
+        # one if the measure does not support arrays). Combinations with a background
+        # below the minimal one are assigned -inf.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            relerr = np.sqrt(sumw2 / bkg ** 2 + self._flatbkgsys ** 2)
+        valid = (bkg > 0) & (bkg >= self._minbkg)
+        sensitivities = np.full(bkg.shape, -np.inf)
+        try:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                values = np.asarray(
+                    self._sensitivitymeasure(sig[valid], bkg[valid], relerr[valid]),
+                    dtype=float,
+                )
+            if values.shape != sig[valid].shape:
+                raise TypeError
+        except (TypeError, ValueError):
+            values = np.array(
+                [
+                    self._sensitivitymeasure(s, b, db)
+                    for s, b, db in zip(sig[valid], bkg[valid], relerr[valid])
+                ],
+                dtype=float,
+            )
+        sensitivities[valid] = np.where(np.isfinite(values), values, -np.inf)
+        return sensitivities
+
+    @Profiled("CutOptimizer.Optimize")
+    def Optimize(self, refine=0, nresults=10, maxcells=None):
+        r"""Evaluate the sensitivity of all combinations of the thresholds and keep the
+        best cut combinations.
+
+        If **refine** is larger than zero, the grid of each variable is replaced by a
+        grid with the same number of thresholds between the neighbours of the best
+        threshold so far, and the evaluation is repeated **refine** times. The events
+        are read first if necessary (see :func:`Run`).
+
+        The yields of all cut combinations are held in memory at once, hence the
+        optimization fails if the grid is larger than **maxcells**.
+
+        :param refine: number of adaptive refinements of the grid (default: 0)
+        :type refine: ``int``
+
+        :param nresults: number of best cut combinations kept (default: 10)
+        :type nresults: ``int``
+
+        :param maxcells: maximal number of cut combinations of the grid (default:
+            10000000)
+        :type maxcells: ``int``
+
+        :returntype: ``list`` -- see :func:`GetResults`
+        """
+        if maxcells is None:
+            maxcells = self._maxcells
+        thresholds = list(self._variables.values())
+        ncells = int(np.prod([len(t) + 1 for t in thresholds], dtype=float))
+        if ncells > maxcells:
+            # Several arrays of 8 bytes per cell are needed for the yields:
+            logger.error(
+                "Grid of {} cut combinations exceeds the maximum of {} (~{:.0f} MB "
+                "per array)! Use fewer thresholds or increase maxcells.".format(
+                    ncells, maxcells, ncells * 8 / 1e6
+                )
+            )
+            raise ValueError
+        if self._columns is None:
+            self.Run()
+        results = []
+        for step in range(refine + 1):
+            with profiler.Span("eval", step=step):
+                sig, bkg, sumw2 = self._getYields(thresholds)
+                sensitivities = self._getSensitivities(sig, bkg, sumw2)
+            order = np.argsort(sensitivities, axis=None)[::-1][:nresults]
+            for flatidx in order:
+                if not np.isfinite(sensitivities.flat[flatidx]):
+                    break
+                idx = np.unravel_index(flatidx, sensitivities.shape)
+                results.append(
+                    {
+                        "cuts": [
+                            "{}{}{:.6g}".format(varexp, comparator, t[i])
+                            for (varexp, comparator), t, i in zip(
+                                self._variables.keys(), thresholds, idx
+                            )
+                        ],
+                        "thresholds": [float(t[i]) for t, i in zip(thresholds, idx)],
+                        "sensitivity": float(sensitivities[idx]),
+                        "signal": float(sig[idx]),
+                        "background": float(bkg[idx]),
+                        "bkgerror": float(np.sqrt(sumw2[idx])),
+                    }
+                )
+            if not results:
+                logger.warning("No cut combination passes the minimal background!")
+                break
+            if step < refine:
+                best = max(results, key=lambda r: r["sensitivity"])["thresholds"]
+                refined = []
+                for t, value in zip(thresholds, best):
+                    i = int(np.searchsorted(t, value))
+                    low, high = t[max(i - 1, 0)], t[min(i + 1, len(t) - 1)]
+                    refined.append(np.unique(np.linspace(low, high, len(t))))
+                thresholds = refined
+        unique = OrderedDict()
+        for result in sorted(results, key=lambda r: r["sensitivity"], reverse=True):
+            unique.setdefault(tuple(result["thresholds"]), result)
+        self._results = list(unique.values())[:nresults]
+        return self._results
+
+    def GetResults(self):
+        r"""Return the best cut combinations, ordered by decreasing sensitivity.
+
+        The cut combinations are computed first if necessary (see :func:`Optimize`).
+
+        :returntype: ``list`` -- one ``dict`` per cut combination holding the list of
+            **cuts**, the **thresholds**, the **sensitivity**, the **signal** and
+            **background** yields and the statistical error of the latter
+            (**bkgerror**)
+        """
+        if self._results is None:
+            self.Optimize()
+        return self._results
+
+    def GetBestCuts(self):
+        r"""Return the cut combination with the highest sensitivity.
+
+        :returntype: ``list``
+        """
+        results = self.GetResults()
+        return results[0]["cuts"] if results else []
+
+    @CheckPath(mode="w")
+    def PrintResults(self, path=None, **kwargs):
+        r"""Print the best cut combinations.
+
+        If the **path** is not ``None`` the results are saved to a CSV or JSON file as
+        specified by the extension.
+
+        :param path: path of the output file (must end with '.csv' or '.json',
+            default: ``None``)
+        :type path: ``str``
+
+        :param \**kwargs: see below
+
+        :Keyword argument:
+
+            * **silent** (``bool``) -- do not print the results to ``stdout`` (default:
+              ``False``)
+
+            * **precision** (``int``) -- amount of decimals given for the yields
+              (default: 2)
+
+            * **overwrite** (``bool``) -- overwrite an existing file located at **path**
+              (default: ``True``)
+
+            * **mkdir** (``bool``) -- create non-existing directories in **path**
+              (default: ``False``)
+        """
+        silent = kwargs.pop("silent", False)
+        precision = kwargs.pop("precision", 2)
+        results = self.GetResults()
+        rows = [["Sensitivity", "Signal", "Background", "Cuts"]]
+        for result in results:
+            rows.append(
+                [
+                    "{:.{prec}f}".format(result["sensitivity"], prec=precision),
+                    "{:.{prec}f}".format(result["signal"], prec=precision),
+                    "{:.{prec}f} +- {:.{prec}f}".format(
+                        result["background"], result["bkgerror"], prec=precision
+                    ),
+                    " && ".join(result["cuts"]),
+                ]
+            )
+        if not silent:
+            colwidths = [max([len(row[j]) for row in rows]) for j in range(3)]
+            for row in rows:
+                print(
+                    "    ".join(
+                        [item.rjust(colwidths[j]) for j, item in enumerate(row[:3])]
+                        + [row[3]]
+                    )
+                )
+        if path is not None:
+            if path.endswith(".csv"):
+                with open(path, "w") as out:
+                    for row in rows:
+                        out.write(";".join(row) + "\n")
+            elif path.endswith(".json"):
+                with open(path, "w") as out:
+                    json.dump(results, out, indent=4)
+            else:
+                raise IOError(
+                    "File extension '{}' not supported!".format(path.split(".")[-1])
+                )
+            logger.info("Created cut optimization results: '{}'".format(path))
@@ -168,7 +168,7 @@ class Graph(MethodProxy, ROOT.TGraphAsymmErrors):
         self.SetTitle(self._title)
         self.DeclareProperties(**kwargs)
 
-    @CheckPath(mode="w")
+    @CheckPath(mode="w", printoptions=True)
     def Print(self, path, **kwargs):
         r"""Print the graph to a file.
 
@@ -198,14 +198,31 @@ class Graph(MethodProxy, ROOT.TGraphAsymmErrors):
 
             * **mkdir** (``bool``) -- create non-existing directories in **path**
               (default: ``False``)
+
+            * **reuse** (``bool``) -- reuse a pooled canvas, see :func:`Plot.Print`
+              (default: ``False``)
+
+            * **skipunchanged** (``bool``) -- skip printing if the plot and the output
+              file are unchanged, see :func:`Plot.Print` (default: ``False``)
+
+            * **force** (``bool``) -- print even if the plot and the output file are
+              unchanged when using **skipunchanged** (default: ``False``)
         """
         injections = {"inject0": kwargs.pop("inject", [])}
-        properties = DissectProperties(kwargs, [Graph, Plot, Canvas, Pad])
+        properties = DissectProperties(
+            kwargs, [Graph, Plot, Canvas, Pad, {"Print": Plot._printoptions}]
+        )
         properties["Pad"].setdefault("logy", False)
         plot = Plot(npads=1)
         plot.Register(self, **MergeDicts(properties["Graph"], properties["Pad"]))
         plot.Print(
-            path, **MergeDicts(properties["Plot"], properties["Canvas"], injections)
+            path,
+            **MergeDicts(
+                properties["Plot"],
+                properties["Canvas"],
+                properties["Print"],
+                injections,
+            )
         )
 
     def SetDrawOption(self, option):
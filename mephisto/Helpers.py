@@ -4,21 +4,48 @@ import ROOT
 
 import os
 import re
-import uuid
+import json
 import time
-import inspect
+import shutil
+import hashlib
+import tempfile
+
+import numpy as np
 
 from math import sqrt, log
 from subprocess import Popen, PIPE, STDOUT
+from distutils.spawn import find_executable
 
 try:
     from subprocess import DEVNULL
 except ImportError:
     DEVNULL = open(os.devnull, "wb")
 
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
 from math import log10
 
 from logger import logger
+from profiler import Profiled
+
+# Configure ROOT when the first module of the package depending on it is imported
+# (instead of on 'import mephisto', see __init__.py).
+# Set ROOT to batch and ignore command line options:
+ROOT.PyConfig.IgnoreCommandLineOptions = True
+ROOT.gROOT.SetBatch(0)
+# Set ROOT logging verbosity:
+ROOT.gErrorIgnoreLevel = 2000
+# kUnset    =  -1
+# kPrint    =   0
+# kInfo     =   1000
+# kWarning  =   2000
+# kError    =   3000
+# kBreak    =   4000
+# kSysError =   5000
+# kFatal    =   6000
 
 # Don't decorate functions when building the documentation
 # https://stackoverflow.com/a/22023805/10986034
@@ -56,8 +83,7 @@ def DissectProperties(propdict, listofobj):
             }
             continue
         clsname = obj.GetClassName()
-        clsprops = obj.GetListOfProperties()
-        clsprops += ["template"]
+        clsprops = set(obj.GetListOfProperties() + ["template"])
         properties[clsname] = {
             k: propdict.pop(k) for k, v in propdict.items() if k in clsprops
         }
@@ -69,14 +95,18 @@ def DissectProperties(propdict, listofobj):
     return properties
 
 
-def CheckPath(mode="r", clean=True):
+def CheckPath(mode="r", clean=True, printoptions=False):
     # Decorator for functions and methods with a filepath as their first argument (not
-    # counting 'self' etc.).
+    # counting 'self' etc.). With printoptions=True the print options of Plot.Print are
+    # taken into account: The paths derived via the 'extensions' keyword argument are
+    # checked as well and passed to the function together with the original path(s)
+    # instead of the extensions. Pages appended to an open multi-page PDF file
+    # (multipage=True) do not count as overwriting it.
 
     assert mode in ["r", "w"]  # read / write
 
     def decorator(func):
-        def check(filepath, overwrite=True, mkdir=False):
+        def check(filepath, overwrite=True, mkdir=False, exempt=()):
             # If the file exists and overwrite=False raise an exception.
             # If file does not exist check if all directories in the given path exist.
             # If not raise an exception or if mkdir=True create them recursively.
@@ -86,6 +116,8 @@ def CheckPath(mode="r", clean=True):
                 filepath = clean_str(
                     filepath, remove="""~!@#$%^&*()+=<>\[\]{},;`'"\|"""
                 )
+            if filepath in exempt:
+                return filepath
             if os.path.isfile(filepath):
                 if mode == "w":
                     if overwrite:
@@ -121,7 +153,23 @@ def CheckPath(mode="r", clean=True):
                         return func(*args, **kwargs)
                 else:
                     idx = 0
-                args[idx] = check(args[idx], overwrite=overwrite, mkdir=mkdir)
+                exempt = ()
+                if printoptions:
+                    extensions = kwargs.pop("extensions", [])
+                    args[idx] = ExpandExtensions(args[idx], extensions)
+                    if kwargs.get("multipage", False):
+                        from Plot import Plot  # imported here to avoid circular imports
+
+                        exempt = Plot._multipagepdfs
+                if isinstance(args[idx], (list, tuple)):  # multiple paths
+                    args[idx] = [
+                        check(p, overwrite=overwrite, mkdir=mkdir, exempt=exempt)
+                        for p in args[idx]
+                    ]
+                else:
+                    args[idx] = check(
+                        args[idx], overwrite=overwrite, mkdir=mkdir, exempt=exempt
+                    )
             return func(*args, **kwargs)
 
         return func if IS_SPHINX_BUILD else wrapper
@@ -129,6 +177,20 @@ def CheckPath(mode="r", clean=True):
     return decorator
 
 
+def ExpandExtensions(path, extensions):
+    # Return the path (or list of paths) extended by the same path(s) with each of the
+    # given extensions, e.g. ['plot.pdf', 'plot.png'] for 'plot.pdf' and ['png'].
+    if not extensions:
+        return path
+    paths = list(path) if isinstance(path, (list, tuple)) else [path]
+    for ext in extensions:
+        for p in list(paths):
+            extpath = "{}.{}".format(os.path.splitext(p)[0], ext.lstrip("."))
+            if extpath not in paths:
+                paths.append(extpath)
+    return paths
+
+
 def MergeDicts(*dicts):
     # Merge an arbitrary number of dictionaries. If multiple dictionaries contain the
     # same key, the last one in the list will define the final value in the output.
@@ -155,6 +217,10 @@ def MephistofyObject(copy=False):
             from Graph import Graph
             from Histo1D import Histo1D
             from Histo2D import Histo2D
+            from HistoExpression import HistoExpression
+
+            if isinstance(object, HistoExpression):
+                return object.Materialize()
 
             def lookupbases(cls):
                 bases = list(cls.__bases__)
@@ -200,30 +266,9 @@ def MephistofyObject(copy=False):
 
 
 def timeit(func):
-    # https://goo.gl/XmaqC7
-    def timed(*args, **kw):
-        ts = time.time()
-        result = func(*args, **kw)
-        te = time.time()
-        if "log_time" in kw:
-            name = kw.get("log_name", func.__name__.upper())
-            kw["log_time"][name] = int((te - ts) * 1000)
-        else:
-            try:
-                is_method = inspect.getargspec(func)[0][0] == "self"
-            except:
-                is_method = False
-
-            if is_method:
-                funcname = "{}.{}.{}".format(
-                    func.__module__, args[0].__class__.__name__, func.__name__
-                )
-            else:
-                funcname = "{}.{}".format(func.__module__, func.__name__)
-            logger.debug("Executed {} in {:.2f} ms".format(funcname, (te - ts) * 1000))
-        return result
-
-    return func if IS_SPHINX_BUILD else timed
+    # Record each call of the function as a span of the profiler (see profiler.py),
+    # thin alias of profiler.Profiled kept for backwards compatibility.
+    return Profiled()(func)
 
 
 def IsInherited(cls, method):
@@ -267,69 +312,69 @@ def clean_str(string, **kwargs):
     return re.sub("[{}]".format(remove), "", string)
 
 
+def tex_str(string):
+    # Escape the characters of a string with a special meaning in LaTeX, such that it
+    # can be typeset verbatim, e.g. within \texttt{}.
+    special = {
+        "\\": r"\textbackslash{}",
+        "~": r"\textasciitilde{}",
+        "^": r"\textasciicircum{}",
+    }
+    return re.sub(
+        r"[\\~^&%$#_{}]",
+        lambda m: special.get(m.group(0), "\\" + m.group(0)),
+        string,
+    )
+
+
 def TeX2PDF(content, path, **kwargs):
+    # Compile the TeX content into a (cropped) PDF file at the given path. This is a
+    # batch of a single job, see TeXBatch for the keyword arguments.
+    batch = TeXBatch(**kwargs)
+    batch.Add(content, path)
+    batch.Run()
+
+
+def _TeXDocument(contents):
+    # Return a TeX document showing each of the given contents on a page of its own.
     __filedir__ = os.path.dirname(os.path.abspath(__file__))
-    verbosity = kwargs.get("vebosity", 0)
-    assert verbosity in range(3)
-    crop = kwargs.get("crop", True)
     header = (
         r"\documentclass[11pt]{article}" + "\n"
         r"\input{" + __filedir__ + r"/preamble}" + "\n"
         r"\begin{document}" + "\n"
         r"\pagenumbering{gobble}" + "\n"
     )
-    tmpname = "tmp_{}".format(uuid.uuid4().hex[:8])
-    outdir = os.path.dirname(path)
-    tmptexfile = os.path.join("{}.tex".format(tmpname))
-    # Write TeX file
-    with open(tmptexfile, "w") as tmp:
-        tmp.write(header)
-        tmp.write(content)
-        tmp.write("\n" + r"\end{document}")
-    # Compile TeX file
-    logger.debug("Compiling TeX file '{}'...".format(tmptexfile))
-    cmd = [
-        "pdflatex",
-        "-interaction",
-        "nonstopmode" if verbosity == 2 else "batchmode",
-        # "-output-directory={}".format(outdir),
-        tmptexfile,
-    ]
+    return header + "\n\\clearpage\n".join(contents) + "\n" + r"\end{document}"
+
+
+def _runCommand(cmd, verbosity=0, cwd=None, tolerant=False):
+    # Run an external command and raise a ValueError if it fails. If tolerant, exit code
+    # 1 (e.g. non-critical errors of pdflatex) only issues a warning.
     procoptions = dict(stdout=DEVNULL) if verbosity == 0 else {}
-    proc = Popen(cmd, **procoptions)
+    proc = Popen(cmd, cwd=cwd, **procoptions)
     proc.communicate()
     retcode = proc.returncode
-    if not retcode == 0:
-        if retcode == 1:
-            logger.warning(
-                "Non-critical error (code {}) executing command: '{}'. Will keep going "
-                "anyway...".format(retcode, " ".join(cmd))
-            )
-        else:
-            logger.error(
-                "Error {} executing command: '{}'".format(retcode, " ".join(cmd))
-            )
-            raise ValueError
-    else:
-        logger.debug("Successfully compiled '{}'!".format(tmptexfile))
-    for ext in ["tex", "log", "aux"]:
-        os.unlink("{}.{}".format(tmpname, ext))
-    # Crop PDF file
-    if crop:
-        logger.debug("Cropping PDF file '{}.pdf'...".format(tmpname))
-        cmd = ["pdfcrop", "--margins", "10", "{}.pdf".format(tmpname), path]
-        proc = Popen(cmd, **procoptions)
-        proc.communicate()
-        retcode = proc.returncode
-        if not retcode == 0:
-            logger.error(
-                "Error {} executing command: '{}'".format(retcode, " ".join(cmd))
-            )
-            raise ValueError
-        else:
-            os.unlink(os.path.join("{}.pdf".format(tmpname)))
-            logger.debug("Successfully cropped PDF file '{}.pdf'!".format(tmpname))
-    logger.debug("PDF file has been created: '{}'".format(path))
+    if retcode == 1 and tolerant:
+        logger.warning(
+            "Non-critical error (code {}) executing command: '{}'. Will keep going "
+            "anyway...".format(retcode, " ".join(cmd))
+        )
+    elif not retcode == 0:
+        logger.error("Error {} executing command: '{}'".format(retcode, " ".join(cmd)))
+        raise ValueError
+
+
+def SplitCuts(*cuts):
+    # Split (lists of) cut strings into the individual cut expressions combined by a
+    # logical AND. Enclosing parentheses of expressions without a logical OR are
+    # removed.
+    cutlist = []
+    for cutexpr in cuts:
+        for cut in cutexpr.split("&&"):
+            if not "||" in cut and cut.startswith("(") and cut.endswith(")"):
+                cut = cut[1:-1]
+            cutlist.append(cut)
+    return cutlist
 
 
 def SplitCutExpr(cutexpr):
@@ -344,6 +389,348 @@ def SplitCutExpr(cutexpr):
     raise ValueError("Argument '{}' is not a valid cut expression!".format(cutexpr))
 
 
+def Fingerprint(*objects):
+    # Return a SHA-1 hex digest of the given objects. Dictionaries, lists and tuples are
+    # traversed recursively, numpy arrays are hashed by their raw data and ROOT objects
+    # by their class, their contents (binning, bin contents and squared weights of
+    # histograms, points of graphs, histograms of stacks) and their properties. Names of
+    # ROOT objects are ignored as they are usually random. Anything else is hashed by
+    # its repr, hence objects without a meaningful repr yield a different fingerprint
+    # each time, which is the safe direction.
+    from IOManager import IOManager  # imported here to avoid circular imports
+
+    sha1 = hashlib.sha1()
+
+    def update(obj):
+        if isinstance(obj, dict):
+            sha1.update(b"{")
+            for key in sorted(obj.keys(), key=repr):
+                update(key)
+                update(obj[key])
+            sha1.update(b"}")
+        elif isinstance(obj, (list, tuple)):
+            sha1.update(b"[")
+            for item in obj:
+                update(item)
+            sha1.update(b"]")
+        elif isinstance(obj, np.ndarray):
+            sha1.update(repr((obj.dtype.str, obj.shape)).encode("utf-8"))
+            sha1.update(np.ascontiguousarray(obj).tobytes())
+        elif isinstance(obj, ROOT.TObject):
+            update(obj.ClassName())
+            if obj.InheritsFrom("THStack") and hasattr(obj, "_store"):
+                update(obj._store)
+                update(
+                    [
+                        obj._drawoption,
+                        obj._drawstacksum,
+                        obj._stacksorting,
+                        obj._stacksumhisto,
+                    ]
+                )
+            elif obj.InheritsFrom("TH1"):
+                update(IOManager._getBinning(obj))
+                update(IOManager._getBinContents(obj))
+                update(IOManager._getBinSumw2(obj))
+            elif obj.InheritsFrom("TGraph"):
+                update(
+                    [
+                        (
+                            obj.GetX()[i],
+                            obj.GetY()[i],
+                            obj.GetErrorXlow(i),
+                            obj.GetErrorXhigh(i),
+                            obj.GetErrorYlow(i),
+                            obj.GetErrorYhigh(i),
+                        )
+                        for i in range(obj.GetN())
+                    ]
+                )
+            if hasattr(obj, "GetProperties"):
+                update(obj.GetProperties())
+            else:
+                update(obj.GetTitle())
+            if getattr(obj, "_errorband", None) is not None:
+                # The errorband properties are not included in the ones of the Histo1D
+                update(obj._errorband.GetProperties())
+        elif hasattr(obj, "GetProperties"):  # MEPHISTO classes not inheriting TObject
+            update(obj.__class__.__name__)
+            update(
+                {k: v for k, v in vars(obj).items() if k not in ["_name", "_cache"]}
+            )
+        else:
+            sha1.update(repr(obj).encode("utf-8"))
+
+    for obj in objects:
+        update(obj)
+    return sha1.hexdigest()
+
+
+class FingerprintIndex(object):
+    # Sidecar index (a small JSON file) in a directory holding the fingerprints of the
+    # files in it together with their size and modification time at the moment they
+    # were created. Used to skip re-creating files which would not change.
+
+    filename = ".mephisto_fingerprints.json"
+
+    def __init__(self, directory):
+        self._directory = os.path.abspath(directory)
+        self._path = os.path.join(self._directory, self.filename)
+        self._index = self.Load()
+
+    def Load(self):
+        # Read the index from disk. A missing or corrupt index is treated as empty.
+        try:
+            with open(self._path, "r") as index:
+                return json.load(index)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def IsUpToDate(self, path, fingerprint):
+        # Return True if the file exists, was recorded with the same fingerprint and
+        # has not been touched since.
+        entry = self._index.get(os.path.basename(path))
+        if entry is None or entry["fingerprint"] != fingerprint:
+            return False
+        if not os.path.isfile(path):
+            return False
+        stat = os.stat(path)
+        return entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime
+
+    def Lock(self):
+        # Return an open lock file holding an exclusive lock on the index (None if file
+        # locking is not available). Used to serialize the read-modify-write cycles of
+        # concurrent processes (e.g. the workers of a PlotBatch) on the same index.
+        if fcntl is None:
+            return None
+        try:
+            lockfile = open(self._path + ".lock", "a")
+        except (IOError, OSError):
+            return None
+        fcntl.flock(lockfile, fcntl.LOCK_EX)
+        return lockfile
+
+    def Update(self, path, fingerprint):
+        # Record the fingerprint of a newly created file. The index is re-read while
+        # being locked to keep the entries added by other processes in the meantime.
+        if not os.path.isfile(path):
+            return
+        stat = os.stat(path)
+        lockfile = self.Lock()
+        try:
+            self._index = self.Load()
+            self._index[os.path.basename(path)] = {
+                "fingerprint": fingerprint,
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+            }
+            self.Save()
+        finally:
+            if lockfile is not None:
+                lockfile.close()  # releases the lock
+
+    def Remove(self, path):
+        # Forget the fingerprint of a file.
+        lockfile = self.Lock()
+        try:
+            self._index = self.Load()
+            if self._index.pop(os.path.basename(path), None) is not None:
+                self.Save()
+        finally:
+            if lockfile is not None:
+                lockfile.close()
+
+    def Save(self):
+        # Write the index atomically such that concurrent readers never see a partially
+        # written file.
+        fd, tmppath = tempfile.mkstemp(
+            prefix=self.filename, suffix=".tmp", dir=self._directory
+        )
+        try:
+            with os.fdopen(fd, "w") as tmp:
+                json.dump(self._index, tmp, indent=1, sort_keys=True)
+            os.rename(tmppath, self._path)
+        except (IOError, OSError):
+            logger.warning("Could not write fingerprint index '{}'!".format(self._path))
+            if os.path.exists(tmppath):
+                os.unlink(tmppath)
+
+
+class TeXBatch(object):
+    r"""Class for compiling many TeX snippets (e.g. yields tables) to PDF files at once.
+
+    All snippets are compiled as a single document, each on a page of its own, which is
+    then cropped and split into the individual PDF files. Thus, only three processes
+    (``pdflatex``, ``pdfcrop`` and ``pdfseparate``) are launched instead of two per
+    snippet. The compilation takes place in a private temporary directory. Snippets
+    whose output file has not changed since it was last created are skipped. If the
+    snippets cannot be compiled together (e.g. a snippet spans more than one page),
+    they are compiled one by one, where snippets failing to compile are skipped.
+
+    A batch can be used as a context manager, which runs the batch when it is left:
+
+    .. code-block:: python
+
+        with TeXBatch() as batch:
+            for region, stack in stacks.items():
+                stack.PrintYieldTable("{}.pdf".format(region), texbatch=batch)
+    """
+
+    def __init__(self, crop=True, force=False, verbosity=0):
+        r"""Initialize a batch of TeX snippets.
+
+        :param crop: remove empty space from the PDF files (default: ``True``)
+        :type crop: ``bool``
+
+        :param force: re-create PDF files whose content has not changed (default:
+            ``False``)
+        :type force: ``bool``
+
+        :param verbosity: output of the TeX tools shown, ranging from 0 (none) to 2
+            (everything, with ``pdflatex`` stopping at errors) (default: 0)
+        :type verbosity: ``int``
+        """
+        assert verbosity in range(3)
+        self._crop = crop
+        self._force = force
+        self._verbosity = verbosity
+        self._jobs = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exctype, excvalue, traceback):
+        if exctype is None:
+            self.Run()
+        return False
+
+    def Add(self, content, path):
+        r"""Register a TeX snippet to be compiled into the PDF file at **path**.
+
+        :param content: body of the TeX document (without preamble)
+        :type content: ``str``
+
+        :param path: path of the output file (must end with '.pdf')
+        :type path: ``str``
+        """
+        self._jobs.append((content, os.path.abspath(path)))
+
+    def GetNJobs(self):
+        r"""Return the number of registered snippets.
+
+        :returntype: ``int``
+        """
+        return len(self._jobs)
+
+    def Run(self):
+        r"""Compile all registered snippets and return the paths of the created files.
+
+        Snippets are removed from the batch once they have been processed. When
+        compiling the snippets one by one, failures are logged and the remaining
+        snippets are compiled nonetheless.
+
+        :returntype: ``list``
+        """
+        jobs, self._jobs = self._jobs, []
+        preamble = os.path.join(os.path.dirname(os.path.abspath(__file__)), "preamble")
+        with open("{}.tex".format(preamble), "r") as preamblefile:
+            preamble = preamblefile.read()
+        pending = []
+        for content, path in jobs:
+            fingerprint = Fingerprint(preamble, content, self._crop)
+            index = FingerprintIndex(os.path.dirname(path))
+            if not self._force and index.IsUpToDate(path, fingerprint):
+                logger.debug("Skipping up-to-date PDF file '{}'".format(path))
+                continue
+            pending.append((content, path, fingerprint, index))
+        if not pending:
+            return []
+        onebyone = len(pending) > 1 and find_executable("pdfseparate") is None
+        if onebyone:
+            logger.warning(
+                "Command 'pdfseparate' not found! Compiling TeX files one by one..."
+            )
+        created = []
+        workdir = tempfile.mkdtemp(prefix="mephisto_tex_")
+        try:
+            if not onebyone:
+                try:
+                    compiled = self._compile(pending, workdir)
+                except ValueError:
+                    if len(pending) == 1:
+                        raise
+                    compiled = False
+                if compiled:
+                    created = [path for _, path, _, _ in pending]
+                else:
+                    logger.warning(
+                        "Failed to compile the TeX snippets together (some of them may "
+                        "span more than one page)! Compiling TeX files one by one..."
+                    )
+                    onebyone = True
+            if onebyone:
+                for job in pending:
+                    try:
+                        self._compile([job], workdir)
+                    except ValueError:
+                        logger.error("Failed to compile TeX file '{}'!".format(job[1]))
+                        continue
+                    created.append(job[1])
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        return created
+
+    def _compile(self, jobs, workdir):
+        # Compile the jobs into a single document, crop and split it into one file per
+        # job. Return False (without creating any file) if the number of pages does not
+        # match the number of jobs, unless there is a single job.
+        logger.debug("Compiling {} TeX snippet(s)...".format(len(jobs)))
+        for filename in os.listdir(workdir):  # e.g. the output of a previous document
+            os.unlink(os.path.join(workdir, filename))
+        with open(os.path.join(workdir, "batch.tex"), "w") as texfile:
+            texfile.write(_TeXDocument([content for content, _, _, _ in jobs]))
+        _runCommand(
+            [
+                "pdflatex",
+                "-interaction",
+                "nonstopmode" if self._verbosity == 2 else "batchmode",
+                "batch.tex",
+            ],
+            verbosity=self._verbosity,
+            cwd=workdir,
+            tolerant=True,
+        )
+        pdf = os.path.join(workdir, "batch.pdf")
+        if not os.path.isfile(pdf):
+            logger.error("Command 'pdflatex' did not create a PDF file!")
+            raise ValueError
+        if self._crop:
+            cropped = os.path.join(workdir, "cropped.pdf")
+            _runCommand(
+                ["pdfcrop", "--margins", "10", pdf, cropped], verbosity=self._verbosity
+            )
+            pdf = cropped
+        if len(jobs) == 1:
+            pages = [pdf]
+        else:
+            pagepattern = os.path.join(workdir, "page-{}.pdf")
+            _runCommand(
+                ["pdfseparate", pdf, pagepattern.format("%d")],
+                verbosity=self._verbosity,
+            )
+            pages = [pagepattern.format(i + 1) for i in range(len(jobs))]
+            splitpages = [f for f in os.listdir(workdir) if f.startswith("page-")]
+            if len(splitpages) != len(jobs):
+                for page in splitpages:
+                    os.unlink(os.path.join(workdir, page))
+                return False
+        for (content, path, fingerprint, index), page in zip(jobs, pages):
+            shutil.move(page, path)
+            index.Update(path, fingerprint)
+            logger.debug("PDF file has been created: '{}'".format(path))
+        return True
+
+
 class AsymptoticFormulae(object):
     """A collection of useful asymptotic formulae for hypothesis tests."""
 
@@ -383,6 +770,23 @@ class AsymptoticFormulae(object):
         except ValueError:
             return 0
 
+    @staticmethod
+    def AsimovExpZArray(s, b, db):
+        # Vectorized AsimovExpZ for numpy arrays of s, b and db (relative). Zero where
+        # the significance is not defined (e.g. b <= 0). For db = 0 the limit of the
+        # formula without background uncertainty is used.
+        s = np.asarray(s, dtype=float)
+        b = np.asarray(b, dtype=float)
+        db2 = (np.asarray(db, dtype=float) * b) ** 2
+        with np.errstate(all="ignore"):
+            z2 = 2 * (
+                (s + b) * np.log(((s + b) * (b + db2)) / (b ** 2 + (s + b) * db2))
+                - (b ** 2 / db2) * np.log1p(s * db2 / (b * (b + db2)))
+            )
+            z2 = np.where(db2 > 0, z2, 2 * ((s + b) * np.log1p(s / b) - s))
+            z = np.sqrt(z2)
+        return np.where(np.isfinite(z), z, 0.0)
+
     @staticmethod
     def AsimovExpCLs(s, b, db):
         # [1] https://arxiv.org/pdf/1007.1727.pdf (Sec. 5.1)
@@ -14,15 +14,54 @@ from Plot import Plot
 from MethodProxy import *
 from Canvas import Canvas
 from IOManager import IOManager
+from HistoExpression import HistoExpression
 from Helpers import DissectProperties, MergeDicts, CheckPath, roundsig
 
 
+@PropertyHook
 def ExtendProperties(cls):
     # Add properties to configure the _errorband member histogram of Histo1Ds.
     cls._properties += ["errorband{}".format(p) for p in cls._properties]  # append!
     return cls
 
 
+@PropertyHook
+def MaterializeOnSet(cls):
+    # Wrap the setters of the styling properties, i.e. the properties set by the
+    # templates (e.g. linecolor, but also linecoloralpha), such that a lightweight
+    # Histo1D is materialized before any of them is called directly. Otherwise the
+    # deferred properties would override e.g. a linecolor set via SetLineColor once the
+    # histogram is materialized. Other setters (e.g. SetBinContent, SetTitle) are left
+    # alone and other properties are not deferred (see __init__), except for the ones
+    # of the errorband which is not created before.
+    styling = set()
+    for template in TemplateRegistry.Lookup(cls.__name__).values():
+        styling.update(template.keys())
+    cls._stylingproperties = set(
+        [
+            p
+            for p in cls._properties
+            if p.startswith("errorband") or any([p.startswith(q) for q in styling])
+        ]
+    )
+
+    def wrap(method, setter):
+        def wrapped(self, *args):
+            if self._pendingproperties is not None:
+                self._materialize()
+            return setter(self, *args)
+
+        wrapped.__name__ = method
+        wrapped.__doc__ = getattr(setter, "__doc__", None)
+        return wrapped
+
+    for method in cls._methods:
+        if method.startswith("Set") and method[3:].lower() in cls._stylingproperties:
+            setattr(cls, method, wrap(method, getattr(cls, method)))
+    return cls
+
+
+@MaterializeOnSet
 @ExtendProperties
 @PreloadProperties
 class Histo1D(MethodProxy, ROOT.TH1D):
@@ -39,6 +78,14 @@ class Histo1D(MethodProxy, ROOT.TH1D):
     be accessed by prepending the prefix 'errorband' in front of the property name. By
     default the errorband's fillcolor and markercolor matches the histogram's linecolor.
 
+    Histograms created with ``lightweight=True`` defer the creation of the errorband
+    and the styling (including the template) until they are styled, drawn or copied
+    for the first time, where calling the setter of a styling property (e.g.
+    :func:`SetLineColor`) counts as styling. Keyword arguments which are not styling
+    properties (i.e. not set by any template) are applied right away. This makes
+    booking large numbers of histograms, most of which are never drawn themselves, much
+    cheaper.
+
     In order to avoid memory leaks, **name** is an inaccessible property despite having
     corresponding getter and setter methods. Furthermore the properties **xtitle**,
     **ytitle** and **ztitle** are defined to be exclusive to the :class:`.Pad` class.
@@ -81,7 +128,8 @@ class Histo1D(MethodProxy, ROOT.TH1D):
 
         :param \*args: see below
 
-        :param \**kwargs: :class:`.Histo1D` properties
+        :param \**kwargs: :class:`.Histo1D` properties + additional properties (see
+            below)
 
         :Arguments:
             Depending on the number of arguments (besides **name**) there are three ways
@@ -112,12 +160,20 @@ class Histo1D(MethodProxy, ROOT.TH1D):
 
                 #. **xmax** (``float``) -- maximal x-axis value (upper bin-edge of last
                    bin)
+
+        :Keyword Arguments:
+
+            * **lightweight** (``bool``) -- defer the creation of the errorband and the
+              application of the properties until the histogram is first styled, drawn
+              or copied (default: ``False``)
         """
+        lightweight = kwargs.pop("lightweight", False)
         MethodProxy.__init__(self)
         self._varexp = None
         self._cuts = None
         self._weight = None
         self._errorband = None
+        self._pendingproperties = None
         self._drawoption = ""
         self._drawerrorband = False
         self._addtolegend = True
@@ -133,6 +189,7 @@ class Histo1D(MethodProxy, ROOT.TH1D):
                 self.SetDirectory(0)
                 self.SetName(name)
             if isinstance(args[0], Histo1D):
+                args[0]._materialize()
                 self._varexp = args[0]._varexp
                 self._cuts = args[0]._cuts
                 self._weight = args[0]._cuts
@@ -158,20 +215,44 @@ class Histo1D(MethodProxy, ROOT.TH1D):
         else:
             raise TypeError
         if not name.endswith("_errorband") and self._errorband is None:
-            self._errorband = Histo1D("{}_errorband".format(self.GetName()), self)
+            if not lightweight:
+                self._errorband = Histo1D("{}_errorband".format(self.GetName()), self)
             for key, value in self.GetTemplate(
                 kwargs.get("template", "common")
             ).items():
                 kwargs.setdefault(key, value)
-        self.DeclareProperties(**kwargs)
-        self._lowbinedges = IOManager._getBinning(self)["xbinning"]
+            if lightweight:
+                pending = {
+                    k: v
+                    for k, v in kwargs.items()
+                    if k == "template" or k.lower() in self._stylingproperties
+                }
+                self.DeclareProperties(
+                    **{k: v for k, v in kwargs.items() if k not in pending}
+                )
+                self._pendingproperties = pending
+        if self._pendingproperties is None:
+            self.DeclareProperties(**kwargs)
+        self._lowbinedges = IOManager._getAxisEdges(self.GetXaxis())
         self._nbins = len(self._lowbinedges) - 1
 
+    def _materialize(self):
+        # Create the errorband and apply the properties deferred by a lightweight
+        # histogram. The pending properties are cleared first as applying them calls
+        # DeclareProperty, which in turn calls this method.
+        properties = self._pendingproperties
+        if properties is None:
+            return
+        self._pendingproperties = None
+        self._errorband = Histo1D("{}_errorband".format(self.GetName()), self)
+        self.DeclareProperties(**properties)
+
     def DeclareProperty(self, property, args):
         # Properties starting with "errorband" will be applied to self._errorband.
         # All errorband's properties will be applied after the main histo properties.
         # By default the errorband fillcolor and markercolor matches the histogram's
         # linecolor.
+        self._materialize()
         property = property.lower()
         if property.startswith("errorband"):
             super(Histo1D, self._errorband).DeclareProperty(property[9:], args)
@@ -186,6 +267,11 @@ class Histo1D(MethodProxy, ROOT.TH1D):
             super(Histo1D, self._errorband).DeclareProperty("fillcolor", errbndcol)
             super(Histo1D, self._errorband).DeclareProperty("markercolor", errbndcol)
 
+    def GetProperty(self, property):
+        # The deferred properties of a lightweight histogram must be applied first.
+        self._materialize()
+        return super(Histo1D, self).GetProperty(property)
+
     def Fill(self, *args, **kwargs):
         r"""Fill the histogram with entries.
 
@@ -232,13 +318,15 @@ class Histo1D(MethodProxy, ROOT.TH1D):
         self._weight = kwargs.get("weight", "1")
         if len(args) == 1 and isinstance(args[0], (str, unicode)):
             IOManager.FillHistogram(self, args[0], **kwargs)
+            if self._errorband is None:
+                return  # created from the filled histogram once needed
             if not kwargs.get("append", False):
                 self._errorband.Reset()
             self._errorband.Add(self)
         else:
             super(Histo1D, self).Fill(*args)
 
-    @CheckPath(mode="w")
+    @CheckPath(mode="w", printoptions=True)
     def Print(self, path, **kwargs):
         r"""Print the histogram to a file.
 
@@ -269,13 +357,30 @@ class Histo1D(MethodProxy, ROOT.TH1D):
 
             * **mkdir** (``bool``) -- create non-existing directories in **path**
               (default: ``False``)
+
+            * **reuse** (``bool``) -- reuse a pooled canvas, see :func:`Plot.Print`
+              (default: ``False``)
+
+            * **skipunchanged** (``bool``) -- skip printing if the plot and the output
+              file are unchanged, see :func:`Plot.Print` (default: ``False``)
+
+            * **force** (``bool``) -- print even if the plot and the output file are
+              unchanged when using **skipunchanged** (default: ``False``)
         """
         injections = {"inject0": kwargs.pop("inject", [])}
-        properties = DissectProperties(kwargs, [Histo1D, Plot, Canvas, Pad])
+        properties = DissectProperties(
+            kwargs, [Histo1D, Plot, Canvas, Pad, {"Print": Plot._printoptions}]
+        )
         plot = Plot(npads=1)
         plot.Register(self, **MergeDicts(properties["Histo1D"], properties["Pad"]))
         plot.Print(
-            path, **MergeDicts(properties["Plot"], properties["Canvas"], injections)
+            path,
+            **MergeDicts(
+                properties["Plot"],
+                properties["Canvas"],
+                properties["Print"],
+                injections,
+            )
         )
 
     def IncludeOverflow(self):
@@ -357,6 +462,7 @@ class Histo1D(MethodProxy, ROOT.TH1D):
 
     def Draw(self, option=None):
         # Draw the histogram to the current TPad together with it's errorband.
+        self._materialize()
         if option is not None:
             self.SetDrawOption(option)
         self.DrawCopy(self.GetDrawOption(), "_{}".format(uuid4().hex[:8]))
@@ -443,6 +549,64 @@ class Histo1D(MethodProxy, ROOT.TH1D):
         super(Histo1D, self).Add(histo, scale)
         self.SetEntries(raw_entries)
 
+    def Rebin(self, edges=2, newname=None, xbins=None):
+        r"""Merge the bins of the histogram into coarser bins.
+
+        The bin contents and squared weights are summed directly, i.e. without
+        re-reading any events. Bins outside of the range of the new binning are added
+        to the under- and overflow bins, the number of entries is preserved.
+
+        The signature of :func:`ROOT.TH1.Rebin` (``Rebin(ngroup, newname, xbins)``) is
+        supported as well. Unlike there, new bin edges which are not part of the current
+        binning raise a ``ValueError`` and the returned histogram is always a
+        :class:`.Histo1D`, i.e. the current one or a new one if **newname** is given.
+
+        :param edges: bin edges of the new binning, which must be a subset of the
+            current ones, or the number of consecutive bins to be merged (as for
+            :func:`ROOT.TH1.Rebin`, remaining bins go to the overflow bin, default: 2)
+        :type edges: ``list``, ``tuple``, ``int``
+
+        :param newname: if not ``None`` (or empty) the rebinned histogram is a new
+            histogram with the given name and the current one is left unchanged
+            (default: ``None``)
+        :type newname: ``str``
+
+        :param xbins: bin edges of the new binning, in which case **edges** is the
+            number of new bins (as for :func:`ROOT.TH1.Rebin`, default: ``None``)
+        :type xbins: ``list``, ``tuple``, ``array``
+
+        :returntype: ``Histo1D``
+        """
+        if xbins is not None:
+            edges = [xbins[i] for i in range(edges + 1)]
+        if newname:
+            return Histo1D(newname, self).Rebin(edges)
+        if isinstance(edges, (int, long)):
+            edges = self._lowbinedges[::edges]
+        indices = IOManager._getRebinIndices(self._lowbinedges, edges)
+        contents = IOManager._mergeBins(IOManager._getBinContents(self), indices)
+        sumw2 = IOManager._mergeBins(IOManager._getBinSumw2(self), indices)
+        lowbinedges = [self._lowbinedges[i] for i in indices]
+        entries = self.GetEntries()
+        self.SetBins(len(lowbinedges) - 1, array("d", lowbinedges))
+        IOManager._setBinContents(self, contents, sumw2)
+        self.SetEntries(entries)
+        self._lowbinedges = lowbinedges
+        self._nbins = len(lowbinedges) - 1
+        if self._errorband is not None:
+            self._errorband.Rebin(lowbinedges)
+        return self
+
+    def Lazy(self):
+        r"""Return a lazy expression consisting of the histogram.
+
+        Arithmetic operations on the expression are only evaluated (in a single pass)
+        when it is materialized into a new histogram, see :class:`.HistoExpression`.
+
+        :returntype: ``HistoExpression``
+        """
+        return HistoExpression(self)
+
     def ApplyScaleFactor(self, scalefactor, uncertainty=0):
         r"""Apply a scale factor to the histogram.
 
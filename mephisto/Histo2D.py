@@ -10,16 +10,21 @@ import root_numpy as rnp
 from uuid import uuid4
 from array import array
 from scipy import interpolate
+from scipy.spatial import cKDTree, ConvexHull
 from collections import defaultdict
+from multiprocessing.pool import ThreadPool
 
 from Pad import Pad
 from Plot import Plot
+from Graph import Graph
 from Canvas import Canvas
 from MethodProxy import *
 from IOManager import IOManager
+from HistoExpression import HistoExpression
 from Helpers import DissectProperties, MergeDicts, CheckPath
 
 
+@PropertyHook
 def ExtendProperties(cls):
     # Add properties to configure the countour lines. Define proxies for z-axis
     # properties.
@@ -316,6 +321,74 @@ class Histo2D(MethodProxy, ROOT.TH2D):
         else:
             super(Histo2D, self).Fill(*args)
 
+    def Rebin(self, xedges=2, yedges=None, newname=None):
+        r"""Merge the bins of the histogram into coarser bins.
+
+        The bin contents and squared weights are summed directly, i.e. without
+        re-reading any events. Bins outside of the range of the new binning are added
+        to the under- and overflow bins, the number of entries is preserved.
+
+        Note that this replaces :func:`ROOT.TH2.Rebin`, whose second argument is the
+        name of the new histogram instead of the binning on the y-axis (pass
+        **newname** as keyword argument instead). New bin edges which are not part of
+        the current binning raise a ``ValueError``.
+
+        :param xedges: bin edges of the new binning on the x-axis, which must be a
+            subset of the current ones, or the number of consecutive bins to be merged
+            (as for :func:`ROOT.TH2.RebinX`, default: 2)
+        :type xedges: ``list``, ``tuple``, ``int``
+
+        :param yedges: same as **xedges** for the y-axis (default: ``None``: keep the
+            binning on the y-axis)
+        :type yedges: ``list``, ``tuple``, ``int``
+
+        :param newname: if not ``None`` the rebinned histogram is a new histogram with
+            the given name and the current one is left unchanged (default: ``None``)
+        :type newname: ``str``
+
+        :returntype: ``Histo2D``
+        """
+        if newname:
+            return Histo2D(newname, self).Rebin(xedges, yedges)
+        xedges = self._xlowbinedges if xedges is None else xedges
+        yedges = self._ylowbinedges if yedges is None else yedges
+        if isinstance(xedges, (int, long)):
+            xedges = self._xlowbinedges[::xedges]
+        if isinstance(yedges, (int, long)):
+            yedges = self._ylowbinedges[::yedges]
+        xindices = IOManager._getRebinIndices(self._xlowbinedges, xedges)
+        yindices = IOManager._getRebinIndices(self._ylowbinedges, yedges)
+        arrays = []
+        for array2d in [IOManager._getBinContents(self), IOManager._getBinSumw2(self)]:
+            array2d = IOManager._mergeBins(array2d, xindices, axis=0)
+            arrays.append(IOManager._mergeBins(array2d, yindices, axis=1))
+        xlowbinedges = [self._xlowbinedges[i] for i in xindices]
+        ylowbinedges = [self._ylowbinedges[i] for i in yindices]
+        entries = self.GetEntries()
+        self.SetBins(
+            len(xlowbinedges) - 1,
+            array("d", xlowbinedges),
+            len(ylowbinedges) - 1,
+            array("d", ylowbinedges),
+        )
+        IOManager._setBinContents(self, *arrays)
+        self.SetEntries(entries)
+        self._xlowbinedges = xlowbinedges
+        self._ylowbinedges = ylowbinedges
+        self._nbinsx = len(xlowbinedges) - 1
+        self._nbinsy = len(ylowbinedges) - 1
+        return self
+
+    def Lazy(self):
+        r"""Return a lazy expression consisting of the histogram.
+
+        Arithmetic operations on the expression are only evaluated (in a single pass)
+        when it is materialized into a new histogram, see :class:`.HistoExpression`.
+
+        :returntype: ``HistoExpression``
+        """
+        return HistoExpression(self)
+
     def SetDrawOption(self, option):
         r"""Define the draw option for the histogram.
 
@@ -414,7 +487,7 @@ class Histo2D(MethodProxy, ROOT.TH2D):
                     self.GetDrawOption() + "SAME", "_{}_contours".format(hash)
                 )
 
-    @CheckPath(mode="w")
+    @CheckPath(mode="w", printoptions=True)
     def Print(self, path, **kwargs):
         r"""Print the histogram to a file.
 
@@ -444,10 +517,21 @@ class Histo2D(MethodProxy, ROOT.TH2D):
 
             * **mkdir** (``bool``) -- create non-existing directories in **path**
               (default: ``False``)
+
+            * **reuse** (``bool``) -- reuse a pooled canvas, see :func:`Plot.Print`
+              (default: ``False``)
+
+            * **skipunchanged** (``bool``) -- skip printing if the plot and the output
+              file are unchanged, see :func:`Plot.Print` (default: ``False``)
+
+            * **force** (``bool``) -- print even if the plot and the output file are
+              unchanged when using **skipunchanged** (default: ``False``)
         """
         injections = {"inject0": kwargs.pop("inject", [])}
         kwargs.setdefault("logy", False)  # overwriting Pad template's default value!
-        properties = DissectProperties(kwargs, [Histo2D, Plot, Canvas, Pad])
+        properties = DissectProperties(
+            kwargs, [Histo2D, Plot, Canvas, Pad, {"Print": Plot._printoptions}]
+        )
         if any(
             map(
                 lambda s: "Z" in s.upper(),
@@ -458,7 +542,13 @@ class Histo2D(MethodProxy, ROOT.TH2D):
         plot = Plot(npads=1)
         plot.Register(self, **MergeDicts(properties["Histo2D"], properties["Pad"]))
         plot.Print(
-            path, **MergeDicts(properties["Plot"], properties["Canvas"], injections)
+            path,
+            **MergeDicts(
+                properties["Plot"],
+                properties["Canvas"],
+                properties["Print"],
+                injections,
+            )
         )
 
     def Interpolate(self, *args, **kwargs):
@@ -467,7 +557,17 @@ class Histo2D(MethodProxy, ROOT.TH2D):
         :func:`ROOT.TH2.Interpolate` functionality is used.
 
         In the former case the :py:mod:`scipy`'s :func:`interpolate.griddata` function
-        is used.
+        is used. For large grids the **local** mode should be preferred: only the empty
+        bins are filled, using the data points in their neighbourhood only. The grid is
+        split into tiles which are interpolated independently (and optionally in
+        parallel), each taking into account the data points within a **halo** around
+        the tile. Empty bins which cannot be interpolated within their tile are filled
+        by inverse-distance weighting of the nearest data points. Alternatively, all
+        empty bins can be filled by inverse-distance weighting of the **neighbours**
+        nearest data points, which is the fastest option. In both cases bins outside the
+        convex hull of all data points are set to zero, as in the global mode. Unlike in
+        the global mode, the errors of the non-empty bins are kept in the local mode
+        (interpolated bins have no error).
 
         :param \*args: See :py:mod:`ROOT` documentation of :func:`ROOT.TH2.Interpolate`
 
@@ -485,8 +585,39 @@ class Histo2D(MethodProxy, ROOT.TH2D):
                 * **cubic**: return the value determined from a piecewise cubic,
                   continuously differentiable and approximately curvature-minimizing
                   polynomial surface
+
+            * **local** (``bool``) -- use the local interpolation mode (default:
+              ``False``)
+
+            * **neighbours** (``int``) -- fill the empty bins by inverse-distance
+              weighting of this number of nearest data points instead of the tiled
+              interpolation (only in local mode, default: ``None``)
+
+            * **tilesize** (``int``) -- edge length of the tiles in number of bins (only
+              in local mode, default: 64)
+
+            * **halo** (``int``) -- number of bins around each tile whose data points
+              are taken into account (only in local mode, default: a quarter of the
+              **tilesize**)
+
+            * **nthreads** (``int``) -- number of tiles interpolated in parallel (only
+              in local mode, default: 1)
+
+            * **memory** (``float``) -- approximate memory budget in MB, reduces the
+              **tilesize** and the chunk size of the nearest-neighbour queries
+              accordingly (only in local mode, default: ``None``)
         """
-        if len(args) == 0:
+        if len(args) == 0 and kwargs.pop("local", False):
+            array = IOManager._getBinContents(self)
+            sumw2 = np.where(array != 0, IOManager._getBinSumw2(self), 0.0)
+            IOManager._setBinContents(
+                self,
+                Histo2D._interpolateLocal(
+                    array, kwargs.pop("method", "cubic"), **kwargs
+                ),
+                sumw2,
+            )
+        elif len(args) == 0:
             # https://stackoverflow.com/a/39596856/10986034
             method = kwargs.pop("method", "cubic")
             array = rnp.hist2array(self, include_overflow=True)
@@ -505,6 +636,121 @@ class Histo2D(MethodProxy, ROOT.TH2D):
         else:
             super(Histo2D, self).Interpolate(*args)
 
+    @staticmethod
+    def _interpolateLocal(
+        array,
+        method="cubic",
+        neighbours=None,
+        tilesize=64,
+        halo=None,
+        nthreads=1,
+        memory=None,
+    ):
+        # Return a copy of the array with all zero valued entries replaced by values
+        # interpolated from the non-zero entries in their neighbourhood (see
+        # Histo2D.Interpolate). The interpolation is done in index space.
+        result = np.array(array, dtype=float)
+        filled = result != 0
+        if filled.all() or not filled.any():
+            return result
+        points = np.column_stack(np.nonzero(filled))
+        values = result[filled]
+        tree = cKDTree(points)
+        k = min(neighbours or 8, len(points))
+        chunksize = len(result.flat)
+        if memory is not None:
+            # distances, indices and weights of k neighbours per target (8 bytes each)
+            chunksize = max(1, int(memory * 2 ** 20 / (24.0 * k)))
+
+        def idw(targets):
+            # Inverse-distance weighting of the k nearest data points (chunked).
+            out = np.empty(len(targets))
+            for start in range(0, len(targets), chunksize):
+                chunk = targets[start : start + chunksize]
+                dist, idx = tree.query(chunk, k=k)
+                if k == 1:
+                    dist, idx = dist[:, np.newaxis], idx[:, np.newaxis]
+                weights = 1.0 / dist ** 2
+                out[start : start + chunksize] = np.sum(
+                    weights * values[idx], axis=1
+                ) / np.sum(weights, axis=1)
+            return out
+
+        def insidehull(targets):
+            # Check whether the targets are inside the convex hull of the data points.
+            try:
+                hull = ConvexHull(points)
+            except (RuntimeError, ValueError):  # e.g. all points on a line
+                return np.zeros(len(targets), dtype=bool)
+            return np.all(
+                np.dot(targets, hull.equations[:, :-1].T) + hull.equations[:, -1]
+                <= 1e-9,
+                axis=1,
+            )
+
+        if neighbours is not None:
+            targets = np.column_stack(np.nonzero(~filled))
+            interpolated = np.zeros(len(targets))
+            inside = insidehull(targets)
+            interpolated[inside] = idw(targets[inside])
+            result[~filled] = interpolated
+            return result
+        if halo is None:
+            halo = max(tilesize // 4, 2)
+        if memory is not None:
+            # rough estimate of the memory needed per data point by the triangulation
+            maxsize = int(np.sqrt(memory * 2 ** 20 / (256.0 * nthreads))) - 2 * halo
+            tilesize = max(min(tilesize, maxsize), 8)
+        nx, ny = result.shape
+        tiles = [
+            (i, j)
+            for i in range(0, nx, tilesize)
+            for j in range(0, ny, tilesize)
+            if not filled[i : i + tilesize, j : j + tilesize].all()
+        ]
+
+        def interpolatetile(tile):
+            # Interpolate the empty bins of a tile using the data points within the
+            # tile and its halo. Bins which cannot be interpolated are set to NaN.
+            i, j = tile
+            ilo, jlo = max(i - halo, 0), max(j - halo, 0)
+            window = filled[ilo : i + tilesize + halo, jlo : j + tilesize + halo]
+            localpoints = np.column_stack(np.nonzero(window)) + [ilo, jlo]
+            targets = np.column_stack(
+                np.nonzero(~filled[i : i + tilesize, j : j + tilesize])
+            ) + [i, j]
+            interpolated = np.full(len(targets), np.nan)
+            if len(localpoints) >= 3:
+                try:
+                    interpolated = interpolate.griddata(
+                        localpoints,
+                        result[localpoints[:, 0], localpoints[:, 1]],
+                        targets,
+                        method=method,
+                        fill_value=np.nan,
+                    )
+                except (RuntimeError, ValueError):  # e.g. all points on a line
+                    pass
+            return targets, interpolated
+
+        if nthreads > 1:
+            pool = ThreadPool(nthreads)
+            tileresults = pool.map(interpolatetile, tiles)
+            pool.close()
+            pool.join()
+        else:
+            tileresults = [interpolatetile(tile) for tile in tiles]
+        targets = np.concatenate([t for t, _ in tileresults])
+        interpolated = np.concatenate([v for _, v in tileresults])
+        missing = np.isnan(interpolated)
+        if missing.any():
+            fallback = np.zeros(missing.sum())
+            inside = insidehull(targets[missing])
+            fallback[inside] = idw(targets[missing][inside])
+            interpolated[missing] = fallback
+        result[targets[:, 0], targets[:, 1]] = interpolated
+        return result
+
     def SetContour(self, *args):
         r"""Define the contour levels.
 
@@ -527,26 +773,135 @@ class Histo2D(MethodProxy, ROOT.TH2D):
         r"""Return a dictionary with a list of graphs representing the contour lines
         for any given contour level.
 
+        The contour lines are extracted from the bin contents (evaluated at the bin
+        centers) using the marching squares algorithm. Each disconnected contour line
+        is returned as a separate :class:`.Graph` (instead of the :class:`ROOT.TGraph`
+        clones obtained by drawing with the 'CONT LIST' option previously); closed
+        contour lines end in their first point.
+
         :returntype: ``dict``
         """
-        # https://root.cern/doc/master/classTHistPainter.html#HP16a
         if not self._contours:
             return {}
         graphs = defaultdict(lambda: [])
-        htmp = Histo2D("{}_{}".format(self.GetName(), uuid4().hex[:8]), self)
-        htmp.SetContour(*self._contours)
-        canv = ROOT.TCanvas()
-        canv.cd()
-        super(Histo2D, htmp).Draw("CONT LIST")
-        ROOT.gPad.Update()
-        del canv, htmp
-        conts = ROOT.gROOT.GetListOfSpecials().FindObject("contours")
+        contents = rnp.hist2array(self, include_overflow=False)
+        xedges = np.asarray(self._xlowbinedges)
+        yedges = np.asarray(self._ylowbinedges)
+        x = 0.5 * (xedges[:-1] + xedges[1:])  # bin centers
+        y = 0.5 * (yedges[:-1] + yedges[1:])
         for i, contour in enumerate(self._contours):
-            contLevel = conts.At(i)
-            curv = contLevel.First().Clone()
-            graphs[contour].append(curv)
+            for j, (xvalues, yvalues) in enumerate(
+                Histo2D._marchingSquares(contents, x, y, contour)
+            ):
+                graphs[contour].append(
+                    Graph(
+                        "{}_contour{}_{}".format(self.GetName(), i, j),
+                        list(xvalues),
+                        list(yvalues),
+                    )
+                )
         return graphs
 
+    @staticmethod
+    def _marchingSquares(z, x, y, level):
+        # Return a list of (x, y) arrays of all contour lines of the 2-dimensional array
+        # z (with z[i, j] being the value at x[i], y[j]) at the given level. Crossing
+        # points are interpolated linearly along the cell edges, saddle cells are
+        # resolved using the average of the four corners. Edges are identified by
+        # 2 * (i * ny + j) for edges along x and 2 * (i * ny + j) + 1 for edges along y
+        # starting at the corner (i, j).
+        z = np.asarray(z, dtype=float)
+        nx, ny = z.shape
+        if nx < 2 or ny < 2:
+            return []
+        above = z > level
+        corners = [above[:-1, :-1], above[1:, :-1], above[1:, 1:], above[:-1, 1:]]
+        cases = sum(c.astype(int) << k for k, c in enumerate(corners))
+        center = 0.25 * (z[:-1, :-1] + z[1:, :-1] + z[1:, 1:] + z[:-1, 1:]) > level
+        # Segments per case as pairs of cell edges: bottom (0), right (1), top (2) and
+        # left (3), for saddle cells (5 and 10) depending on the center value:
+        segmentsbycase = {
+            1: [(3, 0)],
+            2: [(0, 1)],
+            3: [(3, 1)],
+            4: [(1, 2)],
+            6: [(0, 2)],
+            7: [(3, 2)],
+            8: [(2, 3)],
+            9: [(0, 2)],
+            11: [(1, 2)],
+            12: [(3, 1)],
+            13: [(0, 1)],
+            14: [(3, 0)],
+        }
+        saddles = {
+            (5, True): [(0, 1), (2, 3)],
+            (5, False): [(3, 0), (1, 2)],
+            (10, True): [(3, 0), (1, 2)],
+            (10, False): [(0, 1), (2, 3)],
+        }
+        cells = []
+        for case, segments in segmentsbycase.items():
+            ii, jj = np.nonzero(cases == case)
+            cells += [(ii, jj, segments)]
+        for (case, centerabove), segments in saddles.items():
+            ii, jj = np.nonzero((cases == case) & (center == centerabove))
+            cells += [(ii, jj, segments)]
+
+        def edgeids(ii, jj, edge):
+            # Return the ids of the given edge of the cells (ii, jj).
+            return {
+                0: 2 * (ii * ny + jj),
+                1: 2 * ((ii + 1) * ny + jj) + 1,
+                2: 2 * (ii * ny + jj + 1),
+                3: 2 * (ii * ny + jj) + 1,
+            }[edge]
+
+        starts, ends = [], []
+        for ii, jj, segments in cells:
+            for a, b in segments:
+                starts.append(edgeids(ii, jj, a))
+                ends.append(edgeids(ii, jj, b))
+        if not starts:
+            return []
+        starts, ends = np.concatenate(starts), np.concatenate(ends)
+        # Crossing points of all edges involved:
+        edges = np.unique(np.concatenate([starts, ends]))
+        ii, jj = (edges // 2) // ny, (edges // 2) % ny
+        alongy = (edges % 2).astype(bool)
+        ii2, jj2 = np.where(alongy, ii, ii + 1), np.where(alongy, jj + 1, jj)
+        z1, z2 = z[ii, jj], z[ii2, jj2]
+        t = (level - z1) / (z2 - z1)
+        px = x[ii] + t * (x[ii2] - x[ii])
+        py = y[jj] + t * (y[jj2] - y[jj])
+        points = dict(zip(edges.tolist(), zip(px.tolist(), py.tolist())))
+        # Link the segments to contour lines (each edge belongs to at most two):
+        neighbours = defaultdict(list)
+        for a, b in zip(starts.tolist(), ends.tolist()):
+            neighbours[a].append(b)
+            neighbours[b].append(a)
+        lines = []
+        visited = set()
+        openends = [e for e, n in neighbours.items() if len(n) == 1]
+        for start in openends + list(neighbours.keys()):
+            if start in visited:
+                continue
+            line = [start]
+            visited.add(start)
+            current = start
+            while True:
+                following = [e for e in neighbours[current] if e not in visited]
+                if not following:
+                    break
+                current = following[0]
+                line.append(current)
+                visited.add(current)
+            if len(line) > 2 and start in neighbours[current]:
+                line.append(start)  # closed contour line
+            xvalues, yvalues = zip(*[points[e] for e in line])
+            lines.append((np.array(xvalues), np.array(yvalues)))
+        return lines
+
 
 if __name__ == "__main__":
 
@@ -0,0 +1,229 @@
+#!/usr/bin/env python2.7
+
+from __future__ import print_function
+
+import ROOT
+
+import numbers
+
+import numpy as np
+
+from uuid import uuid4
+
+from logger import logger
+from IOManager import IOManager
+
+
+class HistoExpression(object):
+    r"""Class for lazy arithmetic expressions of histograms.
+
+    Combining histograms via the operators ``+``, ``-``, ``*`` and ``/`` (with each
+    other or with numbers) only builds a small expression graph. The bin contents are
+    computed in a single vectorized pass over the bin contents and squared weights of
+    all histograms involved once the expression is evaluated, and a histogram is only
+    created when the expression is materialized, e.g.
+
+    .. code-block:: python
+
+        expr = (h1.Lazy() + 2 * h2.Lazy()) / h3.Lazy()
+        ratio = expr.Materialize("ratio", linecolor="#2e95bb")
+
+    The statistical errors are propagated linearly, with the histograms treated as
+    uncorrelated with each other. Unlike for a sequence of :func:`ROOT.TH1.Add` and
+    :func:`ROOT.TH1.Divide` calls, a histogram appearing several times in the expression
+    is correctly treated as fully correlated with itself (e.g. ``h / h`` has no error).
+    As for :func:`ROOT.TH1.Divide`, bins with a zero denominator are set to zero.
+
+    Expressions can be passed directly to all methods accepting a histogram via the
+    ``MephistofyObject`` decorator (e.g. :func:`.Plot.Register`), which materializes
+    them.
+    """
+
+    def __init__(self, histo):
+        r"""Initialize an expression consisting of a single histogram.
+
+        :param histo: histogram (including under- and overflow bins) whose current bin
+            contents are used when the expression is evaluated
+        :type histo: ``Histo1D``, ``Histo2D``, ``TH1``
+        """
+        self._op = "histo"
+        self._operands = (histo,)
+
+    @staticmethod
+    def _node(op, *operands):
+        # Create an expression node applying the operator to the operands.
+        node = HistoExpression.__new__(HistoExpression)
+        node._op = op
+        node._operands = operands
+        return node
+
+    @staticmethod
+    def _wrap(operand):
+        # Convert a histogram or number into an expression (None if not supported).
+        if isinstance(operand, HistoExpression):
+            return operand
+        if isinstance(operand, numbers.Number):
+            return HistoExpression._node("const", float(operand))
+        if isinstance(operand, ROOT.TH1):
+            return HistoExpression(operand)
+        return None
+
+    def _binary(self, op, other, reverse=False):
+        other = HistoExpression._wrap(other)
+        if other is None:
+            return NotImplemented
+        if reverse:
+            return HistoExpression._node(op, other, self)
+        return HistoExpression._node(op, self, other)
+
+    def __add__(self, other):
+        return self._binary("+", other)
+
+    def __radd__(self, other):
+        return self._binary("+", other, reverse=True)
+
+    def __sub__(self, other):
+        return self._binary("-", other)
+
+    def __rsub__(self, other):
+        return self._binary("-", other, reverse=True)
+
+    def __mul__(self, other):
+        return self._binary("*", other)
+
+    def __rmul__(self, other):
+        return self._binary("*", other, reverse=True)
+
+    def __truediv__(self, other):
+        return self._binary("/", other)
+
+    def __rtruediv__(self, other):
+        return self._binary("/", other, reverse=True)
+
+    __div__ = __truediv__
+    __rdiv__ = __rtruediv__
+
+    def __neg__(self):
+        return HistoExpression._node("*", HistoExpression._node("const", -1.0), self)
+
+    def __pos__(self):
+        return self
+
+    def __str__(self):
+        if self._op == "histo":
+            return self._operands[0].GetName()
+        if self._op == "const":
+            return "{:g}".format(self._operands[0])
+        return "({} {} {})".format(self._operands[0], self._op, self._operands[1])
+
+    def __repr__(self):
+        return "HistoExpression('{}')".format(self)
+
+    def GetListOfHistograms(self):
+        r"""Return the (distinct) histograms the expression consists of.
+
+        :returntype: ``list``
+        """
+        histos = []
+        nodes = [self]
+        while nodes:
+            node = nodes.pop()
+            if node._op == "histo":
+                if not any([node._operands[0] is h for h in histos]):
+                    histos.append(node._operands[0])
+            elif node._op != "const":
+                nodes.extend(reversed(node._operands))
+        return histos
+
+    def Evaluate(self):
+        r"""Compute the bin contents and squared errors of the expression.
+
+        The returned arrays include the under- and overflow bins and have the shape of
+        the arrays returned by :func:`.IOManager._getBinContents`.
+
+        :returntype: ``tuple`` -- bin contents and squared errors as ``numpy.ndarray``
+        """
+        leaves = {}
+        for histo in self.GetListOfHistograms():
+            leaves[id(histo)] = (
+                IOManager._getBinContents(histo),
+                IOManager._getBinSumw2(histo),
+            )
+        shapes = set([contents.shape for contents, sumw2 in leaves.values()])
+        if len(shapes) > 1:
+            logger.error(
+                "Cannot evaluate '{}': Histograms have different numbers of bins "
+                "({})!".format(self, ", ".join([str(s) for s in sorted(shapes)]))
+            )
+            raise ValueError
+        contents, grads = self._evaluate(leaves)
+        contents = contents + np.zeros(shapes.pop())  # constants only broadcast
+        sumw2 = np.zeros(contents.shape)
+        for key, grad in grads.items():
+            sumw2 += grad ** 2 * leaves[key][1]
+        return contents, sumw2
+
+    def _evaluate(self, leaves):
+        # Forward-mode error propagation: Return the value of the node together with its
+        # derivatives with respect to the bin contents of each histogram (by id).
+        if self._op == "histo":
+            key = id(self._operands[0])
+            return leaves[key][0], {key: 1.0}
+        if self._op == "const":
+            return self._operands[0], {}
+        a, da = self._operands[0]._evaluate(leaves)
+        b, db = self._operands[1]._evaluate(leaves)
+        if self._op == "+":
+            return a + b, HistoExpression._linear([(1.0, da), (1.0, db)])
+        if self._op == "-":
+            return a - b, HistoExpression._linear([(1.0, da), (-1.0, db)])
+        if self._op == "*":
+            return a * b, HistoExpression._linear([(b, da), (a, db)])
+        b = np.asarray(b, dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            value = a / (b + np.zeros(np.shape(a)))
+            grads = HistoExpression._linear([(1.0 / b, da), (-value / b, db)])
+        zero = b == 0
+        if np.any(zero):
+            value = np.where(zero, 0.0, value)
+            grads = {key: np.where(zero, 0.0, grad) for key, grad in grads.items()}
+        return value, grads
+
+    @staticmethod
+    def _linear(terms):
+        # Sum the derivatives of the terms weighted by the corresponding factors.
+        grads = {}
+        for factor, termgrads in terms:
+            for key, grad in termgrads.items():
+                grads[key] = grads.get(key, 0.0) + factor * grad
+        return grads
+
+    def Materialize(self, name=None, **kwargs):
+        r"""Evaluate the expression and return the result as a new histogram.
+
+        The histogram is a copy (including its properties) of the first histogram in
+        the expression holding the evaluated bin contents and errors. Its number of
+        entries is the sum of the entries of all histograms in the expression.
+
+        :param name: name of the histogram (default: ``None``: random name)
+        :type name: ``str``
+
+        :param \**kwargs: :class:`.Histo1D` (or :class:`.Histo2D`) properties
+
+        :returntype: ``Histo1D``, ``Histo2D``
+        """
+        from Histo1D import Histo1D  # imported here to avoid circular imports
+        from Histo2D import Histo2D
+
+        contents, sumw2 = self.Evaluate()
+        histos = self.GetListOfHistograms()
+        if name is None:
+            name = "expression_{}".format(uuid4().hex[:8])
+        cls = Histo2D if histos[0].InheritsFrom("TH2") else Histo1D
+        histo = cls(name, histos[0], **kwargs)
+        histo.SetEntries(sum([h.GetEntries() for h in histos]))
+        IOManager._setBinContents(histo, contents, sumw2)
+        if getattr(histo, "_errorband", None) is not None:
+            histo._errorband.Reset()
+            histo._errorband.Add(histo)
+        return histo
@@ -8,6 +8,7 @@ import ROOT
 
 from logger import logger
 from Helpers import CheckPath, timeit, cache
+from profiler import profiler
 
 import root_numpy as rnp
 
@@ -179,11 +180,113 @@ class IOManager(object):
         binning = {}
         for coord in ["x", "y", "z"]:
             axis = getattr(histo, "Get{}axis".format(coord.capitalize()))()
-            binning[coord + "binning"] = [
-                float(axis.GetBinLowEdge(i)) for i in range(1, axis.GetNbins() + 2, 1)
-            ]
+            binning[coord + "binning"] = IOManager._getAxisEdges(axis)
         return binning
 
+    @staticmethod
+    def _getAxisEdges(axis):
+        # Get the bin low-edges of an axis (including the upper edge of the last bin)
+        # without a PyROOT call per bin: Variable bin edges are read as one array, equal
+        # bin widths are computed as done by TAxis::GetBinLowEdge.
+        xbins = axis.GetXbins()
+        if xbins.GetSize() > 0:
+            return rnp.array(xbins).tolist()
+        nbins = axis.GetNbins()
+        xmin, xmax = axis.GetXmin(), axis.GetXmax()
+        return (xmin + np.arange(nbins + 1) * ((xmax - xmin) / nbins)).tolist()
+
+    @staticmethod
+    def _getBinContents(histo):
+        # Get the bin contents of a histogram (including under- and overflow bins) as a
+        # numpy array in one go.
+        return rnp.hist2array(histo, include_overflow=True, copy=True)
+
+    @staticmethod
+    def _getBinSumw2(histo):
+        # Get the sum of squared weights of a histogram (including under- and overflow
+        # bins) as a numpy array with the same shape as the one of the bin contents.
+        contents = IOManager._getBinContents(histo)
+        if histo.GetSumw2N() == 0:
+            return np.abs(contents)  # Poisson errors
+        return rnp.array(histo.GetSumw2()).reshape(contents.shape, order="F")
+
+    @staticmethod
+    def _getRebinIndices(edges, newedges):
+        # Return the indices of the new bin edges among the current ones. The new edges
+        # must be a strictly increasing subset of the current ones.
+        edges = np.asarray(edges, dtype=float)
+        newedges = np.asarray(newedges, dtype=float)
+        if newedges.ndim != 1 or len(newedges) < 2 or np.any(np.diff(newedges) <= 0):
+            logger.error("Bin edges must be strictly increasing: {}".format(newedges))
+            raise ValueError
+        indices = np.clip(np.searchsorted(edges, newedges), 1, len(edges) - 1)
+        lower = np.abs(edges[indices - 1] - newedges)
+        indices -= (lower < np.abs(edges[indices] - newedges)).astype(int)
+        mismatch = ~np.isclose(edges[indices], newedges, rtol=1e-9, atol=1e-12)
+        if np.any(mismatch):
+            logger.error(
+                "Bin edges {} are not part of the current binning!".format(
+                    newedges[mismatch].tolist()
+                )
+            )
+            raise ValueError
+        return indices
+
+    @staticmethod
+    def _mergeBins(array, indices, axis=0):
+        # Sum the bins (including under- and overflow bins) of the array along the axis
+        # into the coarser bins given by the indices of their edges (see
+        # _getRebinIndices). Bins outside of the new range go to the under- and overflow
+        # bins.
+        return np.add.reduceat(array, np.concatenate([[0], indices + 1]), axis=axis)
+
+    @staticmethod
+    def _setBinContents(histo, contents, sumw2=None):
+        # Write the bin contents (and optionally the sum of squared weights) given as
+        # numpy arrays including under- and overflow bins back to the histogram. The
+        # number of entries of the histogram is preserved.
+        entries = histo.GetEntries()
+        errors = np.sqrt(sumw2) if sumw2 is not None else None
+        rnp.array2hist(contents, histo, errors=errors)
+        histo.SetEntries(entries)
+
+    @staticmethod
+    def _readBatches(path, tree, branches, batchsize=int(1e5)):
+        # Yield structured arrays holding the values of the given branch expressions for
+        # consecutive batches of events of the tree.
+        infile = ROOT.TFile.Open(path)
+        intree = infile.Get(tree)
+        if not intree:
+            raise KeyError("File '{}' has no tree called '{}'".format(path, tree))
+        entries = intree.GetEntries()
+        infile.Close()
+        for start in range(0, entries, batchsize):
+            with profiler.Span("io", tree=tree, start=start):
+                array = rnp.root2array(
+                    path,
+                    tree,
+                    branches=list(branches),
+                    start=start,
+                    stop=start + batchsize,
+                )
+            profiler.Count("io.events", len(array))
+            yield array
+
+    @staticmethod
+    def _computeCutMask(array, cuts):
+        # Return a bitmask for each event of the structured array where bit i is set if
+        # the event passes cuts[i] (which must be a field of the array).
+        if len(cuts) > 64:
+            logger.error(
+                "Cannot evaluate more than 64 cuts at once (got {})!".format(len(cuts))
+            )
+            raise ValueError
+        with profiler.Span("eval", ncuts=len(cuts)):
+            mask = np.zeros(len(array), dtype=np.uint64)
+            for bit, cut in enumerate(cuts):
+                mask |= (array[cut] != 0).astype(np.uint64) << np.uint64(bit)
+        return mask
+
     @staticmethod
     @timeit
     def GetHistogram(infile, **kwargs):
@@ -259,12 +362,19 @@ class IOManager(object):
         else:
             raise NotImplementedError
         htmp.Sumw2()
-        tfile = ROOT.TFile.Open(infile, "read")
-        ttree = tfile.Get(treename)
+        with profiler.Span("io", tree=treename):
+            tfile = ROOT.TFile.Open(infile, "read")
+            ttree = tfile.Get(treename)
         if not isinstance(ttree, ROOT.TTree):
             logger.error("Specified tree='{}' not found!".format(treename))
         ROOT.gROOT.cd()
-        nevts = ttree.Project(name, varexp, "({})*({})".format(weight, cuts), "goff")
+        # TTree::Project reads, evaluates and fills in one go:
+        with profiler.Span("fill", varexp=varexp):
+            nevts = ttree.Project(
+                name, varexp, "({})*({})".format(weight, cuts), "goff"
+            )
+        if profiler.IsEnabled():  # avoid the PyROOT call otherwise
+            profiler.Count("io.events", ttree.GetEntries())
         htmp.SetDirectory(0)
         tfile.Close()
         if nevts < 0:
@@ -401,21 +511,26 @@ class IOManager(object):
                 if not options["append"]:
                     histo.Reset()
             for start in range(0, self._entries, batchsize):
-                array = rnp.root2array(
-                    self._filepath,
-                    self._treename,
-                    branches=branchexprs,
-                    start=start,
-                    stop=start + batchsize,
-                )
-                for histo, options in self._store:
-                    if not ":" in options["varexp"]:
-                        varexp = array[options["varexp"]]
-                    else:
-                        varexp = rnp.rec2array(array[options["varexp"].split(":")])
-                    cuts = array["({})*({})".format(options["weight"], options["cuts"])]
-                    mask = np.where(cuts != 0)
-                    rnp.fill_hist(histo, varexp[mask], weights=cuts[mask])
+                with profiler.Span("io", tree=self._treename, start=start):
+                    array = rnp.root2array(
+                        self._filepath,
+                        self._treename,
+                        branches=branchexprs,
+                        start=start,
+                        stop=start + batchsize,
+                    )
+                profiler.Count("io.events", len(array))
+                with profiler.Span("fill", nhistos=len(self._store)):
+                    for histo, options in self._store:
+                        if not ":" in options["varexp"]:
+                            varexp = array[options["varexp"]]
+                        else:
+                            varexp = rnp.rec2array(array[options["varexp"].split(":")])
+                        cuts = array[
+                            "({})*({})".format(options["weight"], options["cuts"])
+                        ]
+                        mask = np.where(cuts != 0)
+                        rnp.fill_hist(histo, varexp[mask], weights=cuts[mask])
             zeroentriesoptions = []
             for histo, options in self._store:
                 options = {k:v for k, v in options.items() if not k in ["varexp", "append"]}
@@ -141,11 +141,14 @@ class Legend(MethodProxy, ROOT.TLegend):
         maxtitleheight = 0.0
         lastcolmaxtitlewidth = 0.0
         for i, histo in enumerate(self._store):
-            title = Text(0.5, 0.5, histo.GetTitle(), textsize=self.GetTextSize())
-            maxtitlewidth = max(maxtitlewidth, title.GetXsize())
-            maxtitleheight = max(maxtitleheight, title.GetYsize())
+            # Cached, hence the layout of each title is computed only once:
+            titlewidth, titleheight = Text.Measure(
+                histo.GetTitle(), textsize=self.GetTextSize()
+            )
+            maxtitlewidth = max(maxtitlewidth, titlewidth)
+            maxtitleheight = max(maxtitleheight, titleheight)
             if self.GetNColumns() > 1 and i % self.GetNColumns() == 1:
-                lastcolmaxtitlewidth = max(lastcolmaxtitlewidth, title.GetXsize())
+                lastcolmaxtitlewidth = max(lastcolmaxtitlewidth, titlewidth)
         x2 = 0.925 + self._xshift
         x1 = (
             max(
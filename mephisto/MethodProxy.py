@@ -5,6 +5,7 @@ from __future__ import print_function
 import os
 import re
 import json
+import time
 
 from collections import OrderedDict
 
@@ -16,20 +17,78 @@ from Helpers import ColorID
 __filedir__ = os.path.dirname(os.path.abspath(__file__))
 
 
+# Classes decorated with PreloadProperties whose properties have not been loaded yet,
+# mapped to the list of hooks to be called once they are (see PropertyHook).
+_pendingclasses = {}
+
+
 def PreloadProperties(cls):
     # Decorator for classes inheriting from MethodProxy.
     # Loads all properties and corresponding methods class-wide
     # before creating an instance of the class.
     # (https://stackoverflow.com/a/13900861)
-    cls._loadProperties()
+    # The introspection of the (huge) ROOT class hierarchies is costly, hence the class
+    # is only registered here and its properties are loaded on first use, i.e. when an
+    # instance is created or one of its property tables (e.g. cls._properties) is
+    # accessed for the first time.
+    _pendingclasses[cls] = []
     return cls
 
 
+def PropertyHook(hook):
+    # Decorator turning a function which extends the properties of a class into a
+    # class decorator. The function is called right after the properties of the class
+    # have been loaded and the dispatch tables are rebuilt afterwards.
+    def decorator(cls):
+        if cls in _pendingclasses:
+            _pendingclasses[cls].append(hook)
+        else:
+            hook(cls)
+            cls._buildDispatchTables()
+        return cls
+
+    return decorator
+
+
+class PropertyTable(object):
+    # Descriptor for the class-wide property tables of MethodProxy, loading the
+    # properties of the class on first access. Once loaded, the tables are attributes
+    # of the class itself and shadow the descriptor.
+    def __init__(self, name, default):
+        self._name = name
+        self._default = default
+
+    def __get__(self, instance, owner):
+        if MethodProxy._ensureLoaded(owner):
+            return getattr(owner, self._name)
+        return type(self._default)(self._default)
+
+
 class MethodProxy(object):
 
-    _methods = []
-    _properties = []
+    _methods = PropertyTable("_methods", [])
+    _properties = PropertyTable("_properties", [])
     _ignore_properties = []
+    _setters = PropertyTable("_setters", {})  # property -> list of setter names
+    _getters = PropertyTable("_getters", {})  # property -> getter name
+    _propertyrank = PropertyTable("_propertyrank", {})  # property -> rank
+
+    @staticmethod
+    def _ensureLoaded(cls):
+        # Load the properties of the first class in the MRO of cls, which has been
+        # decorated with PreloadProperties but whose properties have not been loaded
+        # yet. Returns False if there is no such class.
+        for klass in cls.__mro__:
+            if klass in _pendingclasses:
+                hooks = _pendingclasses.pop(klass)
+                logger.debug("Loading properties for '{}'...".format(klass))
+                klass._loadProperties()
+                for hook in hooks:
+                    hook(klass)
+                if hooks:
+                    klass._buildDispatchTables()
+                return True
+        return False
 
     @classmethod
     def _loadProperties(cls):
@@ -82,26 +141,58 @@ class MethodProxy(object):
         cls._properties = sorted(
             set([f[3:].lower() for f in cls._methods if f[3:] != ""])
         )
+        cls._buildDispatchTables()
         cls._loadTemplates()
 
+    @classmethod
+    def _buildDispatchTables(cls):
+        # Map each property to its setter(s), its getter and its rank in
+        # cls._properties, such that properties are dispatched via dictionary lookups
+        # instead of scanning the list of methods. Needs to be called again whenever
+        # cls._methods or cls._properties are extended (e.g. by class decorators).
+        cls._setters = {}
+        cls._getters = {}
+        for method in cls._methods:
+            if method.startswith("Set"):
+                cls._setters.setdefault(method[3:].lower(), []).append(method)
+            else:
+                cls._getters.setdefault(method[3:].lower(), method)
+        cls._propertyrank = {}
+        for rank, property in enumerate(cls._properties):
+            cls._propertyrank.setdefault(property, rank)
+
     @classmethod
     def _loadTemplates(cls):
-        cls._templates = {}
-        jsonpath = "{}/templates/{}_templates.json".format(__filedir__, cls.__name__)
-        if os.path.exists(jsonpath):
-            cls._templates = json.load(open(jsonpath))
+        # Parse the template file(s) of the class into the process-wide registry.
+        TemplateRegistry.Lookup(cls.__name__)
 
     def __init__(self):
-        if len(self.__class__._methods) == 0 or len(self.__class__._properties) == 0:
-            logger.debug("Loading properties for '{}'...".format(self.__class__))
-            self._loadProperties()
+        MethodProxy._ensureLoaded(self.__class__)
         self._cache = {}
 
     @classmethod
     def GetTemplate(cls, template):
-        tmpltdict = dict(cls._templates.get("common", {}))
-        tmpltdict.update(cls._templates[template])
-        return tmpltdict
+        # Templates are looked up for the first class in the MRO providing any.
+        for klass in cls.__mro__:
+            templates = TemplateRegistry.Lookup(klass.__name__)
+            if templates or klass is MethodProxy:
+                break
+        return TemplateRegistry.Copy(templates[template])
+
+    @staticmethod
+    def AddTemplateDirectory(directory):
+        r"""Add a directory with user-defined template files.
+
+        Template files are named '<Class>_templates.json' (e.g.
+        'Histo1D_templates.json'). Templates defined in them extend or override the
+        built-in templates of the same name, with directories added later taking
+        precedence. Changes to the files are picked up automatically (within a few
+        seconds).
+
+        :param directory: path of the directory
+        :type directory: ``str``
+        """
+        TemplateRegistry.AddDirectory(directory)
 
     @classmethod
     def GetListOfProperties(cls):
@@ -124,17 +215,14 @@ class MethodProxy(object):
         return cls.__name__
 
     def GetProperty(self, property):
-        if not property in self.__class__._properties:
+        if not property in self.__class__._propertyrank:
             raise KeyError(
                 "'{}' object has no property named '{}'!".format(
                     self.__class__.__name__, property
                 )
             )
-        try:
-            method = filter(
-                lambda m: m.lower() == "get{}".format(property), self.__class__._methods
-            )[0]
-        except IndexError:
+        method = self.__class__._getters.get(property)
+        if method is None:
             return None
         return getattr(self, method)()
 
@@ -147,8 +235,30 @@ class MethodProxy(object):
                     properties[str(prefix) + property] = value
         return properties
 
-    def CacheProperties(self):
-        self._cache = self.GetProperties()
+    def SnapshotProperties(self, *properties):
+        # Return the current values of the given properties (of all properties if none
+        # are given). Unknown properties and those without a value are omitted.
+        if not properties:
+            return self.GetProperties()
+        snapshot = {}
+        for property in properties:
+            property = property.lower()
+            try:
+                value = self.GetProperty(property)
+            except KeyError:
+                continue
+            if value is not None:
+                snapshot[property] = value
+        return snapshot
+
+    def RestoreProperties(self, snapshot):
+        # Re-apply the properties of a snapshot in the order given by cls._properties.
+        rank = self.__class__._propertyrank
+        for property in sorted(snapshot, key=lambda p: rank.get(p, len(rank))):
+            self.DeclareProperty(property, snapshot[property])
+
+    def CacheProperties(self, *properties):
+        self._cache = self.SnapshotProperties(*properties)
 
     def DeclareProperty(self, property, args):
         if args is None:
@@ -160,8 +270,7 @@ class MethodProxy(object):
                 )
             self.DeclareProperties(**self.GetTemplate(args))
             return
-        regex = re.compile("Set{}$".format(property), re.IGNORECASE)
-        match = list(filter(regex.match, self.__class__._methods))
+        match = self.__class__._setters.get(property.lower(), [])
         if not match:
             raise KeyError("Unknown property '{}'!".format(property))
         elif len(match) > 1:
@@ -198,11 +307,12 @@ class MethodProxy(object):
                 if k in list(properties.keys()) and v is not None
             }
         )
+        rank = self.__class__._propertyrank
+        for property in kwargs:
+            if property not in rank:
+                raise ValueError("Unknown property '{}'!".format(property))
         properties = OrderedDict(
-            list(properties.items())
-            + sorted(
-                kwargs.items(), key=lambda x: self.__class__._properties.index(x[0])
-            )
+            list(properties.items()) + sorted(kwargs.items(), key=lambda x: rank[x[0]])
         )
         for property, args in properties.items():
             self.DeclareProperty(property, args)
@@ -211,18 +321,94 @@ class MethodProxy(object):
         self.DeclareProperty(property, self._cache[property])
 
     def ResetProperties(self):
-        for property, args in self._cache.items():
-            self.DeclareProperty(property, args)
+        self.RestoreProperties(self._cache)
+
+
+class TemplateRegistry(object):
+    # Process-wide registry of the templates of all MethodProxy classes. The template
+    # files '<Class>_templates.json' found in the template directories are parsed only
+    # once and all named templates are stored already merged with the 'common' one.
+    # The stored templates are never handed out directly, only copies of them. A class
+    # is reloaded if the set of its template files or their modification times change.
+    # To keep file system calls off the hot path (every object construction looks up
+    # its templates), the files of a class are checked at most once per _checkinterval
+    # seconds and whenever a template directory is added.
+
+    _directories = [os.path.join(__filedir__, "templates")]
+    _registry = {}  # class name -> (signature, merged templates)
+    _checked = {}  # class name -> time of the last check of the template files
+    _checkinterval = 2.0
+
+    @classmethod
+    def AddDirectory(cls, directory):
+        directory = os.path.abspath(directory)
+        if not os.path.isdir(directory):
+            logger.error("Template directory '{}' does not exist!".format(directory))
+            raise IOError
+        if directory not in cls._directories:
+            cls._directories.append(directory)
+            cls._checked.clear()
+
+    @classmethod
+    def Lookup(cls, clsname):
+        # Return the (read-only!) merged templates of the class with the given name.
+        now = time.time()
+        entry = cls._registry.get(clsname)
+        lastcheck = cls._checked.get(clsname, 0.0)
+        if entry is not None and now - lastcheck < cls._checkinterval:
+            return entry[1]
+        signature = []
+        for directory in cls._directories:
+            path = os.path.join(directory, "{}_templates.json".format(clsname))
+            try:
+                signature.append((path, os.stat(path).st_mtime))
+            except OSError:
+                continue
+        signature = tuple(signature)
+        if entry is None or entry[0] != signature:
+            entry = (signature, cls._load([path for path, _ in signature]))
+            cls._registry[clsname] = entry
+        cls._checked[clsname] = now
+        return entry[1]
+
+    @staticmethod
+    def _load(paths):
+        templates = {}
+        for path in paths:
+            with open(path) as jsonfile:
+                for name, props in json.load(jsonfile).items():
+                    templates.setdefault(name, {}).update(props)
+        merged = {}
+        for name, props in templates.items():
+            merged[name] = dict(templates.get("common", {}))
+            merged[name].update(props)
+        return merged
+
+    @staticmethod
+    def Copy(value):
+        # Copy a template (nested lists and dicts are copied as well).
+        if isinstance(value, dict):
+            return {k: TemplateRegistry.Copy(v) for k, v in value.items()}
+        elif isinstance(value, list):
+            return [TemplateRegistry.Copy(v) for v in value]
+        return value
 
 
 class UsingProperties(object):
+    # Context manager temporarily applying properties to an object. Only the properties
+    # about to be changed (including the ones of a template) are saved beforehand and
+    # restored afterwards, the snapshot is kept here such that contexts can be nested.
     def __init__(self, object, **kwargs):
         self._object = object
-        self._object.CacheProperties()
         self._tmpproperties = kwargs
+        properties = [k for k in kwargs if k != "template"]
+        if kwargs.get("template"):
+            properties += list(object.GetTemplate(kwargs["template"]).keys())
+        self._snapshot = object.SnapshotProperties(*properties) if properties else {}
 
     def __enter__(self):
-        self._object.DeclareProperties(**self._tmpproperties)
+        if self._tmpproperties:
+            self._object.DeclareProperties(**self._tmpproperties)
 
     def __exit__(self, *args):
-        self._object.ResetProperties()
+        self._object.RestoreProperties(self._snapshot)
@@ -6,15 +6,23 @@ import ROOT
 
 import os
 
+import numpy as np
+import root_numpy as rnp
+
 from Stack import Stack
 from MethodProxy import *
+from profiler import profiler, Profiled
 from Histo1D import Histo1D
 from CutMarker import CutMarker
 from IOManager import IOManager
 from SensitivityScan import SensitivityScan
-from Helpers import DissectProperties, CheckPath, MergeDicts, SplitCutExpr, clean_str
+from BinningOptimizer import BinningOptimizer
+from Helpers import (
+    DissectProperties, CheckPath, MergeDicts, SplitCutExpr, SplitCuts, clean_str
+)
 
 from uuid import uuid4
+from collections import OrderedDict, defaultdict
 
 
 @PreloadProperties
@@ -41,24 +49,14 @@ class N1Plotter(MethodProxy):
         self.DeclareProperties(**kwargs)
 
     def SetCuts(self, *cuts):
-        tmpcutlist = []
-        if isinstance(cuts, str):
-            cuts = cuts.split("&&")
-        elif not isinstance(cuts, (list, tuple)):
-            raise TypeError
-        for cutexpr in cuts:
-            tmpcutlist += cutexpr.split("&&")
-        self._cuts = []
+        self._cuts = SplitCuts(*cuts)
         self._drawcuts = []
-        for cutexpr in tmpcutlist:
+        for cutexpr in self._cuts:
             if not "||" in cutexpr:
-                if cutexpr.startswith("(") and cutexpr.endswith(")"):
-                    cutexpr = cutexpr[1:-1]
                 splt = SplitCutExpr(cutexpr)
                 self._drawcuts.append(
                     (splt["varexp"], splt["comparator"], splt["value"])
                 )
-            self._cuts.append(cutexpr)
 
     def GetCuts(self):
         return self._cuts
@@ -119,8 +117,26 @@ class N1Plotter(MethodProxy):
             (infile, MergeDicts(Histo1D.GetTemplate(template), kwargs))
         )
 
-    def CreateHistograms(self):
-        factories = {}
+    @Profiled("N1Plotter.CreateHistograms")
+    def CreateHistograms(self, batchsize=int(1e5)):
+        # Create and fill all N-1 histograms. Each cut is evaluated only once per event
+        # into a bit of a pass mask from which all N-1 selections are derived, such that
+        # all histograms of all samples sharing the same tree are filled in one pass.
+        cutexprs = ["({})".format(cut) for cut in self._cuts]
+        fullmask = (1 << len(cutexprs)) - 1
+        requiredmasks = OrderedDict()  # bits required to pass for each N-1 selection
+        reducedcuts = {}
+        for varexp, comparator, cutvalue in self._drawcuts:
+            if not varexp in self._binning:
+                logger.warning(
+                    "No binning defined for varexp '{}'. Skipping...".format(varexp)
+                )
+                continue
+            cutexpr = "".join([varexp, comparator, cutvalue])
+            bits = sum([1 << bit for bit, c in enumerate(self._cuts) if c == cutexpr])
+            requiredmasks[varexp, cutvalue] = np.uint64(fullmask & ~bits)
+            reducedcuts[varexp, cutvalue] = [c for c in self._cuts if c != cutexpr]
+        samples = defaultdict(list)
         for histotype, configs in self._configs.items():
             self._store[histotype] = {}
             for i, (infile, config) in enumerate(configs):
@@ -128,40 +144,81 @@ class N1Plotter(MethodProxy):
                 config = DissectProperties(
                     config, [Histo1D, {"Fill": ["tree", "cuts", "weight"]}]
                 )
-                tree = config["Fill"]["tree"]
-                if not (infile, tree) in factories.keys():
-                    factories[infile, tree] = IOManager.Factory(infile, tree)
-                for varexp, comparator, cutvalue in self._drawcuts:
-                    if not varexp in self._binning:
-                        logger.warning(
-                            "No binning defined for varexp '{}'. "
-                            "Skipping...".format(varexp)
-                        )
-                        continue
-                    reducedcuts = list(
-                        filter(
-                            lambda x: x != "".join([varexp, comparator, cutvalue]),
-                            self._cuts,
-                        )
-                    )
-                    self._store[histotype][i][varexp, cutvalue] = Histo1D(
+                selection = list(config["Fill"].get("cuts", [])) + self._preselection
+                weight = config["Fill"].get("weight", "1")
+                for varexp, cutvalue in requiredmasks.keys():
+                    histo = Histo1D(
                         "N1_{}".format(uuid4().hex[:8]),
                         "",
                         self._binning[varexp],
+                        lightweight=True,
                         **config["Histo1D"]
                     )
-                    factories[infile, tree].Register(
-                        self._store[histotype][i][varexp, cutvalue],
-                        varexp=varexp,
-                        weight=config["Fill"].get("weight", "1"),
-                        cuts=list(
-                            config["Fill"].get("cuts", [])
-                            + reducedcuts
-                            + self._preselection
-                        ),
-                    )
-        for factory in factories.values():
-            factory.Run()
+                    # Save metadata to Histo1D (as done by IOManager.Factory):
+                    histo._varexp = varexp
+                    histo._cuts = selection + reducedcuts[varexp, cutvalue]
+                    histo._weight = weight
+                    self._store[histotype][i][varexp, cutvalue] = histo
+                selexpr = "&&".join(["({})".format(cut) for cut in selection])
+                samples[infile, config["Fill"]["tree"]].append(
+                    (self._store[histotype][i], selexpr, "({})".format(weight))
+                )
+        for (infile, tree), tasks in samples.items():
+            branches = list(cutexprs) + [varexp for varexp, _ in requiredmasks.keys()]
+            for histos, selexpr, weightexpr in tasks:
+                branches += [weightexpr, selexpr] if selexpr else [weightexpr]
+            branches = list(OrderedDict.fromkeys(branches))  # remove duplicates
+            for array in IOManager._readBatches(infile, tree, branches, batchsize):
+                mask = IOManager._computeCutMask(array, cutexprs)
+                passed = {
+                    key: (mask & required) == required
+                    for key, required in requiredmasks.items()
+                }
+                with profiler.Span("fill", nhistos=len(tasks) * len(requiredmasks)):
+                    for histos, selexpr, weightexpr in tasks:
+                        weights = array[weightexpr]
+                        selected = weights != 0
+                        if selexpr:
+                            selected &= array[selexpr] != 0
+                        for (varexp, cutvalue), histo in histos.items():
+                            idx = selected & passed[varexp, cutvalue]
+                            rnp.fill_hist(
+                                histo, array[varexp][idx], weights=weights[idx]
+                            )
+            logger.info(
+                "Filled {} N-1 histograms using tree '{}' in file '{}'.".format(
+                    len(tasks) * len(requiredmasks), tree, infile
+                )
+            )
+
+    def OptimizeBinnings(self, **kwargs):
+        # Merge the bins of the N-1 histograms of each variable into the binning found
+        # by a BinningOptimizer (see there for the keyword arguments) for the summed
+        # signal and background histograms. Thus, the histograms only need to be
+        # filled once with a fine binning. Without any signal, only the constraints on
+        # the background are applied.
+        def total(histos):
+            expression = histos[0].Lazy()
+            for histo in histos[1:]:
+                expression += histo
+            return expression.Materialize()
+
+        if not self._store.get("signal"):
+            kwargs.setdefault("objective", "nbins")
+        for key in self._store.get("background", {}).get(0, {}).keys():
+            histos = {
+                histotype: [samples[i][key] for i in sorted(samples.keys())]
+                for histotype, samples in self._store.items()
+            }
+            bkghisto = total(histos["background"])
+            sighisto = total(histos["signal"]) if histos.get("signal") else bkghisto
+            optimizer = BinningOptimizer(sighisto, bkghisto, **kwargs)
+            optimizer.Apply(*[h for hlist in histos.values() for h in hlist])
+            logger.info(
+                "Optimized binning for varexp '{}' (cut value {}): {}".format(
+                    key[0], key[1], optimizer.GetEdges()
+                )
+            )
 
     def SetOutputFormat(self, pattern):
         fields = re.findall(r"{(.*?)}", pattern)
@@ -187,11 +244,18 @@ class N1Plotter(MethodProxy):
         return outputfilename
 
     @CheckPath(mode="w")
+    @Profiled("N1Plotter.Print")
     def Print(self, outputdir, **kwargs):
         # TODO: Use actual signal and background histograms for the SensitivityScan as
         # defined in Register instead of what is 'guessed' by Stack.Print.
         kwargs.setdefault("sensitivity", True)
+        optimizebinning = kwargs.pop("optimizebinning", None)
         self.CreateHistograms()
+        if optimizebinning:
+            # Either True or the keyword arguments of the BinningOptimizer:
+            self.OptimizeBinnings(
+                **(optimizebinning if isinstance(optimizebinning, dict) else {})
+            )
         for varexp, comparator, cutvalue in self._drawcuts:
             if not varexp in self._binning:
                 continue
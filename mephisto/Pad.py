@@ -9,7 +9,10 @@ import re
 from MethodProxy import *
 from Helpers import DissectProperties
 
+_missing = object()  # sentinel for properties which have not been declared
 
+
+@PropertyHook
 def ExtendMethods(cls):
     # Add dedicated methods (+ their associated properties) for each axis of the frame.
     # The axis name is added to the beginning of the property name, e.g. 'xlabelfont'
@@ -84,7 +87,15 @@ class Pad(MethodProxy, ROOT.TPad):
         "ystat",
     ]
 
+    # Properties which are declared again whenever the pad is reconfigured:
+    _alwaysdeclared = [
+        "xtitle", "ytitle", "xunits", "yunits", "xmin", "xmax", "ymin", "ymax"
+    ]
+
     def __init__(self, name="undefined", *args, **kwargs):
+        # Only pads created with reusable=True record the initial values of their
+        # properties, such that they can be reconfigured for another plot.
+        self._reusable = kwargs.pop("reusable", False)
         MethodProxy.__init__(self)
         self._frame = None
         self._drawframe = False
@@ -109,11 +120,45 @@ class Pad(MethodProxy, ROOT.TPad):
             )
             ROOT.TPad.__init__(self)
             self.SetName(name)
-        self.SetTitle(";;")
+        self._configured = False
+        self._defaults = {}  # initial values of all properties declared so far
+        self._declared = {}  # properties declared by the last call of Configure
+        self.Configure(**kwargs)
+
+    def Configure(self, **kwargs):
+        # (Re)configure the pad with the given properties and draw it (including its
+        # frame) to the current pad. Allows to reuse the pad for multiple plots: all
+        # primitives are removed and only properties which changed since the previous
+        # call are declared again, properties no longer given are reset to their initial
+        # values (only for reusable pads). The axis titles and the frame range are
+        # always declared again.
         properties = DissectProperties(kwargs, [{"Frame": self._frameproperties}, Pad])
+        padproperties = properties["Pad"]
+        if self._configured:
+            self.Clear()
+            self._frame = None
+            self._xmin = self._ymin = 1e-2
+            self._xmax = self._ymax = 1.0
+            self._xunits, self._yunits = None, None
+            for prop in self._declared.keys():
+                if prop not in padproperties and self._defaults.get(prop) is not None:
+                    self.DeclareProperty(prop, self._defaults[prop])
+        self.SetTitle(";;")
+        if self._reusable:
+            for prop in padproperties.keys():
+                if prop not in self._defaults and prop in self._properties:
+                    self._defaults[prop] = self.GetProperty(prop)
         self.Draw()
-        self.DeclareProperty("padposition", properties["Pad"].pop("padposition"))
-        self.DeclareProperties(**properties["Pad"])
+        self.DeclareProperty("padposition", padproperties.pop("padposition"))
+        self.DeclareProperties(
+            **{
+                k: v
+                for k, v in padproperties.items()
+                if k in self._alwaysdeclared or self._declared.get(k, _missing) != v
+            }
+        )
+        self._declared = padproperties
+        self._configured = True
         self.Draw()
         self.cd()
         if self._drawframe:
@@ -4,6 +4,8 @@ from __future__ import print_function
 
 import ROOT
 
+import atexit
+
 from uuid import uuid4
 from collections import defaultdict
 
@@ -12,7 +14,15 @@ from Text import Text
 from Legend import Legend
 from Canvas import Canvas
 from MethodProxy import *
-from Helpers import CheckPath, DissectProperties, MephistofyObject, MergeDicts
+from profiler import profiler, Profiled
+from Helpers import (
+    CheckPath,
+    DissectProperties,
+    Fingerprint,
+    FingerprintIndex,
+    MephistofyObject,
+    MergeDicts,
+)
 
 
 @PreloadProperties
@@ -23,6 +33,17 @@ class Plot(MethodProxy):
     :class:`.Pad` onto a :class:`.Canvas`.
     """
 
+    # Keyword arguments of Print which are not properties:
+    _printoptions = ["extensions", "force", "multipage", "reuse", "skipunchanged"]
+
+    # Multi-page PDF files which have been opened but not yet closed (with the number of
+    # pages printed to them so far):
+    _multipagepdfs = {}
+
+    # Canvases (and their pads) kept for reuse, keyed by the number of pads, the style
+    # and the canvas properties:
+    _canvaspool = defaultdict(list)
+
     def __init__(self, name=None, **kwargs):
         r"""Initialize a plot.
 
@@ -159,13 +180,16 @@ class Plot(MethodProxy):
         # Return the global plotting style.
         return self._style
 
-    @CheckPath(mode="w")
+    @CheckPath(mode="w", printoptions=True)
+    @Profiled("Plot.Print")
     def Print(self, path, **kwargs):
         r"""Print the plot to a file.
 
         Creates a :class:`.Canvas` and draws all registered objects into their
         associated :class:`Pad`. The canvas is saved as a PDF/PNG/... file with the
-        absolute path defined by **path**. If a file with the same name already exists
+        absolute path defined by **path**. The plot is drawn only once, even if it is
+        saved to multiple files given as a list of paths and/or via the **extensions**
+        keyword argument. If a file with the same name already exists
         it will be overwritten (can be changed  with the **overwrite** keyword
         argument). If **mkdir** is set to ``True`` (default: ``False``) directories in
         **path** with do not yet exist will be created automatically.
@@ -173,8 +197,9 @@ class Plot(MethodProxy):
         The properties of the of the plot and canvas can be configured via their
         respective properties passed as keyword arguments.
 
-        :param path: path of the output file (must end with '.pdf', '.png', ...)
-        :type path: ``str``
+        :param path: path (or list of paths) of the output file(s) (must end with
+            '.pdf', '.png', '.root', '.C', ...)
+        :type path: ``str``, ``list``
 
         :param \**kwargs: :class:`.Plot` and :class:`.Canvas` properties + additional
             properties (see below)
@@ -193,7 +218,37 @@ class Plot(MethodProxy):
             * **mkdir** (``bool``) -- create non-existing directories in **path**
               (default: ``False``)
 
+            * **reuse** (``bool``) -- take the canvas and pads from a pool of previously
+              printed plots with the same number of pads, style and canvas properties
+              instead of creating new ones (default: ``False``)
+
+            * **extensions** (``list``) -- save the plot additionally to files with the
+              same path(s) but the given extensions, e.g. \['pdf', 'png', 'root'\]
+              (default: \[\])
+
+            * **multipage** (``bool``) -- append the plot as a new page to the PDF
+              file(s) instead of overwriting it, the file is opened with the first page
+              and needs to be closed with :func:`Plot.CloseMultiPagePDF` (which is done
+              automatically at exit); only one multi-page PDF file can be open at a time
+              (default: ``False``)
+
+            * **skipunchanged** (``bool``) -- skip drawing and saving the plot if the
+              output file(s) already exist, have not been modified since and were
+              created from the same objects (bin contents, points, properties), pad,
+              plot and canvas properties; the fingerprints of the files are kept in a
+              hidden index file in the output directory (default: ``False``)
+
+            * **force** (``bool``) -- draw and save the plot even if it is unchanged
+              when using **skipunchanged**, its fingerprint is still recorded (default:
+              ``False``)
+
         """
+        reuse = kwargs.pop("reuse", False)
+        multipage = kwargs.pop("multipage", False)
+        force = kwargs.pop("force", False)
+        skipunchanged = kwargs.pop("skipunchanged", False)
+        # The paths given via the 'extensions' are already included (see CheckPath):
+        paths = list(path) if isinstance(path, (list, tuple)) else [path]
         for idx, injections in {
             int(k[6:]) if len(k) > 6 else 0: kwargs.pop(k)
             for k in dict(kwargs.items())
@@ -205,39 +260,143 @@ class Plot(MethodProxy):
         properties = DissectProperties(kwargs, [Plot, Canvas])
         ROOT.gStyle.SetOptStat(0)
         ROOT.gStyle.SetPaintTextFormat("4.2f")
-        canvas = Canvas(
-            "{}_Canvas".format(self._name),
-            template=str(self._npads),
-            **properties["Canvas"]
+        self.DeclareProperties(**properties["Plot"])
+        fingerprint = None
+        if skipunchanged and not multipage:
+            with profiler.Span("fingerprint"):
+                fingerprint = Fingerprint(
+                    self.GetProperties(),
+                    properties["Canvas"],
+                    self._padproperties,
+                    self._store,
+                )
+                uptodate = not force and all(
+                    [
+                        FingerprintIndex(os.path.dirname(p)).IsUpToDate(p, fingerprint)
+                        for p in paths
+                    ]
+                )
+            if uptodate:
+                for outpath in paths:
+                    logger.info("Skipped unchanged plot: '{}'".format(outpath))
+                profiler.Count("plots.skipped")
+                return
+        poolkey = (
+            self._npads,
+            self._style,
+            repr(sorted(properties["Canvas"].items())),
         )
+        if reuse and Plot._canvaspool[poolkey]:
+            canvas, pads = Plot._canvaspool[poolkey].pop()
+            canvas.cd()
+        else:
+            canvas = Canvas(
+                "{}_Canvas".format(self._name),
+                template=str(self._npads),
+                **properties["Canvas"]
+            )
+            pads = {}
         legend = {}
-        self.DeclareProperties(**properties["Plot"])
         self.AddPlotDecorations()
         for i, store in self._store.items():
-            pad = Pad("{}_Pad-{}".format(canvas.GetName(), i), **self._padproperties[i])
-            pad.Draw()
-            pad.cd()
-            legend[i] = Legend(
-                "{}_Legend".format(pad.GetName()),
-                xshift=pad.GetLegendXShift(),
-                yshift=pad.GetLegendYShift(),
-            )
-            canvas.SetSelectedPad(pad)
-            for obj, objprops in store:
-                with UsingProperties(obj, **objprops):
-                    if any([obj.InheritsFrom(tcls) for tcls in ["TH1", "THStack"]]):
-                        legend[i].Register(obj)
-                    suffix = "SAME" if pad.GetDrawFrame() else ""
-                    obj.Draw(obj.GetDrawOption() + suffix)
-            if pad.GetDrawFrame():
-                pad.RedrawAxis()
-            if pad.GetDrawLegend():
-                legend[i].Draw("SAME")
+            with profiler.Span("frame", pad=i):
+                if i in pads:
+                    pad = pads[i]
+                    pad.Configure(**self._padproperties[i])
+                else:
+                    pad = Pad(
+                        "{}_Pad-{}".format(canvas.GetName(), i),
+                        reusable=reuse,
+                        **self._padproperties[i]
+                    )
+                    pads[i] = pad
+                pad.Draw()
+                pad.cd()
+                legend[i] = Legend(
+                    "{}_Legend".format(pad.GetName()),
+                    xshift=pad.GetLegendXShift(),
+                    yshift=pad.GetLegendYShift(),
+                )
+                canvas.SetSelectedPad(pad)
+            with profiler.Span("draw", pad=i, nobjects=len(store)):
+                for obj, objprops in store:
+                    with UsingProperties(obj, **objprops):
+                        if any(
+                            [obj.InheritsFrom(tcls) for tcls in ["TH1", "THStack"]]
+                        ):
+                            legend[i].Register(obj)
+                        suffix = "SAME" if pad.GetDrawFrame() else ""
+                        obj.Draw(obj.GetDrawOption() + suffix)
+                if pad.GetDrawFrame():
+                    pad.RedrawAxis()
+                if pad.GetDrawLegend():
+                    legend[i].Draw("SAME")
             canvas.cd()
-        canvas.Print(path)
-        if os.path.isfile(path):
-            logger.info("Created plot: '{}'".format(path))
-        canvas.Delete()
+        profiler.Count("plots.printed")
+        for outpath in paths:
+            if multipage and outpath.endswith(".pdf"):
+                if outpath not in Plot._multipagepdfs:
+                    Plot.CloseMultiPagePDF()
+                    canvas.Print("{}[".format(outpath))
+                    Plot._multipagepdfs[outpath] = 0
+                with profiler.Span("save", path=outpath):
+                    canvas.Print(outpath)
+                Plot._multipagepdfs[outpath] += 1
+                logger.info(
+                    "Added page {} to plot: '{}'".format(
+                        Plot._multipagepdfs[outpath], outpath
+                    )
+                )
+                continue
+            with profiler.Span("save", path=outpath):
+                canvas.Print(outpath)
+            if os.path.isfile(outpath):
+                logger.info("Created plot: '{}'".format(outpath))
+                if fingerprint is not None:
+                    FingerprintIndex(os.path.dirname(outpath)).Update(
+                        outpath, fingerprint
+                    )
+        if reuse:
+            # Detach all drawn objects (deleting only the ones owned by ROOT, e.g. the
+            # pad frames) before putting the canvas back into the pool:
+            for pad in pads.values():
+                pad.Clear()
+            canvas.Clear()
+            Plot._canvaspool[poolkey].append((canvas, pads))
+        else:
+            canvas.Delete()
+
+    @staticmethod
+    def CloseMultiPagePDF(path=None):
+        r"""Close a multi-page PDF file opened by :func:`~Plot.Print`.
+
+        :param path: path of the PDF file (default: ``None``: close all open files)
+        :type path: ``str``
+        """
+        paths = list(Plot._multipagepdfs.keys()) if path is None else [path]
+        for path in paths:
+            path = os.path.abspath(path)
+            if path not in Plot._multipagepdfs:
+                logger.warning("No open multi-page PDF file '{}'!".format(path))
+                continue
+            canvas = ROOT.TCanvas("{}_CloseMultiPagePDF".format(uuid4().hex[:8]))
+            canvas.Print("{}]".format(path))
+            canvas.Close()
+            logger.info(
+                "Closed plot: '{}' ({} pages)".format(
+                    path, Plot._multipagepdfs.pop(path)
+                )
+            )
+
+    @staticmethod
+    def ClearCanvasPool():
+        r"""Delete all canvases (and their pads) kept for reuse by
+        :func:`~Plot.Print`.
+        """
+        for entries in Plot._canvaspool.values():
+            for canvas, pads in entries:
+                canvas.Delete()
+        Plot._canvaspool.clear()
 
     def Inject(self, pad=0, *args):
         r"""Inject a (list of) *drawable* object(s) to the pad with index **pad**.
@@ -388,6 +547,8 @@ class Plot(MethodProxy):
             )
 
 
+atexit.register(Plot.CloseMultiPagePDF)  # close all open multi-page PDF files
+
 if __name__ == "__main__":
 
     from Histo1D import Histo1D
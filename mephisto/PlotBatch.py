@@ -0,0 +1,206 @@
+#!/usr/bin/env python2.7
+
+from __future__ import print_function
+
+import ROOT
+
+import os
+import time
+import signal
+import traceback
+import multiprocessing
+
+from Plot import Plot
+from logger import logger
+
+# Jobs of the batch which is currently being run. The worker processes inherit this list
+# when they are forked, hence only the job indices need to be sent to them.
+_jobs = []
+
+# Process id of the worker and start time of each job of the batch, written by the
+# workers to shared memory as soon as they start a job (see PlotBatch.Run).
+_pids = None
+_starttimes = None
+
+
+def _initWorker():
+    # Initialize ROOT once for each worker process.
+    ROOT.gROOT.SetBatch(True)
+
+
+def _runJob(idx):
+    # Print the object of the job with the given index and return a summary. Multi-page
+    # PDF files are closed at the end of each job, as the exit handler of the Plot
+    # class is not run by the worker processes.
+    obj, path, kwargs = _jobs[idx]
+    result = {"index": idx, "path": path, "success": True, "error": None}
+    start = time.time()
+    if _pids is not None:
+        _starttimes[idx] = start
+        _pids[idx] = os.getpid()
+    try:
+        obj.Print(path, **kwargs)
+        paths = path if isinstance(path, (list, tuple)) else [path]
+        if not all([os.path.isfile(os.path.abspath(p)) for p in paths]):
+            result["success"] = False
+            result["error"] = "No output file has been created!"
+    except Exception:
+        result["success"] = False
+        result["error"] = traceback.format_exc()
+    finally:
+        Plot.CloseMultiPagePDF()
+    result["time"] = time.time() - start
+    return result
+
+
+def _failedJob(idx, error):
+    # Return the summary of a job whose worker process did not return any.
+    return {
+        "index": idx,
+        "path": _jobs[idx][1],
+        "success": False,
+        "error": error,
+        "time": time.time() - _starttimes[idx],
+    }
+
+
+def _collectResults(pool, timeout=None):
+    # Submit all jobs to the pool and collect their results. Jobs whose worker process
+    # died (e.g. due to a segmentation fault in ROOT) or which take longer than timeout
+    # seconds (their worker is killed) are recorded as failed. A dead worker is only
+    # blamed for the last job it started, as the results of its previous jobs may still
+    # be on their way.
+    pending = {idx: pool.apply_async(_runJob, (idx,)) for idx in range(len(_jobs))}
+    results = []
+    while pending:
+        alive = set([p.pid for p in multiprocessing.active_children()])
+        lastjob = {}
+        for idx in range(len(_jobs)):
+            if _pids[idx] and _starttimes[idx] >= lastjob.get(_pids[idx], (-1, 0))[1]:
+                lastjob[_pids[idx]] = (idx, _starttimes[idx])
+        for idx, asyncresult in list(pending.items()):
+            if asyncresult.ready():
+                result = asyncresult.get()
+            elif not _pids[idx] or lastjob[_pids[idx]][0] != idx:
+                continue
+            elif _pids[idx] not in alive:
+                result = _failedJob(
+                    idx, "Worker process {} died unexpectedly!".format(_pids[idx])
+                )
+            elif timeout is not None and time.time() - _starttimes[idx] > timeout:
+                os.kill(_pids[idx], signal.SIGKILL)
+                result = _failedJob(idx, "Timed out after {} s!".format(timeout))
+            else:
+                continue
+            results.append(result)
+            del pending[idx]
+        if pending:
+            time.sleep(0.05)
+    return results
+
+
+class PlotBatch(object):
+    r"""Class for printing many plots in parallel.
+
+    Collects printable objects (e.g. :class:`.Plot`, :class:`.Stack`,
+    :class:`.Histo1D`, ...) together with their output paths and print options and
+    prints them using a pool of worker processes, each of which initializes
+    :py:mod:`ROOT` only once. The worker processes are forked from the current process,
+    thus the registered objects are available to them without being serialized.
+    """
+
+    def __init__(self, nworkers=None):
+        r"""Initialize a batch of plots.
+
+        :param nworkers: number of worker processes (default: number of CPUs), for
+            ``1`` the plots are printed in the current process
+        :type nworkers: ``int``
+        """
+        self._nworkers = nworkers or multiprocessing.cpu_count()
+        self._jobs = []
+
+    def Register(self, obj, path, **kwargs):
+        r"""Register an object to be printed to **path**.
+
+        :param obj: object providing a ``Print`` method, e.g. ``Plot``, ``Stack``,
+            ``Histo1D``, ``Histo2D``, ``Graph``
+        :type obj: ``MethodProxy``
+
+        :param path: path (or list of paths) of the output file(s) (must end with
+            '.pdf', '.png', ...)
+        :type path: ``str``, ``list``
+
+        :param \**kwargs: keyword arguments passed to the ``Print`` method of **obj**
+        """
+        self._jobs.append((obj, path, kwargs))
+
+    def GetNJobs(self):
+        r"""Return the number of registered plots.
+
+        :returntype: ``int``
+        """
+        return len(self._jobs)
+
+    def Run(self, timeout=None):
+        r"""Print all registered plots.
+
+        Failures are logged and do not stop the remaining plots from being printed,
+        this includes plots whose worker process crashed (e.g. due to a segmentation
+        fault). The results are returned as a list of dictionaries (one per plot, in the
+        order of registration) with the keys **index**, **path**, **success**
+        (``bool``), **error** (traceback, error message or ``None``) and **time** (in
+        seconds). Multi-page PDF files are closed after each plot, i.e. each plot is
+        printed to a separate multi-page PDF file.
+
+        :param timeout: maximal time in seconds for printing a single plot, after which
+            its worker process is killed and the plot is recorded as failed (default:
+            ``None``: no limit, ignored if the plots are printed in the current process)
+        :type timeout: ``float``
+
+        :returntype: ``list``
+        """
+        global _jobs, _pids, _starttimes
+        _jobs = self._jobs
+        nworkers = min(self._nworkers, len(self._jobs))
+        try:
+            if nworkers <= 1:
+                results = [_runJob(idx) for idx in range(len(_jobs))]
+            else:
+                _pids = multiprocessing.RawArray("l", len(_jobs))
+                _starttimes = multiprocessing.RawArray("d", len(_jobs))
+                pool = multiprocessing.Pool(nworkers, initializer=_initWorker)
+                try:
+                    results = _collectResults(pool, timeout)
+                finally:
+                    # The jobs of crashed workers are never finished, hence the pool
+                    # could not be closed regularly (all other jobs are done anyway):
+                    pool.terminate()
+                    pool.join()
+        finally:
+            _jobs = []
+            _pids = _starttimes = None
+        results.sort(key=lambda r: r["index"])
+        for result in results:
+            if not result["success"]:
+                logger.error(
+                    "Failed to print '{}':\n{}".format(result["path"], result["error"])
+                )
+        logger.info(
+            "Printed {} of {} plots using {} worker(s).".format(
+                sum([r["success"] for r in results]), len(results), max(nworkers, 1)
+            )
+        )
+        return results
+
+
+if __name__ == "__main__":
+
+    from Histo1D import Histo1D
+
+    batch = PlotBatch(nworkers=4)
+    for i in range(20):
+        h = Histo1D("h{}".format(i), "Histogram {}".format(i), 20, -5.0, 5.0)
+        h.FillRandom("gaus", 1000 * (i + 1))
+        batch.Register(h, "plotbatch/test_plotbatch_{}.pdf".format(i), mkdir=True)
+    for result in batch.Run():
+        print(result["path"], result["success"], "{:.2f}s".format(result["time"]))
@@ -4,15 +4,19 @@ from __future__ import print_function
 
 import ROOT
 
+import numpy as np
+
 from uuid import uuid4
 
 from Line import Line
 from Arrow import Arrow
 from Histo1D import Histo1D
 from MethodProxy import *
+from IOManager import IOManager
 from Helpers import DissectProperties, MergeDicts, IsInherited
 
 
+@PropertyHook
 def ExtendProperties(cls):
     # Add properties to configure the _baseline histogram of RatioPlots and add new
     # properties and methods manually since RatioPlot does not inherit from MethodProxy
@@ -70,24 +74,9 @@ class RatioPlot(MethodProxy):
             self._numeratorhistos = []
             for i, histo in enumerate(numerator, start=1):
                 assert histo.InheritsFrom("TH1")
-                numname = histo.GetName()
-                numerator = Histo1D(
-                    "{}_RatioPlotNumerator{}".format(denominator.GetName(), i), histo
-                )
-                numerator.Divide(
-                    histo, self._baseline, 1.0, 1.0, kwargs.get("divideoption", "pois")
-                )
-                self._numeratorhistos.append(numerator)
-            for bn in range(self._baseline.GetNbinsX() + 2):
-                try:
-                    self._baseline.SetBinError(
-                        bn,
-                        self._baseline.GetBinError(bn)
-                        / self._baseline.GetBinContent(bn),
-                    )
-                except ZeroDivisionError:
-                    self._baseline.SetBinError(bn, 0.0)
-                self._baseline.SetBinContent(bn, 1.0)
+                name = "{}_RatioPlotNumerator{}".format(denominator.GetName(), i)
+                self._numeratorhistos.append(Histo1D(name, histo))
+            self.BuildRatios(kwargs.pop("divideoption", "pois"))
         elif (
             denominator.InheritsFrom("TFitResult")
             or denominator == 0
@@ -101,6 +90,44 @@ class RatioPlot(MethodProxy):
         self._numeratordrawoption = ""
         self.DeclareProperties(**kwargs)
 
+    def BuildRatios(self, option="pois"):
+        # Compute the ratios of all numerator histograms with respect to the baseline
+        # as one array operation over the bin contents and errors. The errors are
+        # propagated as done by TH1::Divide, i.e. binomial errors if the option contains
+        # 'B' and uncorrelated Gaussian error propagation otherwise (the default 'pois'
+        # option is not known to TH1::Divide and is treated as the latter). Afterwards
+        # the baseline is normalized to unity and its errors are made relative.
+        den = IOManager._getBinContents(self._baseline)
+        densumw2 = IOManager._getBinSumw2(self._baseline)
+        num = np.vstack([IOManager._getBinContents(h) for h in self._numeratorhistos])
+        numsumw2 = np.vstack(
+            [IOManager._getBinSumw2(h) for h in self._numeratorhistos]
+        )
+        nonzero = np.broadcast_to(den != 0, num.shape)
+        ratios = np.zeros_like(num)
+        np.divide(num, den, out=ratios, where=nonzero)
+        sumw2 = np.zeros_like(num)
+        if "b" in option.lower():
+            np.divide(
+                np.abs((1.0 - 2.0 * ratios) * numsumw2 + ratios ** 2 * densumw2),
+                den ** 2,
+                out=sumw2,
+                where=nonzero,
+            )
+            sumw2[num == den] = 0.0
+        else:
+            np.divide(
+                numsumw2 * den ** 2 + densumw2 * num ** 2,
+                den ** 4,
+                out=sumw2,
+                where=nonzero,
+            )
+        for histo, ratio, ratiosumw2 in zip(self._numeratorhistos, ratios, sumw2):
+            IOManager._setBinContents(histo, ratio, ratiosumw2)
+        relerrors = np.zeros_like(den)
+        np.divide(np.sqrt(densumw2), den, out=relerrors, where=den != 0)
+        IOManager._setBinContents(self._baseline, np.ones_like(den), relerrors ** 2)
+
     def Draw(self, option=None):
         # Draw the baseline, its errorband, the numerator histograms and 'out-of-range'
         # arrows. The specified draw option will be used for all numerator histograms.
@@ -177,36 +204,29 @@ class RatioPlot(MethodProxy):
 
     def DrawArrows(self, **kwargs):
         # Draw the 'out-of-range' arrows for ratio value outside the given y-axis range.
+        # The ratios are read from the numerator histograms as they are drawn.
         currentpad = ROOT.gPad
         if not currentpad:
             return
         ymax = currentpad.GetUymax()
         ymin = currentpad.GetUymin()
+        edges = np.asarray(self._baseline._lowbinedges)
+        bincenters = 0.5 * (edges[:-1] + edges[1:])
+        ratios = np.vstack(
+            [IOManager._getBinContents(h)[1:-1] for h in self._numeratorhistos]
+        )  # without under- and overflow bins
+        filled = np.any(ratios != 0, axis=0)
+        above = filled & (ratios.max(axis=0) > ymax)
+        below = filled & ~above & (ratios.min(axis=0) < ymin)
         self._arrows = []
-        for bn in range(1, self._baseline.GetNbinsX() + 1, 1):
-            bnclist = [h.GetBinContent(bn) for h in self._numeratorhistos]
-            if all([bnc == 0 for bnc in bnclist]):
-                continue
-            if max(bnclist) > ymax:
-                self._arrows.append(
-                    Arrow(
-                        self._baseline.GetXaxis().GetBinCenter(bn),
-                        ymax - (ymax - ymin) * 0.03,
-                        self._baseline.GetXaxis().GetBinCenter(bn),
-                        ymax - (ymax - ymin) * 0.15,
-                        arrowsize=0.01,
-                    )
-                )
-            elif min(bnclist) < ymin:
-                self._arrows.append(
-                    Arrow(
-                        self._baseline.GetXaxis().GetBinCenter(bn),
-                        ymin + (ymax - ymin) * 0.03,
-                        self._baseline.GetXaxis().GetBinCenter(bn),
-                        ymin + (ymax - ymin) * 0.17,
-                        arrowsize=0.01,
-                    )
-                )
+        for bn in np.flatnonzero(above | below):
+            if above[bn]:
+                y1, y2 = ymax - (ymax - ymin) * 0.03, ymax - (ymax - ymin) * 0.15
+            else:
+                y1, y2 = ymin + (ymax - ymin) * 0.03, ymin + (ymax - ymin) * 0.17
+            self._arrows.append(
+                Arrow(bincenters[bn], y1, bincenters[bn], y2, arrowsize=0.01)
+            )
         for arrow in self._arrows:
             arrow.Draw()
 
@@ -42,7 +42,6 @@ class SensitivityScan(MethodProxy):
 
         :param \**kwargs: :class:`.SensitivityScan` properties
         """
-        self._loadTemplates()
         self._name = "SensitivityScan_{}".format(uuid4().hex[:8])
         self._direction = None
         self._bkghisto = bkghisto
@@ -4,6 +4,10 @@ from __future__ import print_function
 
 import ROOT
 
+import json
+
+import numpy as np
+
 from uuid import uuid4
 from distutils.spawn import find_executable
 
@@ -11,10 +15,13 @@ from Pad import Pad
 from Plot import Plot
 from Canvas import Canvas
 from MethodProxy import *
+from profiler import profiler, Profiled
 from Histo1D import Histo1D
+from IOManager import IOManager
 from Helpers import CheckPath, DissectProperties, MephistofyObject, MergeDicts, TeX2PDF
 
 
+@PropertyHook
 def ExtendProperties(cls):
     # Add properties to configure the _stacksumhisto member histogram of Stacks.
     cls._properties += ["stacksum{}".format(p) for p in Histo1D._properties]  # append!
@@ -87,6 +94,11 @@ class Stack(MethodProxy, ROOT.THStack):
             name = uuid4().hex[:8]
         self._stacksumhisto = None
         self._stacksumproperties = {}
+        self._stacksumcontents = None  # incrementally updated arrays of the stacksum
+        self._stacksumsumw2 = None
+        self._stacksumentries = 0.0
+        self._stacksumoutdated = False  # arrays not yet written to the stacksum histo
+        self._modified = True  # THStack needs to be (re)built
         self._stacksorting = None
         self._drawoption = ""
         self._drawstacksum = False
@@ -101,9 +113,13 @@ class Stack(MethodProxy, ROOT.THStack):
                 self.SetName(name)
                 if args[0].__class__.__name__ == "Stack":
                     if args[0]._stacksumhisto is not None:
+                        args[0].UpdateStackSum()
                         self._stacksumhisto = Histo1D(
                             "{}_stacksum", args[0]._stacksumhisto
                         )
+                        self._stacksumcontents = np.copy(args[0]._stacksumcontents)
+                        self._stacksumsumw2 = np.copy(args[0]._stacksumsumw2)
+                        self._stacksumentries = args[0]._stacksumentries
                     for key, store in args[0]._store.items():
                         for histo in store:
                             self._store[key].append(
@@ -143,9 +159,12 @@ class Stack(MethodProxy, ROOT.THStack):
         # If the property starts with "stacksum" return the associated property of the
         # self._stacksumhisto.
         if property.startswith("stacksum"):
+            if self._stacksumhisto is None:  # no histogram registered yet
+                return None
+            self.UpdateStackSum()
             return self._stacksumhisto.GetProperty(property[8:])
         else:
-            super(Stack, self).GetProperty(property)
+            return super(Stack, self).GetProperty(property)
 
     @MephistofyObject(copy=True)
     def Register(self, histo, **kwargs):
@@ -179,10 +198,101 @@ class Stack(MethodProxy, ROOT.THStack):
             )
             self._stacksumhisto.Reset()
         if stack:
-            self._stacksumhisto.Add(histo)
+            self.AddToStackSum(histo)
+            self._modified = True
         histo.DeclareProperties(**kwargs)
         self._store["stack" if stack else "nostack"].append(histo)
 
+    def Unregister(self, histo):
+        r"""Remove a registered histogram from the stack.
+
+        The stacksum is updated accordingly without rebuilding it from all remaining
+        histograms.
+
+        :param histo: registered histogram or its name (the name of the original
+            histogram passed to :func:`Stack.Register` can be used as well)
+        :type histo: ``Histo1D``, ``TH1D``, ``str``
+        """
+        key, idx = self.LookupHisto(histo)
+        histo = self._store[key].pop(idx)
+        if key == "stack":
+            self.AddToStackSum(histo, -1.0)
+            self._modified = True
+
+    def Rescale(self, histo, scale):
+        r"""Scale a registered histogram by a constant factor.
+
+        The stacksum is updated accordingly without rebuilding it from all registered
+        histograms.
+
+        :param histo: registered histogram or its name (the name of the original
+            histogram passed to :func:`Stack.Register` can be used as well)
+        :type histo: ``Histo1D``, ``TH1D``, ``str``
+
+        :param scale: scale factor
+        :type scale: ``float``
+        """
+        key, idx = self.LookupHisto(histo)
+        histo = self._store[key][idx]
+        if key == "stack":
+            contents = IOManager._getBinContents(histo)
+            sumw2 = IOManager._getBinSumw2(histo)
+            self._stacksumcontents += (scale - 1.0) * contents
+            self._stacksumsumw2 += (scale ** 2 - 1.0) * sumw2
+            self._stacksumoutdated = True
+            self._modified = True
+        histo.Scale(scale)
+
+    def Modified(self):
+        r"""Flag the stack as modified.
+
+        The stack will be sorted and rebuilt the next time it is printed. Needs to be
+        called only if properties of registered histograms relevant for the sorting of
+        the stack have been changed.
+        """
+        self._modified = True
+        super(Stack, self).Modified()
+
+    def LookupHisto(self, histo):
+        # Return the key of the store and the index of the registered histogram which is
+        # either the histo itself, has the same name or is the copy of a histogram with
+        # that name.
+        name = histo if isinstance(histo, str) else histo.GetName()
+        for key, store in self._store.items():
+            for idx, h in enumerate(store):
+                if h is histo:
+                    return key, idx
+        for key, store in self._store.items():
+            for idx, h in enumerate(store):
+                if h.GetName() in [name, "{}_copy".format(name)]:
+                    return key, idx
+        logger.error("No histogram '{}' registered to the stack!".format(name))
+        raise KeyError
+
+    def AddToStackSum(self, histo, scale=1.0):
+        # Add the bin contents and squared weights of the histo (multiplied by scale) to
+        # the stacksum arrays. The stacksum histogram is only updated when needed, see
+        # UpdateStackSum.
+        contents = IOManager._getBinContents(histo)
+        sumw2 = IOManager._getBinSumw2(histo)
+        if self._stacksumcontents is None:
+            self._stacksumcontents = np.zeros_like(contents)
+            self._stacksumsumw2 = np.zeros_like(sumw2)
+        self._stacksumcontents += scale * contents
+        self._stacksumsumw2 += scale ** 2 * sumw2
+        self._stacksumentries += scale * histo.GetEntries()
+        self._stacksumoutdated = True
+
+    def UpdateStackSum(self):
+        # Write the stacksum arrays to the stacksum histogram if they changed.
+        if not self._stacksumoutdated:
+            return
+        IOManager._setBinContents(
+            self._stacksumhisto, self._stacksumcontents, self._stacksumsumw2
+        )
+        self._stacksumhisto.SetEntries(abs(self._stacksumentries))
+        self._stacksumoutdated = False
+
     def SortStack(self):
         # Sort the stack according to self._stacksorting.
         if self._stacksorting is not None:
@@ -206,19 +316,27 @@ class Stack(MethodProxy, ROOT.THStack):
                         raise AttributeError
 
     def BuildStack(self, **kwargs):
-        # Build the actual THStack.
-        if self.GetNhists() != 0:
+        # Build the actual THStack. Sorting and assembling is skipped if nothing changed
+        # since the last build.
+        if self._stacksumhisto is not None:
+            self.UpdateStackSum()
+        if not self._modified:
             return
         if kwargs.get("sort", True):
             self.SortStack()
+        if self.GetHists():
+            self.GetHists().Clear("nodelete")
         for histo in self._store["stack"]:
             self.Add(histo, histo.GetDrawOption())
+        super(Stack, self).Modified()
         self.DeclareProperties(**self._stacksumproperties)
+        self._modified = False
 
     def BuildFrame(self, **kwargs):
         # Return the optimal axis ranges for the stack. Gets called by Plot when the
         # stack is registered to it.
         logy = kwargs.get("logy", False)
+        self.UpdateStackSum()
         frame = {}
         for histo in [self._stacksumhisto] + self._store["nostack"]:
             if not frame:
@@ -248,7 +366,8 @@ class Stack(MethodProxy, ROOT.THStack):
             stack.SetMaximum(ymax / (1 + 0.2 * ROOT.TMath.Log10(ymax / ymin)))
             stack.SetMinimum(ymin * (1 + 0.5 * ROOT.TMath.Log10(ymax / ymin)))
 
-    @CheckPath(mode="w")
+    @CheckPath(mode="w", printoptions=True)
+    @Profiled("Stack.Print")
     def Print(self, path, **kwargs):
         r"""Print the histogram to a file.
 
@@ -295,6 +414,15 @@ class Stack(MethodProxy, ROOT.THStack):
 
             * **mkdir** (``bool``) -- create non-existing directories in **path**
               (default: ``False``)
+
+            * **reuse** (``bool``) -- reuse a pooled canvas, see :func:`Plot.Print`
+              (default: ``False``)
+
+            * **skipunchanged** (``bool``) -- skip printing if the plot and the output
+              file are unchanged, see :func:`Plot.Print` (default: ``False``)
+
+            * **force** (``bool``) -- print even if the plot and the output file are
+              unchanged when using **skipunchanged** (default: ``False``)
         """
         from RatioPlot import RatioPlot
         from SensitivityScan import SensitivityScan
@@ -313,7 +441,9 @@ class Stack(MethodProxy, ROOT.THStack):
         addcls = [RatioPlot] if ratio else []
         addcls += [ContributionPlot] if contribution else []
         addcls += [SensitivityScan] if sensitivity else []
-        properties = DissectProperties(kwargs, [Stack, Plot, Canvas, Pad] + addcls)
+        properties = DissectProperties(
+            kwargs, [Stack, Plot, Canvas, Pad, {"Print": Plot._printoptions}] + addcls
+        )
         self.BuildStack(sort=sort)
         if self.GetNhists() == 0:
             injections = {"inject0": injections.get("inject0", [])}
@@ -393,7 +523,8 @@ class Stack(MethodProxy, ROOT.THStack):
             k: v for k, v in properties["Pad"].items() if k in ["xtitle", "xunits"]
         }
         if contribution:
-            contribplot = ContributionPlot(self)
+            with profiler.Span("ContributionPlot"):
+                contribplot = ContributionPlot(self)
             properties["ContributionPlot"].update(
                 xaxisprops, **properties["ContributionPlot"]
             )
@@ -408,7 +539,8 @@ class Stack(MethodProxy, ROOT.THStack):
             )
             idx += 1
         if ratio:
-            ratioplot = RatioPlot(*ratio, **properties["RatioPlot"])
+            with profiler.Span("RatioPlot"):
+                ratioplot = RatioPlot(*ratio, **properties["RatioPlot"])
             properties["RatioPlot"].update(xaxisprops)
             plot.Register(
                 ratioplot,
@@ -421,9 +553,10 @@ class Stack(MethodProxy, ROOT.THStack):
             )
             idx += 1
         if sensitivity:
-            sensitivityscan = SensitivityScan(
-                sensitivity, self._stacksumhisto, **properties["SensitivityScan"]
-            )
+            with profiler.Span("SensitivityScan"):
+                sensitivityscan = SensitivityScan(
+                    sensitivity, self._stacksumhisto, **properties["SensitivityScan"]
+                )
             properties["SensitivityScan"].update(xaxisprops)
             plot.Register(
                 sensitivityscan,
@@ -432,17 +565,82 @@ class Stack(MethodProxy, ROOT.THStack):
                 logy=False,
                 **{k: v for k, v in properties["Pad"].items() if k.startswith("x")}
             )
-        plot.Print(path, **MergeDicts(properties["Canvas"], injections))
+        plot.Print(
+            path, **MergeDicts(properties["Canvas"], properties["Print"], injections)
+        )
+
+    def GetYields(self, aliases={}):
+        r"""Return the yields of all registered histograms.
+
+        The yields and statistical errors (including under- and overflow bins) of all
+        histograms are computed at once from their bin contents. The histograms are
+        returned in the order of the yields table, i.e. the stacked histograms sorted by
+        decreasing yield, the sum of the stack and the non-stacked histograms sorted by
+        decreasing yield.
+
+        :param aliases: set new titles via a dictionary where the key is (part of) the
+            histogram name and the value is the new title (default: ``{}``: use current
+            histogram titles)
+        :type aliases: ``dict``
+
+        :returntype: ``list`` -- one ``dict`` per histogram holding its **name**,
+            **title**, **yield**, **error** (statistical), **raw** (number of unweighted
+            events) and whether it is **data** (i.e. not drawn as a histogram)
+        """
+        if self._stacksumhisto is not None:
+            self.UpdateStackSum()
+        groups = [
+            self._store["stack"],
+            [self._stacksumhisto] if self._stacksumhisto is not None else [],
+            self._store["nostack"],
+        ]
+        histos = [histo for group in groups for histo in group]
+        if not histos:
+            return []
+        contents = np.vstack([IOManager._getBinContents(h).ravel() for h in histos])
+        sumw2 = np.vstack([IOManager._getBinSumw2(h).ravel() for h in histos])
+        integrals = contents.sum(axis=1)
+        errors = np.sqrt(sumw2.sum(axis=1))
+        order = []
+        offset = 0
+        for group in groups:
+            indices = np.arange(offset, offset + len(group))
+            # Stable sort by decreasing yield, like sorted(..., reverse=True):
+            order.extend(indices[np.argsort(-integrals[indices], kind="mergesort")])
+            offset += len(group)
+        yields = []
+        for idx in order:
+            histo = histos[idx]
+            title = histo.GetTitle()
+            for histoname, alias in aliases.items():
+                if histoname in histo.GetName():
+                    title = alias
+                    break
+            yields.append(
+                {
+                    "name": histo.GetName(),
+                    "title": title,
+                    "yield": float(integrals[idx]),
+                    "error": float(errors[idx]),
+                    "raw": int(histo.GetEntries()),
+                    "data": not (
+                        histo.GetDrawOption().upper().startswith("HIST")
+                        or "_totalstack" in histo.GetName()
+                    ),
+                }
+            )
+        return yields
 
     @CheckPath(mode="w")
     def PrintYieldTable(self, path=None, **kwargs):
         r"""Print the yields of all registered histograms.
 
         If the **path** is not ``None`` the table is saved to a CSV, TEX or PDF file as
-        specified by the extension.
+        specified by the extension. The unformatted yields (see :func:`GetYields`) can
+        be saved to a JSON or NPZ file instead, e.g. for further processing.
 
-        :param path: path of the output file (must end with '.csv', '.tex' or '.pdf',
-            default: ``None``)
+        :param path: path of the output file (must end with '.csv', '.tex', '.pdf',
+            '.json' or '.npz', default: ``None``)
         :type path: ``str``
 
         :param \**kwargs: see below
@@ -463,6 +661,10 @@ class Stack(MethodProxy, ROOT.THStack):
             * **crop** (``bool``) -- remove empty space from the final PDF file
               (default: ``True``)
 
+            * **texbatch** (``TeXBatch``) -- add the table to a batch of TeX files
+              which are compiled together when the batch is run instead of compiling it
+              right away (the batch decides whether it is cropped, default: ``None``)
+
             * **overwrite** (``bool``) -- overwrite an existing file located at **path**
               (default: ``True``)
 
@@ -472,41 +674,17 @@ class Stack(MethodProxy, ROOT.THStack):
         silent = kwargs.pop("silent", False)  # don't print table to stdout
         precision = kwargs.pop("precision", 2)
         crop = kwargs.pop("crop", True)  # get a nice PDF table!
-        yields = [["Process", "Yield", "Stat. error", "Raw"]]
+        texbatch = kwargs.pop("texbatch", None)
         aliases = kwargs.pop("aliases", {})
-        for histo in (
-            sorted(
-                self._store["stack"],
-                key=lambda h: h.Integral(0, h.GetNbinsX() + 1),
-                reverse=True,
-            )
-            + [self._stacksumhisto]
-            + sorted(
-                self._store["nostack"],
-                key=lambda h: h.Integral(0, h.GetNbinsX() + 1),
-                reverse=True,
-            )
-        ):
-            if histo is None:
-                continue
-            title = histo.GetTitle()
-            for histoname, alias in aliases.items():
-                if histoname in histo.GetName():
-                    title = alias
-                    break
-            staterr = ROOT.Double(0)
-            integral = "{:.{prec}f}".format(
-                histo.IntegralAndError(0, histo.GetNbinsX() + 1, staterr),
-                prec=precision,
-            )
-            staterr = "{:.{prec}f}".format(staterr, prec=precision)
-            raw = str(int(histo.GetEntries()))
-            if histo.GetDrawOption().upper().startswith("HIST") or "_totalstack" in histo.GetName():  # MC (?)
-                # if raw == "0":
-                #     title = "%" + title
-                yields.append([title, integral, staterr, raw])
+        rows = self.GetYields(aliases=aliases)
+        yields = [["Process", "Yield", "Stat. error", "Raw"]]
+        for row in rows:
+            integral = "{:.{prec}f}".format(row["yield"], prec=precision)
+            if not row["data"]:  # MC (?)
+                staterr = "{:.{prec}f}".format(row["error"], prec=precision)
+                yields.append([row["title"], integral, staterr, str(row["raw"])])
             else:  # Data (?)
-                yields.append([title, integral.split(".")[0], "", ""])
+                yields.append([row["title"], integral.split(".")[0], "", ""])
         colwidths = [
             max(w) for w in zip(*[[len(str(e)) for e in entries] for entries in yields])
         ]
@@ -522,7 +700,18 @@ class Stack(MethodProxy, ROOT.THStack):
                 if i == len(self._store["stack"]):
                     print("-" * (sum(colwidths) + (len(colwidths) - 1) * 4))
         if path is not None:
-            if path.endswith(".csv"):
+            if path.endswith(".json"):
+                with open(path, "w") as out:
+                    json.dump(rows, out, indent=4)
+            elif path.endswith(".npz"):
+                np.savez(
+                    path,
+                    **{
+                        key: np.array([row[key] for row in rows])
+                        for key in ["name", "title", "yield", "error", "raw", "data"]
+                    }
+                )
+            elif path.endswith(".csv"):
                 with open(path, "w") as out:
                     for row in yields:
                         out.write(";".join(row) + "\n")
@@ -560,18 +749,23 @@ class Stack(MethodProxy, ROOT.THStack):
                     with open(path, "w") as out:
                         for line in latextable:
                             out.write(line + "\n")
+                if path.endswith(".pdf") and texbatch is not None:
+                    texbatch.Add("\n".join(latextable), path)
+                    logger.info("Added yields table to TeX batch: '{}'".format(path))
+                    return
                 if path.endswith(".pdf"):
                     if find_executable("pdflatex") is None:
                         logger.error(
                             "Cannot compile LaTeX yields table: Command "
                             "'pdflatex' not found!"
                         )
-                    elif crop and find_executable("pdfcrop") is None:
-                        logger.error(
-                            "Cannot crop PDF yields table: Command 'pdfcrop' not found!"
-                        )
-                        crop = False
                     else:
+                        if crop and find_executable("pdfcrop") is None:
+                            logger.error(
+                                "Cannot crop PDF yields table: Command 'pdfcrop' not "
+                                "found!"
+                            )
+                            crop = False
                         TeX2PDF("\n".join(latextable), path, crop=crop)  # verbosity=2
             else:
                 raise IOError(
@@ -592,6 +786,7 @@ class Stack(MethodProxy, ROOT.THStack):
         if self._stacksorting is None:
             self._stacksorting = []
         self._stacksorting.append((property, reverse))
+        self._modified = True
 
     def SetStackSorting(self, *args):
         r"""Define a hierarchical list sorting criteria (:class:`.Histo1D` properties).
@@ -648,6 +843,7 @@ class Stack(MethodProxy, ROOT.THStack):
         for histo in self._store["nostack"]:
             histo.Draw(histo.GetDrawOption() + "SAME")
         if self._drawstacksum:
+            self.UpdateStackSum()
             self._stacksumhisto.Draw(self._stacksumhisto.GetDrawOption() + "SAME")
 
 
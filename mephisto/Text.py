@@ -6,6 +6,10 @@ import ROOT
 
 import re
 
+from uuid import uuid4
+from contextlib import contextmanager
+from collections import OrderedDict
+
 from Canvas import Canvas
 from MethodProxy import *
 
@@ -33,45 +37,237 @@ class Text(MethodProxy, ROOT.TLatex):
         kwargs.setdefault("template", "common")
         self.DeclareProperties(**kwargs)
 
+    @staticmethod
+    def GetMetrics():
+        r"""Return the cache of text extents shared by all :class:`.Text` objects.
+
+        :returntype: :class:`.TextMetrics`
+        """
+        return Text._metrics
+
+    @staticmethod
+    def Measure(title, **kwargs):
+        r"""Return the width and height of a text without drawing it.
+
+        The extent is looked up in the cache returned by :func:`~Text.GetMetrics`,
+        hence a :class:`.Text` object is only created if the text has not been
+        measured with the same font properties before.
+
+        :param title: text to be measured
+        :type title: ``str``
+
+        :param \**kwargs: :class:`.Text` properties (only **textfont**, **textsize**
+            and **indicesize** affect the extent)
+
+        :returntype: ``tuple``
+        """
+        props = Text.GetTemplate(kwargs.get("template", "common"))
+        props.update(kwargs)
+        args = (title, props["textfont"], props["textsize"], props["indicesize"])
+        keys = [Text._metricsKey("x", *args), Text._metricsKey("y", *(args + (True,)))]
+        sizes = [Text._metrics.Lookup(key) for key in keys]
+        if None in sizes:
+            # Only the missing extents are measured and stored (without being looked
+            # up again, which would count the misses twice):
+            text = Text(0.5, 0.5, title, **kwargs)
+            measures = [text._measureXsize, text._measureYsize]
+            sizes = [
+                size if size is not None else Text._metrics.Store(key, measure())
+                for size, key, measure in zip(sizes, keys, measures)
+            ]
+        return tuple(sizes)
+
     def GetXsize(self):
-        xsf = 15.8  # a wild scale factor appears...
-        c = ROOT.TCanvas("tmp", "", 100, 100)
-        c.Draw()
-        self.Draw()
-        font = self.GetTextFont()
-        with UsingProperties(self, textfont=10 * (font - (font % 10) / 10) + 2):
-            size = (self.GetTextSize() / (ROOT.gPad.GetWw() / xsf)) * (
-                super(Text, self).GetXsize()
-                / (ROOT.gPad.GetWh() * ROOT.gPad.GetWw()) ** 0.5
-                / self.GetTextSize()
-            )
+        key = Text._metricsKey(
+            "x",
+            self.GetTitle(),
+            self.GetTextFont(),
+            self.GetTextSize(),
+            self.GetIndiceSize(),
+        )
+        size = Text._metrics.Lookup(key)
+        if size is None:
+            size = Text._metrics.Store(key, self._measureXsize())
         return size
 
     def GetYsize(self, ignoreformulas=True):
+        key = Text._metricsKey(
+            "y",
+            self.GetTitle(),
+            self.GetTextFont(),
+            self.GetTextSize(),
+            self.GetIndiceSize(),
+            ignoreformulas,
+        )
+        size = Text._metrics.Lookup(key)
+        if size is None:
+            size = Text._metrics.Store(key, self._measureYsize(ignoreformulas))
+        return size
+
+    @staticmethod
+    def _metricsKey(axis, title, font, size, indicesize, *args):
+        # Key of a text extent in the metrics cache. The extent is measured on a canvas
+        # with fixed geometry, which is part of the key nonetheless.
+        return (axis, title, font, float(size), float(indicesize)) + args + (100, 100)
+
+    def _measureXsize(self):
+        xsf = 15.8  # a wild scale factor appears...
+        with Text._metrics.UsingCanvas():
+            self.Draw()
+            font = self.GetTextFont()
+            with UsingProperties(self, textfont=10 * (font - (font % 10) / 10) + 2):
+                size = (self.GetTextSize() / (ROOT.gPad.GetWw() / xsf)) * (
+                    super(Text, self).GetXsize()
+                    / (ROOT.gPad.GetWh() * ROOT.gPad.GetWw()) ** 0.5
+                    / self.GetTextSize()
+                )
+        return size
+
+    def _measureYsize(self, ignoreformulas=True):
         ysf = 13.0  # a wild scale factor appears...
-        c = ROOT.TCanvas("tmp", "", 100, 100)
-        c.Draw()
-        self.Draw()
-        font = self.GetTextFont()
-        tmptitle = self.GetTitle()
-        if ignoreformulas:
-            tmptitle = re.sub("[\_\^]{(.*?)}", "", tmptitle)  # remove sub-/superscripts
-            for mod in ["bar", "tilde"]:  # remove bar, tilde, ...
-                rgx = "[\#]" + mod + "{(.*?)}"
-                match = re.search(rgx, tmptitle)
-                if match is not None:
-                    tmptitle = re.sub(rgx, match.group()[len(mod) + 2 : -1], tmptitle)
-        with UsingProperties(
-            self, textfont=10 * (font - (font % 10) / 10) + 2, title=tmptitle
-        ):
-            size = (self.GetTextSize() / (ROOT.gPad.GetWh() / ysf)) * (
-                super(Text, self).GetYsize()
-                / (ROOT.gPad.GetWh() * ROOT.gPad.GetWw()) ** 0.5
-                / self.GetTextSize()
-            )
+        with Text._metrics.UsingCanvas():
+            self.Draw()
+            font = self.GetTextFont()
+            tmptitle = self.GetTitle()
+            if ignoreformulas:
+                # remove sub-/superscripts:
+                tmptitle = re.sub("[\_\^]{(.*?)}", "", tmptitle)
+                for mod in ["bar", "tilde"]:  # remove bar, tilde, ...
+                    rgx = "[\#]" + mod + "{(.*?)}"
+                    match = re.search(rgx, tmptitle)
+                    if match is not None:
+                        tmptitle = re.sub(
+                            rgx, match.group()[len(mod) + 2 : -1], tmptitle
+                        )
+            with UsingProperties(
+                self, textfont=10 * (font - (font % 10) / 10) + 2, title=tmptitle
+            ):
+                size = (self.GetTextSize() / (ROOT.gPad.GetWh() / ysf)) * (
+                    super(Text, self).GetYsize()
+                    / (ROOT.gPad.GetWh() * ROOT.gPad.GetWw()) ** 0.5
+                    / self.GetTextSize()
+                )
         return size
 
 
+class TextMetrics(object):
+    r"""Bounded cache for the extents of texts.
+
+    Measuring the width and height of a :class:`.Text` requires ROOT to lay out the
+    (La)TeX string on a canvas, which is costly when done for every legend entry of
+    every plot. The measured extents are therefore cached by the text, its font, size
+    and indice size and the geometry of the measurement canvas. The least recently
+    used entries are dropped once the cache exceeds its maximum size. A single
+    instance is shared by all :class:`.Text` objects, see :func:`Text.GetMetrics`.
+    """
+
+    def __init__(self, maxsize=4096):
+        r"""Initialize an empty cache.
+
+        :param maxsize: maximum number of cached extents
+        :type maxsize: ``int``
+        """
+        self._maxsize = maxsize
+        self._cache = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._canvas = None
+
+    def Lookup(self, key):
+        r"""Return the cached extent for **key** or ``None`` if it is not cached.
+
+        :param key: cache key
+        :type key: ``tuple``
+
+        :returntype: ``float``, ``None``
+        """
+        try:
+            value = self._cache.pop(key)
+        except KeyError:
+            self._misses += 1
+            return None
+        self._cache[key] = value  # move to the end (most recently used)
+        self._hits += 1
+        return value
+
+    def Store(self, key, value):
+        r"""Add an extent to the cache and return it.
+
+        :param key: cache key
+        :type key: ``tuple``
+
+        :param value: extent
+        :type value: ``float``
+
+        :returntype: ``float``
+        """
+        self._cache.pop(key, None)
+        self._cache[key] = value
+        while len(self._cache) > self._maxsize:
+            self._cache.popitem(last=False)
+        return value
+
+    @contextmanager
+    def UsingCanvas(self):
+        r"""Context manager making the (reusable) measurement canvas the current pad.
+
+        The previously current pad is restored afterwards and all objects drawn onto
+        the measurement canvas are removed from it.
+        """
+        if self._canvas is None:
+            self._canvas = ROOT.TCanvas(
+                "TextMetrics_{}".format(uuid4().hex[:8]), "", 100, 100
+            )
+        cpad = ROOT.TVirtualPad.Pad()  # current pad
+        self._canvas.cd()
+        try:
+            yield self._canvas
+        finally:
+            self._canvas.Clear()
+            if cpad:
+                cpad.cd()
+
+    def SetMaxSize(self, maxsize):
+        r"""Set the maximum number of cached extents.
+
+        :param maxsize: maximum number of cached extents
+        :type maxsize: ``int``
+        """
+        self._maxsize = maxsize
+        while len(self._cache) > self._maxsize:
+            self._cache.popitem(last=False)
+
+    def GetMaxSize(self):
+        r"""Return the maximum number of cached extents.
+
+        :returntype: ``int``
+        """
+        return self._maxsize
+
+    def GetStats(self):
+        r"""Return the number of cache **hits**, **misses**, the current **size** and
+        the **maxsize** of the cache as a dictionary.
+
+        :returntype: ``dict``
+        """
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "size": len(self._cache),
+            "maxsize": self._maxsize,
+        }
+
+    def Clear(self):
+        r"""Remove all cached extents and reset the hit and miss counters."""
+        self._cache.clear()
+        self._hits = 0
+        self._misses = 0
+        self._misses = 0
+
+
+Text._metrics = TextMetrics()
+
+
 if __name__ == "__main__":
 
     from Plot import Plot
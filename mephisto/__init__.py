@@ -1,33 +1,62 @@
-import ROOT
-
-"""Set ROOT to batch and ignore command line options"""
-ROOT.gROOT.SetBatch(0)
-ROOT.PyConfig.IgnoreCommandLineOptions = True
-
-"""Set ROOT logging verbosity"""
-ROOT.gErrorIgnoreLevel = 2000
-# kUnset    =  -1
-# kPrint    =   0
-# kInfo     =   1000
-# kWarning  =   2000
-# kError    =   3000
-# kBreak    =   4000
-# kSysError =   5000
-# kFatal    =   6000
-
-from Pad import Pad
-from Plot import Plot
-from Line import Line
-from Text import Text
-from Stack import Stack
-from Graph import Graph
-from Arrow import Arrow
-from logger import logger
-from Canvas import Canvas
-from Histo1D import Histo1D
-from Histo2D import Histo2D
-from N1Plotter import N1Plotter
-from RatioPlot import RatioPlot
-from IOManager import IOManager
-from SensitivityScan import SensitivityScan
-from ContributionPlot import ContributionPlot
+import sys
+import types
+import importlib
+
+"""Classes (and other objects) exported by the package and the modules defining them"""
+_exports = {
+    "Pad": "Pad",
+    "Plot": "Plot",
+    "Line": "Line",
+    "Text": "Text",
+    "Stack": "Stack",
+    "Graph": "Graph",
+    "Arrow": "Arrow",
+    "logger": "logger",
+    "Canvas": "Canvas",
+    "CutFlow": "CutFlow",
+    "CutOptimizer": "CutOptimizer",
+    "Histo1D": "Histo1D",
+    "Histo2D": "Histo2D",
+    "TeXBatch": "Helpers",
+    "PlotBatch": "PlotBatch",
+    "N1Plotter": "N1Plotter",
+    "profiler": "profiler",
+    "RatioPlot": "RatioPlot",
+    "IOManager": "IOManager",
+    "HistoExpression": "HistoExpression",
+    "SensitivityScan": "SensitivityScan",
+    "BinningOptimizer": "BinningOptimizer",
+    "ContributionPlot": "ContributionPlot",
+}
+
+__all__ = sorted(_exports.keys())
+
+
+class _LazyModule(types.ModuleType):
+    # Import the modules of the package only once one of their classes is accessed,
+    # e.g. 'from mephisto import IOManager' does not import ROOT.TH2D, scipy etc. The
+    # ROOT configuration is done by the Helpers module imported by all of them.
+    # Attributes referring to a submodule, which are set by the import machinery when
+    # a submodule is imported, are replaced by the class of the same name.
+
+    def __getattribute__(self, name):
+        try:
+            value = types.ModuleType.__getattribute__(self, name)
+        except AttributeError:
+            if name not in _exports:
+                raise
+            value = None
+        if name in _exports and (value is None or isinstance(value, types.ModuleType)):
+            module = importlib.import_module(".{}".format(_exports[name]), __name__)
+            value = getattr(module, name)
+            types.ModuleType.__setattr__(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__.keys()) | set(__all__))
+
+
+_module = _LazyModule(__name__, __doc__)
+_module.__dict__.update(globals())
+_module._original = sys.modules[__name__]  # keep the globals of this module alive
+sys.modules[__name__] = _module
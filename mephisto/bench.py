@@ -0,0 +1,357 @@
+#!/usr/bin/env python2.7
+
+"""Benchmarks for MEPHISTO.
+
+Usage: python -m mephisto.bench <benchmark> [options] (see --help)
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+try:
+    import __builtin__ as builtins
+except ImportError:
+    import builtins
+
+__filedir__ = os.path.dirname(os.path.abspath(__file__))
+
+if __filedir__ not in sys.path:
+    sys.path.insert(0, __filedir__)  # for the implicit relative imports in MEPHISTO
+
+
+def printloop(args):
+    # Print the same simple histogram many times, with and without reusing canvases.
+    import ROOT
+
+    from Plot import Plot
+    from logger import logger
+    from Histo1D import Histo1D
+
+    logger.setLevel(30)
+    ROOT.gRandom.SetSeed(42)
+    histo = Histo1D("bench_printloop", "Benchmark", 40, -5.0, 5.0)
+    histo.FillRandom("gaus", 10000)
+    outdir = tempfile.mkdtemp(prefix="mephisto_bench_")
+    try:
+        for reuse in [False, True]:
+            Plot.ClearCanvasPool()
+            start = time.time()
+            for i in range(args.nplots):
+                histo.Print(
+                    os.path.join(outdir, "plot_{}.{}".format(i, args.extension)),
+                    reuse=reuse,
+                )
+            elapsed = time.time() - start
+            print(
+                "reuse={!s:<6} {:>6d} plots in {:>8.2f} s ({:>7.2f} ms/plot)".format(
+                    reuse, args.nplots, elapsed, 1e3 * elapsed / args.nplots
+                )
+            )
+    finally:
+        Plot.ClearCanvasPool()
+        shutil.rmtree(outdir)
+
+
+def properties(args):
+    # Construct and style many histograms and compare the property dispatch via the
+    # precomputed tables with a scan over all methods (as done previously).
+    import re
+
+    import ROOT
+
+    from logger import logger
+    from Histo1D import Histo1D
+
+    logger.setLevel(30)
+    style = dict(
+        linecolor="#2e95bb",
+        fillcolor="#2e95bb",
+        linewidth=2,
+        markerstyle=20,
+        markersize=1.2,
+        title="Benchmark",
+    )
+
+    def report(label, elapsed, n):
+        print(
+            "{:<28} {:>8d} x in {:>8.3f} s ({:>7.2f} us each)".format(
+                label, n, elapsed, 1e6 * elapsed / n
+            )
+        )
+
+    start = time.time()
+    histos = [
+        Histo1D("bench_properties_{}".format(i), "", 20, 0.0, 1.0)
+        for i in range(args.nhistos)
+    ]
+    report("construction", time.time() - start, args.nhistos)
+    start = time.time()
+    for i in range(args.nhistos):
+        Histo1D("bench_lightweight_{}".format(i), "", 20, 0.0, 1.0, lightweight=True)
+    report("construction (lightweight)", time.time() - start, args.nhistos)
+    start = time.time()
+    for histo in histos:
+        histo.DeclareProperties(**style)
+    report("styling", time.time() - start, args.nhistos)
+    start = time.time()
+    for histo in histos:
+        histo.GetProperties()
+    report("GetProperties", time.time() - start, args.nhistos)
+    nlookups = args.nhistos * len(style)
+    start = time.time()
+    for i in range(args.nhistos):
+        for property in style:
+            Histo1D._setters.get(property, [])
+    report("setter lookup (tables)", time.time() - start, nlookups)
+    start = time.time()
+    for i in range(args.nhistos):
+        for property in style:
+            regex = re.compile("Set{}$".format(property), re.IGNORECASE)
+            list(filter(regex.match, Histo1D._methods))
+    report("setter lookup (scan)", time.time() - start, nlookups)
+    # Calls of wrapped (styling) and unwrapped setters of regular histograms, compared
+    # to the bare ROOT setter:
+    for label, setter, setterargs in [
+        ("SetLineWidth", Histo1D.SetLineWidth, (2,)),
+        ("SetLineWidth (ROOT)", ROOT.TH1D.SetLineWidth, (2,)),
+        ("SetBinContent", Histo1D.SetBinContent, (1, 1.0)),
+    ]:
+        start = time.time()
+        for histo in histos:
+            setter(histo, *setterargs)
+        report(label, time.time() - start, args.nhistos)
+
+
+class ImportProfiler(object):
+    # Hierarchical timing of module imports by wrapping the builtin __import__. Only
+    # imports of modules which are not yet loaded are recorded, each as a node holding
+    # the names of the newly loaded module(s), the cumulative time and the child nodes.
+
+    def __init__(self):
+        self._stack = [{"modules": [], "time": 0.0, "children": []}]
+        self._import = None
+
+    def __enter__(self):
+        self._import = builtins.__import__
+        builtins.__import__ = self._timedimport
+        return self
+
+    def __exit__(self, *args):
+        builtins.__import__ = self._import
+
+    def _timedimport(self, *args, **kwargs):
+        nmodules = len(sys.modules)
+        before = set(sys.modules.keys())
+        node = {"modules": [], "time": 0.0, "children": []}
+        self._stack.append(node)
+        start = time.time()
+        try:
+            return self._import(*args, **kwargs)
+        finally:
+            node["time"] = time.time() - start
+            self._stack.pop()
+            if len(sys.modules) != nmodules:
+                nested = set()
+                for child in node["children"]:
+                    nested.update(ImportProfiler._allmodules(child))
+                node["modules"] = sorted(
+                    name
+                    for name in set(sys.modules.keys()) - before - nested
+                    if sys.modules[name] is not None
+                )
+            if node["modules"]:
+                self._stack[-1]["children"].append(node)
+            else:
+                self._stack[-1]["children"].extend(node["children"])
+
+    @staticmethod
+    def _allmodules(node):
+        modules = list(node["modules"])
+        for child in node["children"]:
+            modules += ImportProfiler._allmodules(child)
+        return modules
+
+    def GetTree(self):
+        return self._stack[0]["children"]
+
+
+def _startupchild():
+    # Measure the startup phases in this (fresh) interpreter and print them as JSON.
+    result = {"phases": [], "imports": {}, "properties": {}, "templates": {}}
+
+    def phase(name, func):
+        with ImportProfiler() as profiler:
+            start = time.time()
+            func()
+            elapsed = time.time() - start
+        result["phases"].append({"name": name, "time": elapsed})
+        result["imports"][name] = profiler.GetTree()
+
+    def importroot():
+        import ROOT
+
+    def initroot():
+        import ROOT
+
+        ROOT.PyConfig.IgnoreCommandLineOptions = True
+        ROOT.gROOT.GetVersion()
+
+    def importmephisto():
+        import mephisto
+
+    def importclasses():
+        from mephisto import Histo1D, Plot
+
+    phase("import ROOT", importroot)
+    phase("ROOT initialisation", initroot)
+    phase("import mephisto", importmephisto)
+    phase("from mephisto import Histo1D, Plot", importclasses)
+
+    # Time the (deferred) loading of the properties and templates of each class:
+    MethodProxy = sys.modules["mephisto.MethodProxy"]
+    ensureloaded = MethodProxy.MethodProxy._ensureLoaded
+    loadtemplates = MethodProxy.TemplateRegistry._load
+
+    def timedensureloaded(cls):
+        pending = [k for k in cls.__mro__ if k in MethodProxy._pendingclasses]
+        start = time.time()
+        loaded = ensureloaded(cls)
+        if pending:
+            result["properties"][pending[0].__name__] = time.time() - start
+        return loaded
+
+    def timedloadtemplates(paths):
+        start = time.time()
+        templates = loadtemplates(paths)
+        for path in paths:
+            name = os.path.basename(path)[: -len("_templates.json")]
+            result["templates"][name] = result["templates"].get(name, 0.0) + (
+                time.time() - start
+            ) / len(paths)
+        return templates
+
+    MethodProxy.MethodProxy._ensureLoaded = staticmethod(timedensureloaded)
+    MethodProxy.TemplateRegistry._load = staticmethod(timedloadtemplates)
+
+    def firsthisto():
+        from mephisto import Histo1D
+
+        Histo1D("bench_startup", "", 20, 0.0, 1.0)
+
+    def firstplot():
+        from mephisto import Plot
+
+        Plot()
+
+    phase("first Histo1D", firsthisto)
+    phase("first Plot", firstplot)
+    print(json.dumps(result))
+
+
+def startup(args):
+    # Break down the time spent before the first event is read, measured in a fresh
+    # interpreter: ROOT initialisation, (per-module) import of the package, loading of
+    # the class properties and templates and the first Histo1D and Plot construction.
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [os.path.dirname(__filedir__)] + env.get("PYTHONPATH", "").split(os.pathsep)
+    )
+    output = subprocess.check_output(
+        [sys.executable, os.path.abspath(__file__), "startup", "--child"], env=env
+    )
+    result = json.loads(output.decode("utf-8").strip().splitlines()[-1])
+    if args.json:
+        with open(args.json, "w") as jsonfile:
+            json.dump(result, jsonfile, indent=2)
+        print("Saved startup profile to '{}'.".format(args.json))
+
+    def printtree(nodes, depth=0):
+        for node in sorted(nodes, key=lambda n: n["time"], reverse=True):
+            if node["time"] < args.threshold * 1e-3:
+                continue
+            selftime = node["time"] - sum([c["time"] for c in node["children"]])
+            print(
+                "{:>10.1f} {:>10.1f}  {}{}".format(
+                    1e3 * node["time"],
+                    1e3 * selftime,
+                    "  " * depth,
+                    ", ".join(node["modules"]),
+                )
+            )
+            printtree(node["children"], depth + 1)
+
+    print("{:<40} {:>10}".format("phase", "time [ms]"))
+    for phase in result["phases"]:
+        print("{:<40} {:>10.1f}".format(phase["name"], 1e3 * phase["time"]))
+    for phase in result["phases"]:
+        if result["imports"][phase["name"]]:
+            print("\nImports during '{}':".format(phase["name"]))
+            print("{:>10} {:>10}  {}".format("cum. [ms]", "self [ms]", "module"))
+            printtree(result["imports"][phase["name"]])
+    for key, title in [
+        ("properties", "Loading of properties (incl. nested classes)"),
+        ("templates", "Loading of templates"),
+    ]:
+        print("\n{}:".format(title))
+        for name, elapsed in sorted(
+            result[key].items(), key=lambda x: x[1], reverse=True
+        ):
+            print("{:<40} {:>10.1f}".format(name, 1e3 * elapsed))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for MEPHISTO.")
+    subparsers = parser.add_subparsers(title="benchmarks")
+    parser_printloop = subparsers.add_parser(
+        "printloop", help="per-plot overhead of printing many simple plots"
+    )
+    parser_printloop.add_argument(
+        "-n", "--nplots", type=int, default=1000, help="number of plots (default: 1000)"
+    )
+    parser_printloop.add_argument(
+        "-e", "--extension", default="pdf", help="output file format (default: pdf)"
+    )
+    parser_printloop.set_defaults(func=printloop)
+    parser_properties = subparsers.add_parser(
+        "properties", help="construction and styling of many histograms"
+    )
+    parser_properties.add_argument(
+        "-n",
+        "--nhistos",
+        type=int,
+        default=5000,
+        help="number of histograms (default: 5000)",
+    )
+    parser_properties.set_defaults(func=properties)
+    parser_startup = subparsers.add_parser(
+        "startup", help="breakdown of the time spent importing and initializing"
+    )
+    parser_startup.add_argument(
+        "-j", "--json", metavar="PATH", help="save the full profile as JSON file"
+    )
+    parser_startup.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=1.0,
+        help="omit imports taking less than this many ms (default: 1.0)",
+    )
+    parser_startup.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser_startup.set_defaults(func=startup)
+    args = parser.parse_args(argv)
+    if getattr(args, "child", False):
+        _startupchild()
+    else:
+        args.func(args)
+
+
+if __name__ == "__main__":
+    main()
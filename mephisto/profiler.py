@@ -0,0 +1,274 @@
+#!/usr/bin/env python2.7
+
+from __future__ import print_function
+
+import os
+import json
+import time
+import atexit
+
+from math import log
+
+from logger import logger
+
+# Don't decorate functions when building the documentation (see Helpers)
+IS_SPHINX_BUILD = bool(os.getenv("SPHINX_BUILD"))
+
+
+class NullSpan(object):
+    # Span returned while profiling is disabled, doing nothing at all.
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class Span(object):
+    # Timing span recorded by the profiler when left. Spans opened while another one
+    # is open are nested into it, i.e. their statistics are recorded under the path
+    # "<outer>/<inner>".
+
+    def __init__(self, profiler, name, args):
+        self._profiler = profiler
+        self._name = name
+        self._args = args
+
+    def __enter__(self):
+        stack = self._profiler._stack
+        self._path = "{}/{}".format(stack[-1], self._name) if stack else self._name
+        stack.append(self._path)
+        self._start = time.time()
+        return self
+
+    def __exit__(self, *args):
+        duration = time.time() - self._start
+        profiler = self._profiler
+        profiler._stack.pop()
+        profiler._record(self._path, self._name, self._start, duration, self._args)
+        return False
+
+
+class Profiler(object):
+    r"""Registry of nested timing spans, counters and latency histograms.
+
+    Profiling is disabled by default, in which case spans do nothing and the
+    instrumented code runs (almost) at full speed. If the environment variable
+    ``MEPHISTO_PROFILE`` is set to a path, profiling is enabled on import and the
+    summary is saved to this path at exit (and the trace to the same path with the
+    extension '.trace.json').
+
+    Spans are opened as context managers, e.g.
+
+    .. code-block:: python
+
+        from mephisto import profiler
+
+        profiler.Enable()
+        with profiler.Span("myanalysis"):
+            stack.Print("plot.pdf")
+        profiler.SaveJSON("profile.json")
+        profiler.SaveChromeTrace("profile.trace.json")  # open with chrome://tracing
+
+    The instrumented parts of MEPHISTO record spans for reading events ('io'),
+    evaluating cut expressions ('eval'), filling histograms ('fill'), building the
+    frame of plots ('frame'), drawing ('draw') and saving ('save').
+    """
+
+    _nbuckets = 32  # latency histogram buckets: [2^(i-1), 2^i) microseconds
+
+    def __init__(self, maxevents=int(1e6)):
+        r"""Initialize a (disabled) profiler.
+
+        :param maxevents: maximal number of spans kept for the trace (the statistics
+            include all spans)
+        :type maxevents: ``int``
+        """
+        self._enabled = False
+        self._maxevents = maxevents
+        self._nullspan = NullSpan()
+        self.Reset()
+
+    def Enable(self):
+        r"""Start recording spans and counters."""
+        self._enabled = True
+
+    def Disable(self):
+        r"""Stop recording spans and counters."""
+        self._enabled = False
+
+    def IsEnabled(self):
+        r"""Return whether spans and counters are recorded.
+
+        :returntype: ``bool``
+        """
+        return self._enabled
+
+    def Reset(self):
+        r"""Discard all recorded spans and counters."""
+        self._stack = []
+        self._stats = {}
+        self._counters = {}
+        self._events = []
+        self._t0 = time.time()
+
+    def Span(self, name, **args):
+        r"""Return a context manager timing the enclosed code as span **name**.
+
+        :param name: name of the span
+        :type name: ``str``
+
+        :param \**args: additional information stored with the span in the trace
+        """
+        if not self._enabled:
+            return self._nullspan
+        return Span(self, name, args)
+
+    def Count(self, name, n=1):
+        r"""Increase the counter **name** by **n**.
+
+        :param name: name of the counter
+        :type name: ``str``
+
+        :param n: increment
+        :type n: ``int``, ``float``
+        """
+        if self._enabled:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def _record(self, path, name, start, duration, args):
+        # Update the statistics of the span path and keep the span for the trace.
+        stats = self._stats.get(path)
+        if stats is None:
+            stats = self._stats[path] = {
+                "count": 0,
+                "total": 0.0,
+                "min": duration,
+                "max": duration,
+                "histogram": [0] * self._nbuckets,
+            }
+        stats["count"] += 1
+        stats["total"] += duration
+        stats["min"] = min(stats["min"], duration)
+        stats["max"] = max(stats["max"], duration)
+        bucket = int(log(duration * 1e6, 2)) + 1 if duration >= 1e-6 else 0
+        stats["histogram"][min(bucket, self._nbuckets - 1)] += 1
+        if len(self._events) < self._maxevents:
+            self._events.append((name, path, start, duration, args))
+
+    def GetStats(self):
+        r"""Return the statistics of all spans and the counters.
+
+        The returned dictionary holds the **spans**, i.e. for each path of nested span
+        names (e.g. 'Plot.Print/draw') the **count**, **total**, **min**, **max** and
+        **mean** time (in seconds) and the latency **histogram** (number of spans
+        taking [2^(i-1), 2^i) microseconds), and the **counters**.
+
+        :returntype: ``dict``
+        """
+        spans = {}
+        for path, stats in self._stats.items():
+            spans[path] = dict(stats, mean=stats["total"] / stats["count"])
+        return {"spans": spans, "counters": dict(self._counters)}
+
+    def SaveJSON(self, path):
+        r"""Save the statistics of all spans and the counters to a JSON file.
+
+        :param path: path of the output file
+        :type path: ``str``
+        """
+        with open(path, "w") as jsonfile:
+            json.dump(self.GetStats(), jsonfile, indent=2, sort_keys=True)
+        logger.info("Saved profile: '{}'".format(path))
+
+    def SaveChromeTrace(self, path):
+        r"""Save all spans and counters in the Chrome trace event format.
+
+        The file can be opened with chrome://tracing or https://ui.perfetto.dev.
+
+        :param path: path of the output file
+        :type path: ``str``
+        """
+        pid = os.getpid()
+        events = []
+        for name, spanpath, start, duration, args in self._events:
+            events.append(
+                {
+                    "name": name,
+                    "cat": spanpath.split("/")[0],
+                    "ph": "X",
+                    "ts": 1e6 * (start - self._t0),
+                    "dur": 1e6 * duration,
+                    "pid": pid,
+                    "tid": 0,
+                    "args": dict(
+                        {k: str(v) for k, v in args.items()}, path=spanpath
+                    ),
+                }
+            )
+        events.append(
+            {
+                "name": "counters",
+                "ph": "C",
+                "ts": 1e6 * (time.time() - self._t0),
+                "pid": pid,
+                "tid": 0,
+                "args": dict(self._counters),
+            }
+        )
+        with open(path, "w") as tracefile:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, tracefile)
+        logger.info("Saved trace: '{}'".format(path))
+
+    def PrintStats(self):
+        r"""Print the statistics of all spans (sorted by path) and the counters."""
+        print(
+            "{:<50} {:>8} {:>10} {:>10} {:>10}".format(
+                "span", "count", "total [s]", "mean [ms]", "max [ms]"
+            )
+        )
+        for path, stats in sorted(self.GetStats()["spans"].items()):
+            print(
+                "{:<50} {:>8d} {:>10.3f} {:>10.3f} {:>10.3f}".format(
+                    "  " * path.count("/") + path.split("/")[-1],
+                    stats["count"],
+                    stats["total"],
+                    1e3 * stats["mean"],
+                    1e3 * stats["max"],
+                )
+            )
+        for name, value in sorted(self._counters.items()):
+            print("{:<50} {:>8}".format(name, value))
+
+
+profiler = Profiler()
+
+
+def Profiled(name=None):
+    # Decorator recording each call of the decorated function as a span (named after
+    # the function by default). Costs one attribute lookup if profiling is disabled.
+    def decorator(func):
+        spanname = name or "{}.{}".format(func.__module__, func.__name__)
+
+        def wrapper(*args, **kwargs):
+            if not profiler._enabled:
+                return func(*args, **kwargs)
+            with Span(profiler, spanname, {}):
+                return func(*args, **kwargs)
+
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        return func if IS_SPHINX_BUILD else wrapper
+
+    return decorator
+
+
+def _saveAtExit(path):
+    profiler.SaveJSON(path)
+    profiler.SaveChromeTrace("{}.trace.json".format(os.path.splitext(path)[0]))
+
+
+if os.getenv("MEPHISTO_PROFILE"):
+    profiler.Enable()
+    atexit.register(_saveAtExit, os.path.abspath(os.getenv("MEPHISTO_PROFILE")))
@@ -0,0 +1,147 @@
+#!/usr/bin/env python 2.7
+
+from __future__ import print_function
+
+import ROOT
+
+import os
+import uuid
+import itertools
+import unittest
+
+import numpy as np
+
+from mephisto import BinningOptimizer, Histo1D, IOManager, N1Plotter
+from mephisto.Helpers import AsymptoticFormulae
+
+
+class BinningOptimizerTester(unittest.TestCase):
+    def _createHistos(self, nbins=8):
+        # Signal and background histograms with fixed pseudo-random contents.
+        rng = np.random.RandomState(42)
+        histos = []
+        for contents in [rng.uniform(0.1, 2.0, nbins), rng.uniform(0.5, 10.0, nbins)]:
+            histo = Histo1D(uuid.uuid4().hex[:16], "", nbins, 0.0, float(nbins))
+            for i, content in enumerate(contents):
+                histo.SetBinContent(i + 1, content)
+                histo.SetBinError(i + 1, np.sqrt(content) * 0.5)
+            histos.append(histo)
+        return histos
+
+    def _bruteForce(self, sighisto, bkghisto, minbkg, maxrelerr, maxbins, flatbkgsys):
+        # Return the best bin edges and combined significance of all binnings.
+        sig, bkg, sumw2 = [
+            array[1:-1]
+            for array in [
+                IOManager._getBinContents(sighisto),
+                IOManager._getBinContents(bkghisto),
+                IOManager._getBinSumw2(bkghisto),
+            ]
+        ]
+        nbins = len(bkg)
+        best, bestedges = -1.0, None
+        for ninner in range(min(maxbins or nbins, nbins)):
+            for inner in itertools.combinations(range(1, nbins), ninner):
+                edges = [0] + list(inner) + [nbins]
+                z2 = 0.0
+                for i, j in zip(edges[:-1], edges[1:]):
+                    s, b, w2 = sig[i:j].sum(), bkg[i:j].sum(), sumw2[i:j].sum()
+                    if b < minbkg or (
+                        maxrelerr is not None and w2 > (maxrelerr * b) ** 2
+                    ):
+                        break
+                    relerr = np.sqrt(w2 / b ** 2 + flatbkgsys ** 2)
+                    z2 += AsymptoticFormulae.AsimovExpZ(s, b, relerr) ** 2
+                else:
+                    if z2 > best:
+                        best, bestedges = z2, edges
+        return [float(e) for e in bestedges], np.sqrt(best)
+
+    def AsimovExpZArray(self):
+        # Compare the vectorized significance to the scalar one.
+        s, b, db = [
+            a.flatten()
+            for a in np.meshgrid(
+                [0.0, 0.5, 3.0, 20.0], [0.5, 2.0, 10.0, 100.0], [0.05, 0.3, 1.0]
+            )
+        ]
+        expected = [AsymptoticFormulae.AsimovExpZ(*args) for args in zip(s, b, db)]
+        self.assertTrue(
+            np.allclose(AsymptoticFormulae.AsimovExpZArray(s, b, db), expected)
+        )
+        # Limit without background uncertainty:
+        self.assertTrue(
+            np.allclose(
+                AsymptoticFormulae.AsimovExpZArray(s, b, 0.0),
+                np.sqrt(2 * ((s + b) * np.log(1 + s / b) - s)),
+            )
+        )
+        self.assertEqual(AsymptoticFormulae.AsimovExpZArray(1.0, 0.0, 0.3), 0.0)
+
+    def OptimizeBinning(self):
+        # Compare the optimized binning to the best one of all possible binnings.
+        sighisto, bkghisto = self._createHistos()
+        for kwargs in [
+            {"minbkg": 8.0},
+            {"minbkg": 4.0, "maxbins": 3},
+            {"maxrelerr": 0.2, "flatbkgsys": 0.1},
+        ]:
+            optimizer = BinningOptimizer(sighisto, bkghisto, **kwargs)
+            edges, significance = self._bruteForce(
+                sighisto,
+                bkghisto,
+                kwargs.get("minbkg", 0.0),
+                kwargs.get("maxrelerr"),
+                kwargs.get("maxbins"),
+                kwargs.get("flatbkgsys", 0.3),
+            )
+            self.assertEqual(optimizer.GetEdges(), edges)
+            self.assertTrue(np.isclose(optimizer.GetSignificance(), significance))
+        # Most bins satisfying the constraints:
+        optimizer = BinningOptimizer(sighisto, bkghisto, minbkg=1e-3, objective="nbins")
+        self.assertEqual(optimizer.GetEdges(), [float(i) for i in range(9)])
+        # No valid binning (merge all bins into one):
+        optimizer = BinningOptimizer(sighisto, bkghisto, minbkg=1e3)
+        self.assertEqual(optimizer.GetEdges(), [0.0, 8.0])
+        self.assertEqual(optimizer.GetSignificance(), 0.0)
+        total = bkghisto.Integral(0, bkghisto.GetNbinsX() + 1)
+        optimizer.Apply(bkghisto)
+        self.assertEqual(bkghisto.GetNbinsX(), 1)
+        self.assertTrue(np.isclose(bkghisto.Integral(0, 2), total))
+
+    def N1OptimizeBinning(self, path, tree, outdir, maxbins=3):
+        # Optimize the binnings of N-1 plots filled from the test sample.
+        n1plotter = N1Plotter(
+            cuts=["branch_1>0.5", "branch_2<6.0"],
+            binnings={"branch_1": [20, 0.0, 10.0], "branch_2": [20, 0.0, 10.0]},
+        )
+        n1plotter.Register(
+            path, type="background", tree=tree, template="background", weight="1"
+        )
+        n1plotter.Register(
+            path, type="signal", tree=tree, template="signal", weight="0.1*branch_3"
+        )
+        n1plotter.CreateHistograms()
+        histos = [
+            histo
+            for samples in n1plotter._store.values()
+            for sample in samples.values()
+            for histo in sample.values()
+        ]
+        totals = [h.Integral(0, h.GetNbinsX() + 1) for h in histos]
+        n1plotter.OptimizeBinnings(minbkg=10.0, maxbins=maxbins)
+        for histo, total in zip(histos, totals):
+            edges = IOManager._getBinning(histo)["xbinning"]
+            self.assertLessEqual(histo.GetNbinsX(), maxbins)
+            self.assertTrue(all([np.isclose(e * 2, round(e * 2)) for e in edges]))
+            self.assertTrue(
+                np.isclose(histo.Integral(0, histo.GetNbinsX() + 1), total)
+            )
+        n1plotter.SetOutputFormat("N-1_optimized_{cutvalue}.pdf")
+        n1plotter.Print(outdir, optimizebinning={"minbkg": 10.0, "maxbins": maxbins})
+        for cutvalue in ["0.5", "6.0"]:
+            self.assertTrue(
+                os.path.isfile(
+                    os.path.join(outdir, "N-1_optimized_{}.pdf".format(cutvalue))
+                )
+            )
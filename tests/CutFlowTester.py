@@ -0,0 +1,89 @@
+#!/usr/bin/env python 2.7
+
+from __future__ import print_function
+
+import ROOT
+
+import os
+import json
+import uuid
+import unittest
+
+import numpy as np
+
+from distutils.spawn import find_executable
+
+from mephisto import CutFlow, Histo1D
+
+
+class CutFlowTester(unittest.TestCase):
+    def _getYield(self, path, tree, cuts, weight):
+        # Fill the events passing the cuts into a single bin (plus under- and overflow).
+        histo = Histo1D(uuid.uuid4().hex[:16], "", 1, 0.0, 1.0)
+        histo.Fill(path, tree=tree, varexp="branch_1", cuts=cuts, weight=weight)
+        bins = range(histo.GetNbinsX() + 2)
+        return (
+            sum([histo.GetBinContent(i) for i in bins]),
+            np.sqrt(sum([histo.GetBinError(i) ** 2 for i in bins])),
+            histo.GetEntries(),
+        )
+
+    def CutFlow(self, path, tree, outdir):
+        # Compare the yields of the cut flow to the ones filled cut by cut.
+        cuts = ["branch_1 > 0.5", "branch_2 > 1.0", "branch_3 < 4.0", "branch_4 > 2.0"]
+        preselection = ["branch_5 > 1.0"]
+        samples = [
+            {"title": "weighted", "cuts": [], "weight": "branch_6"},
+            {"title": "selected", "cuts": ["branch_7 < 8.0"], "weight": "1"},
+        ]
+        cutflow = CutFlow()
+        cutflow.SetCuts("&&".join(cuts[:2]), *cuts[2:])
+        cutflow.SetPreselection(*preselection)
+        for sample in samples:
+            cutflow.Register(path, tree=tree, **sample)
+        self.assertEqual(cutflow.GetCuts(), cuts)
+        cumulative = cutflow.GetYields()
+        individual = cutflow.GetYields(individual=True)
+        for sample in samples:
+            selection = preselection + sample["cuts"]
+            for i in range(len(cuts) + 1):
+                for yields, stepcuts in [
+                    (cumulative, cuts[:i]),
+                    (individual, cuts[i - 1 : i]),
+                ]:
+                    expected = self._getYield(
+                        path, tree, selection + stepcuts, sample["weight"]
+                    )
+                    y = yields[sample["title"]]
+                    self.assertTrue(np.isclose(y["yield"][i], expected[0], rtol=1e-9))
+                    self.assertTrue(np.isclose(y["error"][i], expected[1], rtol=1e-9))
+                    self.assertEqual(y["raw"][i], expected[2])
+        for ext in ["csv", "json"]:
+            outpath = os.path.join(outdir, "cutflow.{}".format(ext))
+            cutflow.PrintCutFlowTable(outpath, silent=True, mkdir=True)
+            self.assertTrue(os.path.isfile(outpath))
+        with open(os.path.join(outdir, "cutflow.json")) as jsonfile:
+            self.assertEqual(json.load(jsonfile)["cuts"], cuts)
+
+    def CutFlowTeX(self, path, tree, outdir):
+        # Typeset cuts with characters special to LaTeX, e.g. a logical OR, in the TeX
+        # cut flow table (and compile it if possible).
+        cuts = ["branch_1>0.5||branch_2<1.0", "branch_3<4.0"]
+        cutflow = CutFlow()
+        cutflow.SetCuts(*cuts)
+        cutflow.Register(path, tree=tree, title="sample", weight="1")
+        self.assertEqual(cutflow.GetCuts(), cuts)
+        expected = self._getYield(path, tree, cuts[:1], "1")
+        self.assertTrue(
+            np.isclose(cutflow.GetYields()["sample"]["yield"][1], expected[0])
+        )
+        outpath = os.path.join(outdir, "cutflow_or.tex")
+        cutflow.PrintCutFlowTable(outpath, silent=True, mkdir=True)
+        with open(outpath) as texfile:
+            tex = texfile.read()
+        self.assertNotIn("\\verb", tex)
+        self.assertIn("\\texttt{branch\\_1>0.5||branch\\_2<1.0} &", tex)
+        if find_executable("pdflatex") is not None:
+            outpath = os.path.join(outdir, "cutflow_or.pdf")
+            cutflow.PrintCutFlowTable(outpath, silent=True, crop=False)
+            self.assertTrue(os.path.isfile(outpath))
@@ -0,0 +1,83 @@
+#!/usr/bin/env python 2.7
+
+from __future__ import print_function
+
+import ROOT
+
+import os
+import json
+import itertools
+import unittest
+
+import numpy as np
+import root_numpy as rnp
+
+from mephisto import CutOptimizer
+from mephisto.Helpers import AsymptoticFormulae
+
+
+class CutOptimizerTester(unittest.TestCase):
+    def OptimizeCuts(self, path, tree, outdir):
+        # Compare the yields of all cut combinations, including a window cut, to the
+        # ones of the events selected cut by cut.
+        variables = [
+            ("branch_1", ">", [0.5, 1.0, 2.0]),
+            ("branch_1", "<", [4.0, 6.0, 8.0]),
+            ("branch_2", ">=", [1.0, 2.0, 3.0]),
+        ]
+        preselection = "branch_5>1.0"
+        optimizer = CutOptimizer()
+        for varexp, comparator, thresholds in variables:
+            optimizer.AddVariable(varexp, comparator, thresholds)
+        optimizer.SetPreselection(preselection)
+        optimizer.SetMinBkg(10.0)
+        optimizer.Register(path, type="signal", tree=tree, weight="0.1*branch_3")
+        optimizer.Register(path, type="background", tree=tree, cuts="branch_4<8.0")
+        self.assertEqual(len(optimizer.GetVariables()), 3)
+        results = optimizer.Optimize(nresults=100)
+        self.assertEqual(optimizer.GetBestCuts(), results[0]["cuts"])
+        sensitivities = [r["sensitivity"] for r in results]
+        self.assertEqual(sensitivities, sorted(sensitivities, reverse=True))
+        results = {tuple(r["thresholds"]): r for r in results}
+        array = rnp.root2array(
+            path, tree, branches=["branch_{}".format(i + 1) for i in range(5)]
+        )
+        array = array[array["branch_5"] > 1.0]
+        sigweights = 0.1 * array["branch_3"]
+        bkgselected = array["branch_4"] < 8.0
+        ops = {">": np.greater, ">=": np.greater_equal, "<": np.less}
+        nvalid = 0
+        for combination in itertools.product(*[v[2] for v in variables]):
+            selected = np.ones(len(array), dtype=bool)
+            for (varexp, comparator, _), value in zip(variables, combination):
+                selected &= ops[comparator](array[varexp], value)
+            sig = np.sum(sigweights[selected])
+            bkg = float(np.sum(selected & bkgselected))
+            if bkg < 10.0:
+                self.assertNotIn(combination, results)
+                continue
+            nvalid += 1
+            result = results[combination]
+            self.assertTrue(np.isclose(result["signal"], sig, rtol=1e-9))
+            self.assertTrue(np.isclose(result["background"], bkg, rtol=1e-9))
+            self.assertTrue(np.isclose(result["bkgerror"], np.sqrt(bkg), rtol=1e-9))
+            relerr = np.sqrt(1.0 / bkg + optimizer.GetFlatBkgSys() ** 2)
+            self.assertTrue(
+                np.isclose(
+                    result["sensitivity"],
+                    AsymptoticFormulae.AsimovExpZ(sig, bkg, relerr),
+                    rtol=1e-6,
+                )
+            )
+        self.assertEqual(nvalid, len(results))
+        outpath = os.path.join(outdir, "cutoptimizer.json")
+        optimizer.PrintResults(outpath, silent=True, mkdir=True)
+        with open(outpath) as jsonfile:
+            self.assertEqual(len(json.load(jsonfile)), nvalid)
+
+    def OptimizeCutsGridSize(self, nvariables=6, nthresholds=21):
+        # Refuse grids too large to be held in memory (before reading any events).
+        optimizer = CutOptimizer()
+        for i in range(nvariables):
+            optimizer.AddVariable("branch_{}".format(i + 1), ">", nthresholds, 0.0, 5.0)
+        self.assertRaises(ValueError, optimizer.Optimize)
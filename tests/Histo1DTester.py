@@ -8,7 +8,11 @@ import os
 import uuid
 import unittest
 
-from mephisto import Histo1D
+from array import array
+
+import numpy as np
+
+from mephisto import Histo1D, IOManager
 
 
 class Histo1DTester(unittest.TestCase):
@@ -16,3 +20,99 @@ class Histo1DTester(unittest.TestCase):
         self.histo = Histo1D(uuid.uuid4().hex[:16], "", 40, 0.0, 40.0)
         self.histo.Fill(path, **kwargs)
         self.assertIsNotNone(self.histo)
+
+    def _assertSameBins(self, histo, reference):
+        # Compare the bin contents and errors (including under- and overflow bins).
+        for get in [IOManager._getBinContents, IOManager._getBinSumw2]:
+            self.assertTrue(np.allclose(get(histo), get(reference), rtol=1e-9))
+
+    def Lazy(self, path, tree):
+        # Compare a lazy expression to the same arithmetic done eagerly by ROOT.
+        h1, h2, h3 = [
+            Histo1D(uuid.uuid4().hex[:16], "", 40, 0.0, 40.0) for i in range(3)
+        ]
+        for i, histo in enumerate([h1, h2, h3], start=1):
+            histo.Fill(path, tree=tree, varexp="branch_{}".format(i), weight="1.5")
+        eager = ROOT.TH1D(h2)
+        eager.Scale(2)
+        eager.Divide(h3)
+        eager.Add(h1)
+        expr = h1.Lazy() + h2.Lazy() * 2 / h3.Lazy()
+        self.assertEqual(len(expr.GetListOfHistograms()), 3)
+        self._assertSameBins(expr.Materialize(), eager)
+        self._assertSameBins((h1.Lazy() + h2 * 2 / h3).Materialize(), eager)
+        # A histogram is fully correlated with itself:
+        ratio = (h1.Lazy() / h1.Lazy()).Materialize()
+        self.assertTrue(np.all(IOManager._getBinSumw2(ratio) == 0))
+
+    def Rebin(self, nbins=10):
+        # Compare the rebinning to ROOT's TH1::Rebin.
+        histo = Histo1D(uuid.uuid4().hex[:16], "", nbins, 0.0, float(nbins))
+        for i in range(nbins + 2):  # including under- and overflow bins
+            histo.SetBinContent(i, i + 1.0)
+            histo.SetBinError(i, 0.1 * (i + 1))
+        histo.SetEntries(100)
+        for args in [(3,), (3, "", array("d", [0.0, 2.0, 5.0, 10.0]))]:
+            reference = ROOT.TH1D(histo)
+            reference = ROOT.TH1D.Rebin(reference, *args)
+            rebinned = Histo1D(uuid.uuid4().hex[:16], histo).Rebin(*args)
+            self._assertSameBins(rebinned, reference)
+            self.assertEqual(rebinned.GetEntries(), histo.GetEntries())
+            self.assertEqual(
+                rebinned._lowbinedges, IOManager._getAxisEdges(reference.GetXaxis())
+            )
+        # Remaining bins of an integer rebinning go to the overflow bin:
+        rebinned = Histo1D(uuid.uuid4().hex[:16], histo).Rebin(3)
+        self.assertEqual(rebinned._lowbinedges, [0.0, 3.0, 6.0, 9.0])
+        self.assertAlmostEqual(
+            rebinned.GetBinContent(4), histo.GetBinContent(10) + histo.GetBinContent(11)
+        )
+        # With a new name the original histogram is left unchanged:
+        contents = IOManager._getBinContents(histo)
+        rebinned = histo.Rebin([2.0, 5.0, 8.0], newname=uuid.uuid4().hex[:16])
+        self.assertIsInstance(rebinned, Histo1D)
+        self.assertTrue(np.all(IOManager._getBinContents(histo) == contents))
+        self.assertAlmostEqual(rebinned.GetBinContent(0), sum(contents[:3]))
+        self.assertAlmostEqual(rebinned.GetBinContent(3), sum(contents[9:]))
+        for edges in [[0.0, 2.5, 10.0], [0.0, 5.0, 5.0], [5.0, 2.0]]:
+            self.assertRaises(ValueError, histo.Rebin, edges)
+
+    def Lightweight(self, outdir):
+        # Setters called on a lightweight histogram before it is materialized must not
+        # be overridden by its deferred properties.
+        histos = [
+            Histo1D(uuid.uuid4().hex[:16], "", 10, 0.0, 1.0, linestyle=2, **kwargs)
+            for kwargs in [{}, {"lightweight": True}]
+        ]
+        regular, lightweight = histos
+        self.assertIsNone(lightweight._errorband)
+        for histo in histos:
+            histo.SetLineColor(2)
+            histo.SetLineWidth(5)
+        self.assertIsNotNone(lightweight._errorband)
+        for histo in histos:
+            histo.Print(os.path.join(outdir, "lightweight.pdf"), mkdir=True)
+            self.assertEqual(histo.GetLineColor(), 2)
+            self.assertEqual(histo.GetLineWidth(), 5)
+            self.assertEqual(histo.GetLineStyle(), 2)
+        self.assertEqual(lightweight.GetProperties(), regular.GetProperties())
+        # Deferred properties are applied once the histogram is styled:
+        lightweight = Histo1D(
+            uuid.uuid4().hex[:16], "", 10, 0.0, 1.0, linestyle=2, lightweight=True
+        )
+        self.assertEqual(lightweight.GetProperty("linestyle"), 2)
+        # Other setters and properties do not materialize the histogram:
+        lightweight = Histo1D(
+            uuid.uuid4().hex[:16], "", 10, 0.0, 1.0, markersize=2.0, lightweight=True
+        )
+        self.assertAlmostEqual(lightweight.GetMarkerSize(), 2.0)
+        lightweight.SetBinContent(1, 3.0)
+        lightweight.SetBinError(1, 2.0)
+        lightweight.SetEntries(9)
+        lightweight.SetDirectory(0)
+        lightweight.SetName(uuid.uuid4().hex[:16])
+        self.assertIsNone(lightweight._errorband)
+        lightweight.SetFillColor(4)
+        self.assertIsNotNone(lightweight._errorband)
+        self.assertEqual(lightweight.GetFillColor(), 4)
+        self.assertEqual(lightweight._errorband.GetBinContent(1), 3.0)
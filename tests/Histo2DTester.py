@@ -0,0 +1,105 @@
+#!/usr/bin/env python 2.7
+
+from __future__ import print_function
+
+import ROOT
+
+import uuid
+import unittest
+
+import numpy as np
+
+from mephisto import Histo2D, IOManager
+
+
+class Histo2DTester(unittest.TestCase):
+    def Interpolate(self, nbins=24, tilesize=8, nthreads=2):
+        # Compare the interpolated values of a nonlinear surface to the analytic ones.
+        # The holes lie next to the boundaries of the tiles, which start at every
+        # tilesize-th bin (counting the underflow bin).
+        surface = lambda x, y: 2.0 + np.sin(3.0 * x) * np.cos(2.0 * y)
+        holes = [(8, 4), (9, 12), (7, 20), (16, 4), (15, 12), (17, 20), (8, 8)]
+        holes += [(16, 16), (4, 9), (20, 16), (12, 7), (12, 17), (8, 16), (16, 8)]
+        histo = Histo2D(uuid.uuid4().hex[:16], "", nbins, 0.0, 1.0, nbins, 0.0, 1.0)
+        for i in range(1, nbins + 1):
+            for j in range(1, nbins + 1):
+                if (i, j) not in holes:
+                    x = histo.GetXaxis().GetBinCenter(i)
+                    y = histo.GetYaxis().GetBinCenter(j)
+                    histo.SetBinContent(i, j, surface(x, y))
+                    histo.SetBinError(i, j, 0.1)
+        contents = IOManager._getBinContents(histo)
+        sumw2 = IOManager._getBinSumw2(histo)
+        # Interpolation errors on triangles of diameter d = sqrt(2) * binwidth: the
+        # directional derivatives of the surface are bounded by 13 (second) and
+        # 13 ** 1.5 (third), thus linear interpolation errs by at most 13 / 2 * d ** 2
+        # and the cubic one (roughly) by at most 13 ** 1.5 / 6 * d ** 3.
+        d = np.sqrt(2.0) / nbins
+        tolerances = {"linear": 6.5 * d ** 2, "cubic": 13 ** 1.5 / 6.0 * d ** 3}
+        for method, tolerance in tolerances.items():
+            globalhisto = Histo2D(uuid.uuid4().hex[:16], histo)
+            globalhisto.Interpolate(method=method)
+            localhisto = Histo2D(uuid.uuid4().hex[:16], histo)
+            localhisto.Interpolate(
+                local=True, method=method, tilesize=tilesize, nthreads=nthreads
+            )
+            for i, j in holes:
+                expected = surface(
+                    histo.GetXaxis().GetBinCenter(i), histo.GetYaxis().GetBinCenter(j)
+                )
+                for interpolated in [globalhisto, localhisto]:
+                    self.assertLess(
+                        abs(interpolated.GetBinContent(i, j) - expected), tolerance
+                    )
+            filled = contents != 0
+            for get, expected in [
+                (IOManager._getBinContents, contents),
+                (IOManager._getBinSumw2, sumw2),
+            ]:
+                self.assertTrue(np.allclose(get(localhisto)[filled], expected[filled]))
+
+    def RetrieveContours(self, nbins=40):
+        # Extract the contours of a radial paraboloid, which are circles.
+        histo = Histo2D(uuid.uuid4().hex[:16], "", nbins, -1.0, 1.0, nbins, -1.0, 1.0)
+        self.assertEqual(histo.RetrieveContourGraphDict(), {})
+        for i in range(1, nbins + 1):
+            for j in range(1, nbins + 1):
+                x = histo.GetXaxis().GetBinCenter(i)
+                y = histo.GetYaxis().GetBinCenter(j)
+                histo.SetBinContent(i, j, x ** 2 + y ** 2)
+        radii = [0.3, 0.5, 0.7]
+        histo.SetContour(*[r ** 2 for r in radii])
+        graphsdict = histo.RetrieveContourGraphDict()
+        self.assertEqual(len(graphsdict), len(radii))
+        for radius in radii:
+            graphs = graphsdict[radius ** 2]
+            self.assertEqual(len(graphs), 1)
+            self.assertTrue(graphs[0].InheritsFrom("TGraph"))
+            npoints = graphs[0].GetN()
+            x = np.array([graphs[0].GetX()[i] for i in range(npoints)])
+            y = np.array([graphs[0].GetY()[i] for i in range(npoints)])
+            self.assertTrue(np.allclose(np.hypot(x, y), radius, atol=2e-3))
+            self.assertEqual((x[0], y[0]), (x[-1], y[-1]))  # closed contour line
+
+    def Rebin(self, nbinsx=6, nbinsy=9):
+        # Compare the rebinning to ROOT's TH2::Rebin2D and to sums over the arrays.
+        histo = Histo2D(uuid.uuid4().hex[:16], "", nbinsx, 0.0, 6.0, nbinsy, 0.0, 9.0)
+        for i in range(nbinsx + 2):  # including under- and overflow bins
+            for j in range(nbinsy + 2):
+                histo.SetBinContent(i, j, 1.0 + i + 10.0 * j)
+                histo.SetBinError(i, j, 0.1 * (1.0 + i * j))
+        reference = ROOT.TH2D(histo)
+        reference = ROOT.TH2D.Rebin2D(reference, 2, 3)
+        rebinned = Histo2D(uuid.uuid4().hex[:16], histo).Rebin(2, 3)
+        for get in [IOManager._getBinContents, IOManager._getBinSumw2]:
+            self.assertTrue(np.allclose(get(rebinned), get(reference), rtol=1e-9))
+        contents = IOManager._getBinContents(histo)
+        rebinned = histo.Rebin([1.0, 4.0, 6.0], newname=uuid.uuid4().hex[:16])
+        self.assertTrue(np.all(IOManager._getBinContents(histo) == contents))
+        self.assertEqual(rebinned._xlowbinedges, [1.0, 4.0, 6.0])
+        self.assertEqual(rebinned._ylowbinedges, histo._ylowbinedges)
+        merged = IOManager._getBinContents(rebinned)
+        self.assertTrue(np.allclose(merged[0], contents[:2].sum(axis=0)))
+        self.assertTrue(np.allclose(merged[1], contents[2:5].sum(axis=0)))
+        self.assertTrue(np.allclose(merged[-1], contents[7:].sum(axis=0)))
+        self.assertRaises(ValueError, histo.Rebin, [0.0, 1.5, 6.0])
@@ -0,0 +1,63 @@
+#!/usr/bin/env python 2.7
+
+from __future__ import print_function
+
+import ROOT
+
+import os
+import time
+import uuid
+import signal
+import unittest
+
+from mephisto import Histo1D, PlotBatch
+
+
+class _FailingPlot(object):
+    # Printable object failing in the given way.
+    def __init__(self, mode):
+        self._mode = mode
+
+    def Print(self, path, **kwargs):
+        if self._mode == "raise":
+            raise RuntimeError("Failing on purpose!")
+        elif self._mode == "crash":
+            os.kill(os.getpid(), signal.SIGKILL)
+        elif self._mode == "hang":
+            time.sleep(600)
+
+
+class PlotBatchTester(unittest.TestCase):
+    def PrintBatch(self, outdir, nworkers=2, timeout=20.0):
+        # Print a few histograms in parallel together with jobs raising an exception,
+        # crashing their worker process and exceeding the timeout.
+        batch = PlotBatch(nworkers=nworkers)
+        modes = ["histo", "raise", "histo", "crash", "histo", "hang", "histo"]
+        paths = []
+        for i, mode in enumerate(modes):
+            path = os.path.join(outdir, "plotbatch", "plotbatch_{}.pdf".format(i))
+            if os.path.isfile(path):
+                os.remove(path)
+            paths.append(path)
+            if mode == "histo":
+                histo = Histo1D(uuid.uuid4().hex[:16], "", 20, -5.0, 5.0)
+                histo.FillRandom("gaus", 1000)
+                batch.Register(histo, path, mkdir=True)
+            else:
+                batch.Register(_FailingPlot(mode), path)
+        self.assertEqual(batch.GetNJobs(), len(modes))
+        results = batch.Run(timeout=timeout)
+        self.assertEqual([r["index"] for r in results], list(range(len(modes))))
+        errors = {
+            "raise": "RuntimeError: Failing on purpose!",
+            "crash": "died unexpectedly",
+            "hang": "Timed out",
+        }
+        for mode, path, result in zip(modes, paths, results):
+            self.assertEqual(result["path"], path)
+            self.assertEqual(result["success"], mode == "histo")
+            self.assertEqual(os.path.isfile(path), mode == "histo")
+            if mode == "histo":
+                self.assertIsNone(result["error"])
+            else:
+                self.assertIn(errors[mode], result["error"])
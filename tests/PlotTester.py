@@ -0,0 +1,85 @@
+#!/usr/bin/env python 2.7
+
+from __future__ import print_function
+
+import ROOT
+
+import os
+import uuid
+import shutil
+import unittest
+
+from mephisto import Histo1D, Stack, profiler
+from mephisto.Helpers import FingerprintIndex
+
+
+class PlotTester(unittest.TestCase):
+    def _print(self, obj, path, **kwargs):
+        # Print the object and return whether it has been drawn or skipped.
+        enabled = profiler.IsEnabled()
+        profiler.Enable()
+        profiler.Reset()
+        try:
+            obj.Print(path, **kwargs)
+            counters = profiler.GetStats()["counters"]
+        finally:
+            profiler.Reset()
+            if not enabled:
+                profiler.Disable()
+        self.assertEqual(
+            counters.get("plots.printed", 0) + counters.get("plots.skipped", 0), 1
+        )
+        return counters.get("plots.printed", 0) == 1
+
+    def _createHisto(self, scale=1.0):
+        histo = Histo1D(uuid.uuid4().hex[:16], "", 10, 0.0, 1.0)
+        for i in range(1, 11):
+            histo.SetBinContent(i, scale * i)
+        return histo
+
+    def SkipUnchanged(self, outdir):
+        # Unchanged plots are only skipped if requested and any change of the objects
+        # (including their style) or of the output file causes them to be printed.
+        outdir = os.path.join(outdir, "skipunchanged")
+        if os.path.isdir(outdir):
+            shutil.rmtree(outdir)
+        indexpath = os.path.join(outdir, FingerprintIndex.filename)
+        histo = self._createHisto()
+        path = os.path.join(outdir, "histo.pdf")
+        self.assertTrue(self._print(histo, path, mkdir=True))
+        self.assertTrue(self._print(histo, path))
+        self.assertFalse(os.path.exists(indexpath))  # skipping is opt-in
+        self.assertTrue(self._print(histo, path, skipunchanged=True))
+        self.assertTrue(os.path.isfile(indexpath))
+        self.assertFalse(self._print(histo, path, skipunchanged=True))
+        self.assertTrue(self._print(histo, path, skipunchanged=True, force=True))
+        self.assertFalse(self._print(histo, path, skipunchanged=True))
+        # Restyling the histogram and its errorband:
+        histo.SetLineColor(ROOT.kRed)
+        self.assertTrue(self._print(histo, path, skipunchanged=True))
+        self.assertFalse(self._print(histo, path, skipunchanged=True))
+        histo.DeclareProperty("errorbandfillcolor", ROOT.kBlue)
+        self.assertTrue(self._print(histo, path, skipunchanged=True))
+        self.assertFalse(self._print(histo, path, skipunchanged=True))
+        # Touching the output file:
+        index = FingerprintIndex(outdir)
+        fingerprint = index.Load()[os.path.basename(path)]["fingerprint"]
+        self.assertTrue(index.IsUpToDate(path, fingerprint))
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + 10.0))
+        self.assertFalse(index.IsUpToDate(path, fingerprint))
+        self.assertTrue(self._print(histo, path, skipunchanged=True))
+        self.assertFalse(self._print(histo, path, skipunchanged=True))
+        # Restyling a stack without changing its histograms:
+        stack = Stack()
+        stack.Register(self._createHisto(), stack=True)
+        stack.Register(self._createHisto(2.0), stack=True)
+        drawstacksum = stack.GetProperty("drawstacksum")
+        self.assertIsNotNone(drawstacksum)
+        self.assertIsNotNone(stack.GetProperties().get("drawstacksum"))
+        path = os.path.join(outdir, "stack.pdf")
+        self.assertTrue(self._print(stack, path, skipunchanged=True))
+        self.assertFalse(self._print(stack, path, skipunchanged=True))
+        stack.SetDrawStackSum(not drawstacksum)
+        self.assertTrue(self._print(stack, path, skipunchanged=True))
+        self.assertFalse(self._print(stack, path, skipunchanged=True))
@@ -0,0 +1,85 @@
+#!/usr/bin/env python 2.7
+
+from __future__ import print_function
+
+import ROOT
+
+import os
+import json
+import uuid
+import unittest
+
+import numpy as np
+
+from mephisto import Histo1D, Stack
+
+
+class StackTester(unittest.TestCase):
+    def _createHisto(self, title, values, weight=1.0, **kwargs):
+        # Histogram filled with the weighted values (including under- and overflow).
+        histo = Histo1D(uuid.uuid4().hex[:16], title, 10, 0.0, 10.0, **kwargs)
+        for value in values:
+            histo.Fill(value, weight)
+        return histo
+
+    def _integralAndError(self, histo):
+        error = ROOT.Double(0.0)
+        integral = histo.IntegralAndError(0, histo.GetNbinsX() + 1, error)
+        return integral, float(error)
+
+    def Yields(self, outdir):
+        # Compare the yields to the integrals of the stacked histograms, the stacksum
+        # and the non-stacked histograms, including ties, and save them to JSON and NPZ.
+        values = [-1.0, 0.5, 2.5, 2.5, 7.0, 12.0]
+        stacked = [
+            self._createHisto("small", values, 0.5),
+            self._createHisto("large", values[1:], 1.5),
+            self._createHisto("small (tie)", values, 0.5),
+        ]
+        nonstacked = [
+            self._createHisto("signal", values[2:], 2.0, drawoption="HIST"),
+            self._createHisto("data", values, 1.0, drawoption="E1"),
+            self._createHisto("signal (tie)", values[2:], 2.0, drawoption="HIST"),
+        ]
+        aliases = {nonstacked[1].GetName(): "Data"}
+        stack = Stack()
+        for histo in stacked:
+            stack.Register(histo, stack=True)
+        for histo in nonstacked:
+            stack.Register(histo, stack=False)
+        rows = stack.GetYields(aliases=aliases)
+        # Stable ordering by decreasing yield within each group:
+        stacksum = stack._stacksumhisto
+        expected = [stacked[1], stacked[0], stacked[2], stacksum]
+        expected += [nonstacked[0], nonstacked[2], nonstacked[1]]
+        self.assertEqual([row["name"] for row in rows], [h.GetName() for h in expected])
+        self.assertEqual(
+            [row["title"] for row in rows[:3] + rows[4:]],
+            ["large", "small", "small (tie)", "signal", "signal (tie)", "Data"],
+        )
+        for row, histo in zip(rows, expected):
+            integral, error = self._integralAndError(histo)
+            self.assertTrue(np.isclose(row["yield"], integral, rtol=1e-9))
+            self.assertTrue(np.isclose(row["error"], error, rtol=1e-9))
+            self.assertEqual(row["raw"], int(histo.GetEntries()))
+        self.assertEqual(rows[0]["raw"], len(values) - 1)
+        self.assertEqual(rows[3]["raw"], sum([int(h.GetEntries()) for h in stacked]))
+        self.assertTrue(
+            np.isclose(
+                rows[3]["yield"], sum([self._integralAndError(h)[0] for h in stacked])
+            )
+        )
+        self.assertEqual([row["data"] for row in rows[3:]], [False] * 3 + [True])
+        # Round trips:
+        jsonpath = os.path.join(outdir, "yields.json")
+        stack.PrintYieldTable(jsonpath, aliases=aliases, silent=True, mkdir=True)
+        with open(jsonpath) as jsonfile:
+            self.assertEqual(json.load(jsonfile), rows)
+        npzpath = os.path.join(outdir, "yields.npz")
+        stack.PrintYieldTable(npzpath, aliases=aliases, silent=True, mkdir=True)
+        arrays = np.load(npzpath)
+        self.assertEqual(
+            sorted(arrays.files), ["data", "error", "name", "raw", "title", "yield"]
+        )
+        for key in arrays.files:
+            self.assertEqual(arrays[key].tolist(), [row[key] for row in rows])
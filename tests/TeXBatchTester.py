@@ -0,0 +1,68 @@
+#!/usr/bin/env python 2.7
+
+from __future__ import print_function
+
+import ROOT
+
+import os
+import shutil
+import unittest
+from distutils.spawn import find_executable
+
+import mephisto.Helpers
+from mephisto import TeXBatch
+
+
+class TeXBatchTester(unittest.TestCase):
+    def _run(self, jobs, **kwargs):
+        # Compile the (content, path) jobs in a batch and return the created files.
+        batch = TeXBatch(**kwargs)
+        for content, path in jobs:
+            batch.Add(content, path)
+        self.assertEqual(batch.GetNJobs(), len(jobs))
+        return batch.Run()
+
+    def CompileTeX(self, outdir):
+        # Skip unchanged snippets, compile multi-page and failing snippets one by one
+        # and fall back to compiling one by one if 'pdfseparate' is missing.
+        if find_executable("pdflatex") is None:
+            return  # skipped without a TeX distribution
+        outdir = os.path.join(outdir, "texbatch")
+        if os.path.isdir(outdir):
+            shutil.rmtree(outdir)
+        os.makedirs(outdir)
+        paths = [os.path.join(outdir, "snippet_{}.pdf".format(i)) for i in range(3)]
+        jobs = [(r"Snippet ${}$".format(i), path) for i, path in enumerate(paths)]
+        self.assertEqual(self._run(jobs), paths)
+        self.assertTrue(all([os.path.isfile(path) for path in paths]))
+        self.assertEqual(self._run(jobs), [])
+        self.assertEqual(self._run(jobs, force=True), paths)
+        # Changing a snippet only recompiles this one:
+        jobs[1] = (r"Snippet $1^2$", paths[1])
+        self.assertEqual(self._run(jobs), [paths[1]])
+        # Snippet spanning more than one page:
+        multipage = os.path.join(outdir, "multipage.pdf")
+        jobs.append((r"First page\clearpage Second page", multipage))
+        self.assertEqual(self._run(jobs, force=True), paths + [multipage])
+        # Snippet failing to compile:
+        failing = os.path.join(outdir, "failing.pdf")
+        failingtex = r"\input{nonexistentfile}"
+        self.assertEqual(
+            self._run([(failingtex, failing)] + jobs, force=True),
+            paths + [multipage],
+        )
+        self.assertFalse(os.path.exists(failing))
+        # A single snippet failing to compile raises an error:
+        self.assertRaises(ValueError, self._run, [(failingtex, failing)])
+        # Missing 'pdfseparate':
+        _find_executable = mephisto.Helpers.find_executable
+        mephisto.Helpers.find_executable = lambda cmd: (
+            None if cmd == "pdfseparate" else _find_executable(cmd)
+        )
+        try:
+            for path in paths:
+                os.remove(path)
+            self.assertEqual(self._run(jobs[:3]), paths)
+            self.assertTrue(all([os.path.isfile(path) for path in paths]))
+        finally:
+            mephisto.Helpers.find_executable = _find_executable
@@ -0,0 +1,45 @@
+#!/usr/bin/env python 2.7
+
+from __future__ import print_function
+
+import ROOT
+
+import uuid
+import unittest
+
+import numpy as np
+
+from mephisto import Text
+
+
+class TextTester(unittest.TestCase):
+    def _assertStats(self, hits, misses):
+        stats = Text.GetMetrics().GetStats()
+        self.assertEqual((stats["hits"], stats["misses"]), (hits, misses))
+
+    def Measure(self):
+        # Count the hits and misses of the text extent cache and compare the measured
+        # extents to the ones of a drawn text.
+        metrics = Text.GetMetrics()
+        metrics.Clear()
+        self._assertStats(0, 0)
+        title = "#splitline{{{}}}{{x_{{2}}^{{3}}}}".format(uuid.uuid4().hex[:8])
+        xsize, ysize = Text.Measure(title, textsize=20)
+        self._assertStats(0, 2)
+        self.assertEqual(metrics.GetStats()["size"], 2)
+        self.assertEqual(Text.Measure(title, textsize=20), (xsize, ysize))
+        self._assertStats(2, 2)
+        canvas = ROOT.TCanvas(uuid.uuid4().hex[:8], "", 800, 600)
+        text = Text(0.2, 0.5, title, textsize=20)
+        text.Draw()
+        self.assertEqual((text.GetXsize(), text.GetYsize()), (xsize, ysize))
+        self._assertStats(4, 2)
+        # Measuring again without the cache yields the same extents:
+        metrics.Clear()
+        self._assertStats(0, 0)
+        self.assertTrue(np.isclose(text.GetXsize(), xsize))
+        self.assertTrue(np.isclose(text.GetYsize(), ysize))
+        self._assertStats(0, 2)
+        self.assertEqual(Text.Measure(title, textsize=20), (xsize, ysize))
+        self._assertStats(2, 2)
+        canvas.Close()
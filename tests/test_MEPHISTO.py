@@ -10,11 +10,32 @@ logger.setLevel(10)
 
 from IOManagerTester import IOManagerTester
 from Histo1DTester import Histo1DTester
+from Histo2DTester import Histo2DTester
+from CutFlowTester import CutFlowTester
+from BinningOptimizerTester import BinningOptimizerTester
+from CutOptimizerTester import CutOptimizerTester
+from PlotBatchTester import PlotBatchTester
+from PlotTester import PlotTester
+from TextTester import TextTester
+from TeXBatchTester import TeXBatchTester
+from StackTester import StackTester
 
 __filedir__ = os.path.dirname(os.path.abspath(__file__))
 
 
-class MEPHISTOTester(IOManagerTester, Histo1DTester):
+class MEPHISTOTester(
+    IOManagerTester,
+    Histo1DTester,
+    Histo2DTester,
+    CutFlowTester,
+    BinningOptimizerTester,
+    CutOptimizerTester,
+    PlotBatchTester,
+    PlotTester,
+    TextTester,
+    TeXBatchTester,
+    StackTester,
+):
     # Monolithic test: Module test are executed successively.
     # (see: https://stackoverflow.com/a/5387956/10986034)
 
@@ -23,6 +44,7 @@ class MEPHISTOTester(IOManagerTester, Histo1DTester):
         self._testsample = os.path.join(self._datadir, "test.root")
         self._tree = "tree"
         self._nbranches = 10
+        self._outdir = os.path.join(__filedir__, "output")
 
     def step1(self):
         """Create test sample"""
@@ -38,10 +60,68 @@ class MEPHISTOTester(IOManagerTester, Histo1DTester):
                 self._testsample, tree=self._tree, varexp="branch_{}".format(i + 1)
             )
 
+    def step3(self):
+        """Interpolate histograms locally"""
+        self.Interpolate(tilesize=8, nthreads=2)
+
+    def step4(self):
+        """Retrieve contours of histograms"""
+        self.RetrieveContours()
+
+    def step5(self):
+        """Compute cut flows"""
+        self.CutFlow(self._testsample, self._tree, self._outdir)
+        self.CutFlowTeX(self._testsample, self._tree, self._outdir)
+
+    def step6(self):
+        """Evaluate lazy histogram expressions"""
+        self.Lazy(self._testsample, self._tree)
+
+    def step7(self):
+        """Rebin histograms"""
+        Histo1DTester.Rebin(self)
+        Histo2DTester.Rebin(self)
+
+    def step8(self):
+        """Optimize binnings"""
+        self.AsimovExpZArray()
+        self.OptimizeBinning()
+        self.N1OptimizeBinning(self._testsample, self._tree, self._outdir)
+
+    def step9(self):
+        """Optimize cuts"""
+        self.OptimizeCutsGridSize()
+        self.OptimizeCuts(self._testsample, self._tree, self._outdir)
+
+    def step10(self):
+        """Style lightweight histograms"""
+        self.Lightweight(self._outdir)
+
+    def step11(self):
+        """Print plots in parallel"""
+        self.PrintBatch(self._outdir)
+
+    def step12(self):
+        """Skip unchanged plots"""
+        self.SkipUnchanged(self._outdir)
+
+    def step13(self):
+        """Measure texts"""
+        self.Measure()
+
+    def step14(self):
+        """Compile batches of TeX files"""
+        self.CompileTeX(self._outdir)
+
+    def step15(self):
+        """Compute stack yields"""
+        self.Yields(self._outdir)
+
     def retrieve_steps(self):
-        for name in dir(self):  # dir() result is implicitly sorted
-            if name.startswith("step"):
-                yield int(name[4:]), getattr(self, name)
+        # Sort numerically (dir() sorts alphabetically, i.e. step10 before step2):
+        names = [name for name in dir(self) if name.startswith("step")]
+        for name in sorted(names, key=lambda name: int(name[4:])):
+            yield int(name[4:]), getattr(self, name)
 
     def test_steps(self):
         for idx, step in self.retrieve_steps():
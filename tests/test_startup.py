@@ -0,0 +1,63 @@
+#!/usr/bin/env python 2.7
+
+import os
+import sys
+import json
+import unittest
+import subprocess
+
+__filedir__ = os.path.dirname(os.path.abspath(__file__))
+
+
+class StartupTester(unittest.TestCase):
+    # The imports are done in fresh interpreters, since the modules imported by other
+    # tests would be cached otherwise.
+
+    def Run(self, code):
+        # Execute the code in a new interpreter and return the JSON printed last.
+        output = subprocess.check_output(
+            [sys.executable, "-c", code], cwd=os.path.dirname(__filedir__)
+        )
+        return json.loads(output.decode("utf-8").strip().splitlines()[-1])
+
+    def test_import_package(self):
+        """Importing the package must not import ROOT or any of its modules"""
+        result = self.Run(
+            "import sys, json, time\n"
+            "start = time.time()\n"
+            "import mephisto\n"
+            "elapsed = time.time() - start\n"
+            "print(json.dumps({'modules': sorted(sys.modules), 'time': elapsed}))\n"
+        )
+        self.assertNotIn("ROOT", result["modules"])
+        self.assertNotIn("mephisto.Histo1D", result["modules"])
+        self.assertLess(result["time"], 1.0)
+
+    def test_import_iomanager(self):
+        """Importing the IOManager must not import the plotting classes or scipy"""
+        result = self.Run(
+            "import sys, json\n"
+            "from mephisto import IOManager\n"
+            "print(json.dumps(sorted(sys.modules)))\n"
+        )
+        self.assertIn("mephisto.IOManager", result)
+        for module in ["mephisto.Histo2D", "mephisto.Plot", "scipy"]:
+            self.assertNotIn(module, result)
+
+    def test_deferred_properties(self):
+        """Properties of a class are loaded on first use, not on import"""
+        result = self.Run(
+            "import sys, json\n"
+            "from mephisto import Histo1D\n"
+            "pending = sys.modules['mephisto.MethodProxy']._pendingclasses\n"
+            "loaded = [Histo1D not in pending]\n"
+            "histo = Histo1D('h', '', 10, 0.0, 1.0)\n"
+            "loaded.append(Histo1D not in pending)\n"
+            "loaded.append('errorbandfillcolor' in Histo1D.GetListOfProperties())\n"
+            "print(json.dumps(loaded))\n"
+        )
+        self.assertEqual(result, [False, True, True])
+
+
+if __name__ == "__main__":
+    unittest.main()